@@ -0,0 +1,64 @@
+import argparse
+import random
+import re
+import time
+
+from fuzzywuzzy import fuzz as legacy_fuzz
+
+from src.telegram.similarity import SimilarityScorer
+
+# 合成语料用到的片段，模拟资源群里的消息格式
+TITLES = ['我是刑警', '繁花', '庆余年', '与凤行', '玫瑰的故事', '墨雨云间', '长相思', '唐朝诡事录', '度华年', '边水往事']
+TAGS = ['#电视剧', '#国产剧', '#4K', '#高码率', '#动画', '#纪录片', '#电影']
+
+
+def make_corpus(size: int, seed: int = 0) -> list:
+    """生成合成消息语料"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        title = rng.choice(TITLES) + ('' if rng.random() < 0.5 else f' 第{rng.randint(1, 3)}季')
+        corpus.append(
+            f"名称：{title} ({rng.randint(2015, 2025)}) [WEB-4K] [国语中字] [全{rng.randint(10, 60)}集]\n\n"
+            f"描述：{''.join(rng.choice('的一是了我不人在他有这个上们来到时大地为子中你说生国年着就那和要') for _ in range(rng.randint(80, 300)))}\n\n"
+            f"链接：https://pan.quark.cn/s/{i:012x}\n\n"
+            f"📁 大小：{rng.randint(1, 200)} GB\n"
+            f"🏷 标签：{' '.join(rng.sample(TAGS, 3))}\n"
+            f"📢 频道：@yunpanshare\n"
+            f"👥 群组：@yunpanshares"
+        )
+    return corpus
+
+
+def legacy_score(query: str, text: str) -> int:
+    """原 calculate_similarity 的实现"""
+    query = re.sub(r'[^\w\s]', '', query.lower())
+    text = re.sub(r'[^\w\s]', '', text.lower())
+    return legacy_fuzz.partial_ratio(query, text)
+
+
+def report(name: str, count: int, elapsed: float):
+    print(f"{name:<24} {count:>8} 条  {elapsed:>8.3f} 秒  {count / elapsed:>12,.0f} 条/秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='相似度打分基准测试')
+    parser.add_argument('--size', type=int, default=20000, help='合成语料条数')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.size)
+    query = '我是刑警'
+
+    start = time.perf_counter()
+    for text in corpus:
+        legacy_score(query, text)
+    report('原实现 (逐条)', len(corpus), time.perf_counter() - start)
+
+    scorer = SimilarityScorer()
+    start = time.perf_counter()
+    scorer.score_batch(query, corpus)
+    report('SimilarityScorer 批量', len(corpus), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import logging
 import argparse
 import sys
 from src.collector import ResourceCollector
+from src.quark.capacity import CapacityManager
+from src.telegram.listener import ResourceListener
 
 # 配置日志
 logging.basicConfig(
@@ -15,12 +17,45 @@ logging.basicConfig(
     ]
 )
 
-async def main():
-    """主函数"""
+def parse_args(argv=None) -> argparse.Namespace:
+    """解析命令行参数"""
     parser = argparse.ArgumentParser(description='热门资源收集器')
     parser.add_argument('--test', action='store_true', help='测试模式，只处理第一个热搜项目')
     parser.add_argument('--debug', action='store_true', help='调试模式，显示更多信息')
-    args = parser.parse_args()
+    parser.add_argument('--listen', action='store_true', help='监听模式，实时处理目标群组的新消息')
+    parser.add_argument('--capacity-report', action='store_true', help='只输出夸克网盘容量清理计划，不删除文件')
+    return parser.parse_args(argv)
+
+async def run_once(collector: ResourceCollector, test_mode: bool = False, debug: bool = False):
+    """用已初始化的收集器执行一次收集，可被常驻进程反复调用"""
+    print("\n1. 获取热搜榜...")
+    results = await collector.collect_resources(test_mode=test_mode, debug=debug)
+    
+    if results:
+        print("\n✅ 收集完成！找到以下资源：")
+        collector.print_results(results)
+    else:
+        print("\n⚠️ 未找到任何资源")
+    return results
+
+async def listen(collector: ResourceCollector):
+    """监听目标群组的新消息，命中热搜标题的资源立即转存分享"""
+    async def on_result(title, search_results):
+        print(f"\n🆕 {title}\n🔗链接: {search_results[0]['share_url']}")
+
+    print("\n开始监听群组新消息，按 Ctrl+C 退出...")
+    listener = ResourceListener(collector.searcher, collector.hot_search, on_result=on_result)
+    await listener.run()
+
+async def capacity_report(collector: ResourceCollector):
+    """输出各夸克账号的容量清理计划（dry-run）"""
+    reports = await collector.searcher.quark_api.ensure_capacity(dry_run=True)
+    for report in reports:
+        print(CapacityManager.format_report(report))
+
+async def main():
+    """主函数"""
+    args = parse_args()
     
     print("\n=== 热门资源收集器 ===")
     print("正在启动...")
@@ -29,19 +64,20 @@ async def main():
     collector = ResourceCollector()
     
     try:
+        # 容量报告只访问夸克网盘，不需要登录 Telegram
+        if args.capacity_report:
+            await capacity_report(collector)
+            return
+
         # 初始化
         if not await collector.init():
             logging.error("初始化失败")
             return
             
-        print("\n1. 获取热搜榜...")
-        results = await collector.collect_resources(test_mode=args.test, debug=args.debug)
-        
-        if results:
-            print("\n✅ 收集完成！找到以下资源：")
-            collector.print_results(results)
+        if args.listen:
+            await listen(collector)
         else:
-            print("\n⚠️ 未找到任何资源")
+            await run_once(collector, test_mode=args.test, debug=args.debug)
             
     except KeyboardInterrupt:
         print("\n\n⚠️ 程序被用户中断")
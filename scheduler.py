@@ -1,9 +1,11 @@
-import schedule
-import time
 import asyncio
 import logging
-from datetime import datetime
-from main import main
+import signal
+import sys
+from src.collector import ResourceCollector
+from src.config import SCHEDULER_CONFIG
+from src.utils.scheduler import AsyncScheduler
+from main import run_once
 
 # 配置日志
 logging.basicConfig(
@@ -16,32 +18,58 @@ logging.basicConfig(
     ]
 )
 
-async def job():
-    """定时任务"""
-    logging.info(f"开始执行定时任务 - {datetime.now()}")
+async def run_scheduler():
+    """常驻运行定时任务
+
+    整个进程只有一个事件循环和一个收集器，Telegram 连接和夸克、百度的会话在多次运行之间复用，
+    定期检查连接并在断开时重连。不同频率的收集任务共用同一个 overlap_key，不会同时运行。
+    """
+    collector = ResourceCollector()
+    scheduler = AsyncScheduler()
+
     try:
-        await main()
-    except Exception as e:
-        logging.error(f"任务执行出错: {str(e)}")
-    logging.info(f"定时任务完成 - {datetime.now()}")
-
-def run_job():
-    """运行异步任务的包装函数"""
-    asyncio.run(job())
-
-def run_scheduler():
-    """启动定时任务调度器"""
-    # 设置每天早上7点运行
-    schedule.every().day.at("07:00").do(run_job)
-    
-    logging.info("定时任务已启动")
-    
-    # 立即运行一次（测试用）
-    run_job()
-    
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # 每分钟检查一次
+        if not await collector.init():
+            logging.error("初始化失败")
+            return
+
+        async def collect():
+            if not await collector.health_check():
+                logging.error("连接不可用，跳过本次收集")
+                return
+            await run_once(collector)
+
+        async def health_check():
+            await collector.health_check()
+
+        for at in SCHEDULER_CONFIG['RUN_AT']:
+            scheduler.daily(at, collect, name=f"collect@{at}", overlap_key="collect")
+        if SCHEDULER_CONFIG['RUN_INTERVAL_MINUTES'] > 0:
+            scheduler.every(
+                SCHEDULER_CONFIG['RUN_INTERVAL_MINUTES'] * 60, collect,
+                name=f"collect/{SCHEDULER_CONFIG['RUN_INTERVAL_MINUTES']}min", overlap_key="collect"
+            )
+        scheduler.every(SCHEDULER_CONFIG['HEALTH_CHECK_INTERVAL'], health_check, name="health_check")
+
+        # 收到终止信号时停止调度，等待正在运行的任务结束
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, scheduler.stop)
+            except NotImplementedError:
+                pass
+
+        logging.info("定时任务已启动")
+        collect_jobs = [job for job in scheduler.jobs if job.overlap_key == "collect"]
+        if SCHEDULER_CONFIG['RUN_ON_START'] and collect_jobs:
+            # 立即运行一次收集
+            scheduler.trigger(collect_jobs[0])
+        await scheduler.run()
+    finally:
+        await collector.close()
+        logging.info("定时任务已停止")
 
 if __name__ == "__main__":
-    run_scheduler() 
\ No newline at end of file
+    try:
+        asyncio.run(run_scheduler())
+    except KeyboardInterrupt:
+        sys.exit(0)
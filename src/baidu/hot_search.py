@@ -4,18 +4,27 @@ from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 import asyncio
 
+from src.utils.http import shared_session
+from src.utils.rate_limit import rate_limiter
+
 class BaiduHotSearch:
     """百度热搜获取类"""
     
     def __init__(self):
-        self.session = aiohttp.ClientSession()
+        # 使用共享的 HTTP 连接池
+        shared_session.acquire()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
         
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共享的 HTTP 会话"""
+        return shared_session.get()
+
     async def close(self):
         """关闭会话"""
-        await self.session.close()
+        await shared_session.release()
         
     async def get_hot_searches(self) -> List[Dict[str, Any]]:
         """获取百度热搜榜前10的影视作品"""
@@ -49,12 +58,13 @@ class BaiduHotSearch:
         retry_count = 0
         while retry_count < max_retries:
             try:
+                await rate_limiter.acquire("baidu")
                 async with self.session.get(url, headers=self.headers) as response:
                     if response.status != 200:
                         logging.error(f"获取{category}热搜失败，状态码: {response.status}")
                         retry_count += 1
                         if retry_count < max_retries:
-                            await asyncio.sleep(1)
+                            rate_limiter.on_failure("baidu", "default", 1)
                             continue
                         return []
                         
@@ -87,7 +97,7 @@ class BaiduHotSearch:
                         logging.warning(f"未找到{category}热搜项目")
                         retry_count += 1
                         if retry_count < max_retries:
-                            await asyncio.sleep(1)
+                            rate_limiter.on_failure("baidu", "default", 1)
                             continue
                             
                     return items[:10]  # 每个分类取前10
@@ -96,7 +106,7 @@ class BaiduHotSearch:
                 logging.error(f"获取{category}热搜失败: {str(e)}")
                 retry_count += 1
                 if retry_count < max_retries:
-                    await asyncio.sleep(1)
+                    rate_limiter.on_failure("baidu", "default", 1)
                     continue
                 return []
                 
@@ -3,9 +3,9 @@ import logging
 import json
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-from src.config import RESULTS_CONFIG, QUARK_CONFIG, WECHAT_CONFIG
+from src.config import RESULTS_CONFIG, QUARK_CONFIG, WECHAT_CONFIG, COLLECTOR_CONFIG
 from src.baidu.hot_search import BaiduHotSearch
 from src.telegram.searcher import TelegramResourceSearcher
 from src.wechat.sender import send_results_to_wechat
@@ -40,6 +40,10 @@ class ResourceCollector:
             logging.error(f"初始化失败: {str(e)}")
             return False
         
+    async def health_check(self) -> bool:
+        """检查各连接是否可用，断开的连接会重新建立"""
+        return await self.searcher.health_check()
+
     def format_for_wechat(self, item: Dict[str, Any], results: List[Dict[str, Any]]) -> str:
         """格式化为适合微信分享的格式"""
         template = (
@@ -64,36 +68,23 @@ class ResourceCollector:
         if debug:
             print(f"获取到 {len(hot_items)} 个热搜项目")
 
-        # 处理每个热搜项目
-        for item in hot_items:
-            try:
-                if debug:
-                    print(f"\n处理热搜: {item['title']}")
-
-                # 搜索并保存资源
-                search_results = await self.searcher.search_and_save(item["title"])
-                if not search_results:
-                    if debug:
-                        print("未找到相关资源")
-                    continue
+        if test_mode:
+            hot_items = hot_items[:1]
 
-                # 格式化结果
-                formatted_text = self.format_for_wechat(item, search_results)
-                results.append({
-                    "title": item["title"],
-                    "text": formatted_text,
-                    "rank": item.get('hot_score', 'N/A'),
-                    "search_results": search_results
-                })
+        # 转存前先清理容量不足的账号，被删除文件的分享链接不能再从缓存中返回
+        reports = await self.searcher.quark_api.ensure_capacity()
+        evicted = [item["share_url"] for report in reports for item in report["deleted"] if item.get("share_url")]
+        if evicted:
+            removed = self.searcher.invalidate_share_urls(evicted)
+            logging.info(f"容量清理删除了 {len(evicted)} 个分享，清除 {removed} 条搜索缓存")
 
-                if test_mode:
-                    break
+        previous = self._load_previous_results()
+        results = await self._run_pipeline(hot_items, debug, previous)
 
-            except Exception as e:
-                logging.error(f"处理热搜项目时出错: {str(e)}", exc_info=True)
-                if debug:
-                    print(f"处理出错: {str(e)}")
-                continue
+        # 与上一次运行的结果相同时不重复保存和发送
+        if results and self._result_keys(results) == self._result_keys(previous.values()):
+            logging.info("热搜资源与上一次运行相同，跳过保存和发送")
+            return results
 
         # 保存结果到文件
         if results:
@@ -108,6 +99,196 @@ class ResourceCollector:
 
         return results
             
+    def _load_previous_results(self) -> Dict[str, Dict[str, Any]]:
+        """读取上一次运行的结果（latest.json），按标题索引"""
+        latest_file = RESULTS_CONFIG['LATEST_FILE']
+        if not latest_file.exists():
+            return {}
+        try:
+            with open(latest_file, 'r', encoding='utf-8') as f:
+                return {result['title']: result for result in json.load(f)}
+        except Exception as e:
+            logging.error(f"读取上一次运行结果失败: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _result_keys(results) -> List[tuple]:
+        """结果的标题和分享链接，用于判断两次运行的结果是否相同"""
+        return [
+            (result['title'], result['search_results'][0].get('share_url'))
+            for result in results
+            if result.get('search_results')
+        ]
+
+    def _reuse_results(
+        self,
+        hot_items: List[Dict[str, Any]],
+        previous: Dict[str, Dict[str, Any]]
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """找出可以沿用已有结果的热搜项目
+
+        结果来自搜索缓存或上一次运行的 latest.json。我们创建的分享是永久有效的，
+        分享链接仍在转存登记表中时直接沿用，并更新登记的发布时间（容量清理按该时间保留最近发布的资源）；
+        不在登记表中（文件已被清理或分享已失效）的清除缓存，与新上榜、上次没有结果的项目一起重新检索。
+
+        Returns:
+            Dict[int, List[Dict[str, Any]]]: 热搜序号 -> 沿用的结果
+        """
+        reusable = {}
+        for index, item in enumerate(hot_items):
+            results = self.searcher.get_cached_results(item["title"])
+            if not results and item["title"] in previous:
+                results = previous[item["title"]].get("search_results") or []
+            if not results or not results[0].get("share_url"):
+                continue
+            share_url = results[0]["share_url"]
+            if self.searcher.quark_api.touch_share(share_url):
+                reusable[index] = results
+            else:
+                logging.info(f"[{item['title']}] 分享链接已不在登记表中，重新检索: {share_url}")
+                self.searcher.invalidate_cached_results(item["title"])
+        return reusable
+
+    async def _run_pipeline(
+        self,
+        hot_items: List[Dict[str, Any]],
+        debug: bool = False,
+        previous: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """分阶段并发处理热搜项目
+
+        热搜列表 -> Telegram 检索候选 -> 夸克转存 -> 夸克分享 -> 输出，
+        每个阶段有独立的队列和 worker 数。分享失败时回到转存阶段尝试下一个链接。
+        已有有效结果的项目不进入流水线，只检索新上榜、上次没有结果或分享已失效的项目。
+        输出按热搜列表的顺序（即热度）排列。
+        """
+        search_queue = asyncio.Queue()
+        save_queue = asyncio.Queue()
+        share_queue = asyncio.Queue()
+        outputs: Dict[int, Dict[str, Any]] = {}
+        finished = 0
+        all_done = asyncio.Event()
+
+        def finish(index: int, item: Dict[str, Any], search_results: List[Dict[str, Any]]):
+            """输出阶段：记录一个热搜项目的最终结果"""
+            nonlocal finished
+            if search_results:
+                outputs[index] = {
+                    "title": item["title"],
+                    "text": self.format_for_wechat(item, search_results),
+                    "rank": item.get('hot_score', 'N/A'),
+                    "search_results": search_results
+                }
+            elif debug:
+                print(f"[{item['title']}] 未找到相关资源")
+            finished += 1
+            if finished >= len(hot_items):
+                all_done.set()
+
+        async def search_worker():
+            while True:
+                batch = await search_queue.get()
+                try:
+                    candidates = await self.searcher.search_titles(
+                        [item["title"] for _, item in batch], debug=debug
+                    )
+                except Exception as e:
+                    logging.error(f"检索热搜项目时出错: {str(e)}", exc_info=True)
+                    candidates = {}
+                for index, item in batch:
+                    # 展开为 (候选资源, 链接) 列表，转存阶段按顺序尝试
+                    links = [
+                        (candidate, link)
+                        for candidate in candidates.get(item["title"], [])
+                        for link in candidate["links"]
+                    ]
+                    # 并发预检链接，去掉已失效的分享
+                    if links:
+                        try:
+                            link_status = await self.searcher.quark_api.validate_links([link for _, link in links])
+                            links = [(candidate, link) for candidate, link in links if link_status.get(link, True)]
+                        except Exception as e:
+                            logging.error(f"检查链接有效性时出错: {str(e)}", exc_info=True)
+                    if debug:
+                        print(f"[{item['title']}] 找到 {len(links)} 个候选链接")
+                    save_queue.put_nowait((index, item, links, 0))
+
+        async def save_worker():
+            while True:
+                index, item, links, position = await save_queue.get()
+                try:
+                    while position < len(links):
+                        link = links[position][1]
+                        if debug:
+                            print(f"[{item['title']}] 正在保存链接: {link}")
+                        save_result = await self.searcher.quark_api.save_shared_file(link)
+                        if save_result.get("success"):
+                            share_queue.put_nowait((index, item, links, position, save_result["fid"]))
+                            break
+                        logging.warning(f"保存文件失败: {save_result.get('message')}")
+                        position += 1
+                    else:
+                        self.searcher.cache_results(item["title"], [])
+                        finish(index, item, [])
+                except Exception as e:
+                    logging.error(f"处理热搜项目时出错: {str(e)}", exc_info=True)
+                    if debug:
+                        print(f"处理出错: {str(e)}")
+                    finish(index, item, [])
+
+        async def share_worker():
+            while True:
+                index, item, links, position, fid = await share_queue.get()
+                try:
+                    share_result = await self.searcher.quark_api.share_file(fid)
+                    if not share_result.get("success"):
+                        logging.error(f"创建分享链接失败: {share_result}")
+                        save_queue.put_nowait((index, item, links, position + 1))
+                        continue
+
+                    candidate = links[position][0]
+                    search_results = [self.searcher.build_result(candidate, share_result["share_url"])]
+                    self.searcher.cache_results(item["title"], search_results)
+                    if debug:
+                        print(f"[{item['title']}] 保存并分享成功: {share_result['share_url']}")
+                    finish(index, item, search_results)
+                except Exception as e:
+                    logging.error(f"处理热搜项目时出错: {str(e)}", exc_info=True)
+                    if debug:
+                        print(f"处理出错: {str(e)}")
+                    finish(index, item, [])
+
+        # 已有有效结果的项目直接输出，其余分批进入检索阶段
+        reusable = self._reuse_results(hot_items, previous or {})
+        pending = []
+        for index, item in enumerate(hot_items):
+            if index in reusable:
+                if debug:
+                    print(f"[{item['title']}] 沿用已有结果")
+                finish(index, item, reusable[index])
+            else:
+                pending.append((index, item))
+        logging.info(f"热搜项目 {len(hot_items)} 个，沿用已有结果 {len(reusable)} 个，需要检索 {len(pending)} 个")
+
+        search_workers = max(1, COLLECTOR_CONFIG['SEARCH_WORKERS'])
+        for i in range(min(search_workers, len(pending))):
+            search_queue.put_nowait(pending[i::search_workers])
+
+        if pending:
+            workers = (
+                [asyncio.create_task(search_worker()) for _ in range(search_workers)]
+                + [asyncio.create_task(save_worker()) for _ in range(max(1, COLLECTOR_CONFIG['SAVE_WORKERS']))]
+                + [asyncio.create_task(share_worker()) for _ in range(max(1, COLLECTOR_CONFIG['SHARE_WORKERS']))]
+            )
+            try:
+                await all_done.wait()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+        return [outputs[index] for index in sorted(outputs)]
+
     def _save_results(self, results: List[Dict[str, Any]]):
         """保存结果到文件"""
         try:
@@ -20,22 +20,111 @@ TELEGRAM_CONFIG = {
     'API_ID': int(os.getenv('API_ID')),
     'API_HASH': os.getenv('API_HASH'),
     'TARGET_GROUPS': os.getenv('TARGET_GROUPS', '').split(','),
-    'MAX_RESULTS': int(os.getenv('MAX_RESULTS', '100'))
+    'MAX_RESULTS': int(os.getenv('MAX_RESULTS', '100')),
+    # 搜索模式: index 从本地消息索引检索（增量同步），server 使用 Telegram 服务端搜索，
+    # scan 逐条遍历群组历史（仅作兜底）
+    'SEARCH_MODE': os.getenv('SEARCH_MODE', 'index'),
+    'QUERY_VARIANTS': 4,  # 每个标题最多检索的变体数
+    'MAX_SERVER_SEARCHES': int(os.getenv('MAX_SERVER_SEARCHES', '40')),  # 服务端搜索模式下批量检索时每个群组最多的搜索次数
+    'GROUP_CONCURRENCY': int(os.getenv('GROUP_CONCURRENCY', '4')),  # 同时搜索的群组数
+    'ENTITY_CACHE_FILE': Path('quark_searcher.entities.json'),  # 群组实体缓存，与会话文件 quark_searcher.session 放在一起
+    'ENTITY_FAILURE_TTL': 300  # 群组解析失败后多久内不再重试（秒）
 }
 
 # 夸克网盘配置
 QUARK_CONFIG = {
     'COOKIE': os.getenv('QUARK_COOKIE'),
+    # 账号池：QUARK_COOKIE 为主账号，QUARK_COOKIE_1、QUARK_COOKIE_2 ... 为其他账号
+    'COOKIES': [os.getenv('QUARK_COOKIE')] + [
+        os.getenv(key) for key in sorted(
+            (key for key in os.environ if key.startswith('QUARK_COOKIE_') and key[13:].isdigit()),
+            key=lambda key: int(key[13:])
+        ) if os.getenv(key)
+    ],
     'BASE_URL': "https://drive-pc.quark.cn",
     'MAX_RETRIES': 5,  # 增加重试次数
-    'RETRY_DELAY': 2.0  # 增加重试延迟（秒）
+    'RETRY_DELAY': 2.0,  # 增加重试延迟（秒）
+    'REGISTRY_FILE': ROOT_DIR / "cache" / "quark_shares.db",  # 已转存分享登记表
+    'TASK_POLL_MIN_INTERVAL': 0.2,  # 任务轮询的初始间隔（秒）
+    'TASK_POLL_MAX_INTERVAL': 2.0,  # 任务轮询的最大间隔（秒）
+    'TASK_POLL_TIMEOUT': 120,  # 单个任务最长等待时间（秒），超时按失败处理
+    'SHARE_META_TTL': 600,  # 分享 stoken 和文件列表的缓存时间（秒）
+    'DEAD_SHARE_TTL_HOURS': 72,  # 失效分享的负缓存时间（小时）
+    'VALIDATE_CONCURRENCY': 8,  # 批量检查链接有效性的并发数
+    'ACCOUNT_LIMIT_CODES': [int(code) for code in os.getenv('QUARK_LIMIT_CODES', '32003').split(',') if code],  # 表示账号受限（容量不足等）的错误码
+    'ACCOUNT_PARK_SECONDS': 600,  # 账号受限后暂停使用的时间（秒）
+    'ACCOUNT_LOGIN_PARK_SECONDS': 3600,  # 账号需要重新登录（31001）后暂停使用的时间（秒）
+    'CAPACITY_REFRESH_INTERVAL': 600,  # 刷新账号容量的间隔（秒）
+    'CAPACITY_FULL_RATIO': 0.98,  # 已用容量达到该比例时不再分配转存
+    'CAPACITY_EVICT_RATIO': float(os.getenv('QUARK_EVICT_RATIO', '0.9')),  # 已用容量超过该比例时清理旧资源
+    'CAPACITY_TARGET_RATIO': float(os.getenv('QUARK_EVICT_TARGET_RATIO', '0.8')),  # 清理到该比例以下
+    'CAPACITY_EVICT_BATCH': 20,  # 每批删除的文件数
+    'CAPACITY_MIN_IDLE_HOURS': 48,  # 最近该时间内发布过的资源不清理（小时）
+    'CAPACITY_PURGE_RECYCLED': os.getenv('QUARK_PURGE_RECYCLED', 'true').lower() == 'true'  # 清理后从回收站彻底删除（回收站占用容量）
+}
+
+# 限流配置：每个上游、每类接口一个令牌桶，(速率 次/秒, 突发数)
+RATE_LIMIT_CONFIG = {
+    'LIMITS': {
+        'telegram': {
+            'default': (1.0, 3),
+            'history': (3.0, 5),  # 拉取历史消息（每页 100 条）
+            'search': (1.0, 3),  # 服务端搜索
+            'resolve': (0.5, 2),  # 解析群组实体
+        },
+        'quark': {
+            'default': (5.0, 10),
+            'token': (5.0, 10),  # 获取分享 stoken（检查链接有效性）
+            'detail': (5.0, 10),  # 分享文件列表
+            'save': (2.0, 4),  # 转存
+            'share': (2.0, 4),  # 创建分享
+            'task': (5.0, 10),  # 查询任务状态
+        },
+        'baidu': {
+            'default': (1.0, 3),
+        },
+    },
+    # 表示被限流的错误码（夸克的 HTTP 429 总是视为限流）
+    'THROTTLE_CODES': {
+        'quark': [429] + [int(code) for code in os.getenv('QUARK_THROTTLE_CODES', '').split(',') if code],
+    },
+    'THROTTLE_PAUSE': 10,  # 收到限流错误码后暂停的时间（秒）
+    'MIN_RATE_RATIO': 0.1,  # 速率最低降到初始速率的比例
+    'RECOVERY_STEP': 0.05,  # 每次成功恢复的速率（初始速率的比例）
+    'MAX_FLOOD_WAIT': 300  # FloodWait 超过该秒数时放弃本次请求，不再等待
+}
+
+# HTTP 连接池配置（夸克、百度共用）
+HTTP_CONFIG = {
+    'LIMIT': 100,  # 总连接数上限
+    'LIMIT_PER_HOST': 20,  # 每个主机的连接数上限
+    'DNS_CACHE_TTL': 300,  # DNS 缓存时间（秒）
+    'KEEPALIVE_TIMEOUT': 60,  # 空闲长连接的保持时间（秒）
+    'TIMEOUT': 60  # 默认请求超时（秒）
+}
+
+# 日志配置
+LOG_CONFIG = {
+    'FILE': os.getenv('LOG_FILE', 'app.log')  # setup_logger 写入的日志文件
 }
 
 # 缓存配置
 CACHE_CONFIG = {
     'DIR': ROOT_DIR / "cache",
-    'SEARCH_CACHE_FILE': ROOT_DIR / "cache" / "search_cache.json",
-    'EXPIRE_DAYS': 7
+    'SEARCH_CACHE_FILE': ROOT_DIR / "cache" / "search_cache.json",  # 旧版 JSON 缓存，启动时自动导入
+    'DB_FILE': ROOT_DIR / "cache" / "search_cache.db",
+    'EXPIRE_DAYS': 7,
+    'MEMORY_SIZE': 256,  # 内存 LRU 缓存条数
+    'COMPACT_INTERVAL': 3600  # 清理过期缓存的间隔（秒）
+}
+
+# 消息索引配置
+INDEX_CONFIG = {
+    'DB_FILE': ROOT_DIR / "cache" / "messages.db",
+    'SYNC_BATCH_SIZE': 500,  # 每批写入索引的消息数
+    'FETCH_CONCURRENCY': 4,  # 首次全量拉取的初始并发数
+    'FETCH_MAX_CONCURRENCY': 8,  # 首次全量拉取的最大并发数
+    'FETCH_RANGE_SIZE': 5000  # 全量拉取时每个消息ID区间的大小
 }
 
 # 结果配置
@@ -44,6 +133,44 @@ RESULTS_CONFIG = {
     'LATEST_FILE': ROOT_DIR / "results" / "latest.json"
 }
 
+# 相似度计算配置
+SIMILARITY_CONFIG = {
+    'BATCH_SIZE': 100  # 每批打分的消息数
+}
+
+# 收集流水线配置（各阶段的并发数）
+COLLECTOR_CONFIG = {
+    'SEARCH_WORKERS': int(os.getenv('COLLECTOR_SEARCH_WORKERS', '1')),  # 每个检索任务遍历一次群组，1 表示所有标题一轮检索完
+    'SAVE_WORKERS': int(os.getenv('COLLECTOR_SAVE_WORKERS', '4')),
+    'SHARE_WORKERS': int(os.getenv('COLLECTOR_SHARE_WORKERS', '4'))
+}
+
+# 定时任务配置
+SCHEDULER_CONFIG = {
+    'RUN_AT': [t.strip() for t in os.getenv('SCHEDULE_RUN_AT', '07:00').split(',') if t.strip()],  # 每天运行的时间，多个用逗号分隔
+    'RUN_INTERVAL_MINUTES': int(os.getenv('SCHEDULE_INTERVAL_MINUTES', '0')),  # 按固定间隔运行（分钟），0 表示不启用
+    'RUN_ON_START': os.getenv('SCHEDULE_RUN_ON_START', 'true').lower() == 'true',  # 启动后立即运行一次
+    'HEALTH_CHECK_INTERVAL': 300  # 检查 Telegram 连接的间隔（秒）
+}
+
+# 实时监听配置
+LISTENER_CONFIG = {
+    'HOT_REFRESH_INTERVAL': 1800,  # 刷新热搜标题的间隔（秒）
+    'MIN_SIMILARITY': 60  # 新消息标题与热搜标题的最低相似度
+}
+
+# 网页搜索服务配置
+WEB_CONFIG = {
+    'HOST': os.getenv('WEB_HOST', '0.0.0.0'),
+    'PORT': int(os.getenv('WEB_PORT', '8000')),
+    'MAX_CONCURRENT_SEARCHES': int(os.getenv('WEB_MAX_CONCURRENT_SEARCHES', '16')),  # 同时进行的搜索数，超出的请求排队
+    'SEARCH_TIMEOUT': 10,  # 单个请求等待搜索结果的时间（秒），页面的超时为 12 秒
+    'SEARCH_MAX_TIME': 120,  # 后台搜索的最长时间（秒），请求超时后搜索会继续进行直到该时间
+    'RESULT_CACHE_SIZE': 1024,  # 内存中缓存的查询结果数
+    'RESULT_CACHE_TTL': 600,  # 查询结果的内存缓存时间（秒）
+    'EMPTY_RESULT_CACHE_TTL': 30  # 没有结果的查询的缓存时间（秒），只用于合并短时间内的重复请求
+}
+
 # 创建必要的目录
 for dir_path in [CACHE_CONFIG['DIR'], RESULTS_CONFIG['DIR']]:
     dir_path.mkdir(exist_ok=True)
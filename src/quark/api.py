@@ -1,29 +1,81 @@
 import logging
 import asyncio
 import aiohttp
-from typing import Dict, Optional, Any
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Tuple
 import time
 import re
+from src.config import QUARK_CONFIG
 from src.utils.logger import setup_logger
+from src.quark.registry import ShareRegistry, DeadShareCache
+from src.quark.task_poller import TaskPoller
+from src.quark.share_meta import ShareMetaCache, is_dead_share
+from src.utils.http import shared_session, read_json
+from src.utils.rate_limit import rate_limiter
 
 # 设置日志
 logger = setup_logger(level=logging.WARNING)  # 默认使用INFO级别
 
+
+def extract_pwd_id(share_url: str) -> Optional[str]:
+    """从分享链接中提取 pwd_id"""
+    match = re.search(r'/s/([^/\s?#\]]+)', share_url)
+    return match.group(1) if match else None
+
+
+def endpoint_class(url: str) -> str:
+    """按接口路径划分限流类别"""
+    if "sharepage/token" in url:
+        return "token"
+    if "sharepage/detail" in url:
+        return "detail"
+    if "sharepage/save" in url:
+        return "save"
+    if "/share" in url:
+        return "share"
+    if "/task" in url:
+        return "task"
+    return "default"
+
+
+def extract_uid(cookie: str) -> str:
+    """从 cookie 中提取账号 __uid"""
+    match = re.search(r"(?<!\w)__uid=([^;\s]+)", cookie)
+    return match.group(1) if match else ""
+
+
 class QuarkAPI:
     """夸克网盘 API"""
 
-    def __init__(self, cookie: str):
+    def __init__(self, cookie: str, registry_file: Optional[str] = None):
         """初始化夸克网盘 API
 
         Args:
             cookie (str): 夸克网盘 cookie
+            registry_file (Optional[str]): 转存登记表文件，多账号时每个账号一份. Defaults to None.
         """
         self.cookie = cookie
-        self.session = aiohttp.ClientSession()
+        self.uid = extract_uid(cookie)
+        # 最近接口返回的错误码 (时间, 错误码)，账号池据此判断账号是否受限
+        self.recent_errors: Deque[Tuple[float, int]] = deque(maxlen=20)
         self.mparam = self._match_mparam_form_cookie(cookie)
         self.BASE_URL = "https://drive-pc.quark.cn"
         self.BASE_URL_APP = "https://drive-m.quark.cn"
         self.USER_AGENT = "Mozilla/5.0 (Linux; Android 13; M2011K2C Build/TKQ1.220829.002; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/111.0.5563.116 Mobile Safari/537.36 quark/7.4.5.680 ucpro/7.4.5.680"
+        # 请求头和 app 端参数只与账号有关，构造时生成一次
+        self._headers = self._build_headers()
+        self._app_headers = self._build_app_headers()
+        self._app_params = self._build_app_params()
+        # 使用共享的 HTTP 连接池
+        shared_session.acquire()
+        # 已转存分享的登记表，重复出现的分享直接复用
+        self.registry = ShareRegistry(registry_file)
+        # 已确认失效的分享，TTL 内不再尝试
+        self.dead_shares = DeadShareCache()
+        # 分享的 stoken 和文件列表缓存
+        self.share_meta = ShareMetaCache()
+        # 所有保存、分享任务共用一个轮询器
+        self.task_poller = TaskPoller(self._fetch_task)
         
         # 验证账号是否有效
         if "__uid" not in cookie:
@@ -43,12 +95,43 @@ class QuarkAPI:
             }
         return mparam
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共享的 HTTP 会话"""
+        return shared_session.get()
+
+    def _record_code(self, result: Any):
+        """记录接口返回的错误码"""
+        code = result.get("code") if isinstance(result, dict) else None
+        if code:
+            self.recent_errors.append((time.time(), code))
+
     def _get_headers(self) -> Dict[str, str]:
-        """获取请求头
+        """获取请求头（预先生成，调用方不要修改）
 
         Returns:
             Dict[str, str]: 请求头
         """
+        return self._headers
+
+    def _get_app_headers(self) -> Dict[str, str]:
+        """获取 app 端请求头（预先生成，调用方不要修改）
+
+        Returns:
+            Dict[str, str]: app 端请求头
+        """
+        return self._app_headers
+
+    def _get_app_params(self) -> Dict[str, str]:
+        """获取 app 端请求参数（预先生成，调用方不要修改）
+
+        Returns:
+            Dict[str, str]: app 端请求参数
+        """
+        return self._app_params
+
+    def _build_headers(self) -> Dict[str, str]:
+        """生成请求头"""
         return {
             'Cookie': self.cookie,
             'Content-Type': 'application/json',
@@ -66,23 +149,15 @@ class QuarkAPI:
             'sec-fetch-site': 'same-site'
         }
 
-    def _get_app_headers(self) -> Dict[str, str]:
-        """获取 app 端请求头
-
-        Returns:
-            Dict[str, str]: app 端请求头
-        """
+    def _build_app_headers(self) -> Dict[str, str]:
+        """生成 app 端请求头"""
         return {
             "Content-Type": "application/json",
             "User-Agent": self.USER_AGENT,
         }
 
-    def _get_app_params(self) -> Dict[str, str]:
-        """获取 app 端请求参数
-
-        Returns:
-            Dict[str, str]: app 端请求参数
-        """
+    def _build_app_params(self) -> Dict[str, str]:
+        """生成 app 端请求参数"""
         return {
             "device_model": "M2011K2C",
             "entry": "default_clouddrive",
@@ -159,8 +234,11 @@ class QuarkAPI:
             "uc_param_str": ""
         })
 
+        endpoint = endpoint_class(url)
         last_error = None
         for attempt in range(retry_count):
+            # 按账号和接口类别限流，被限流或出错时由限流器暂停，不在这里固定等待
+            await rate_limiter.acquire("quark", endpoint, self.uid)
             try:
                 logger.debug(f"发送请求: {method} {url}")
                 logger.debug(f"请求参数: {params}")
@@ -175,8 +253,17 @@ class QuarkAPI:
                     headers=headers,
                     timeout=client_timeout,
                 ) as response:
-                    result = await response.json()
+                    if response.status == 429:
+                        rate_limiter.on_error_code("quark", endpoint, 429, self.uid)
+                        last_error = "请求被限流 (HTTP 429)"
+                        continue
+                    result = await read_json(response)
                     logger.debug(f"响应结果: {result}")
+                    self._record_code(result)
+                    if rate_limiter.on_error_code("quark", endpoint, result.get("code"), self.uid):
+                        last_error = f"请求被限流: {result.get('message')}"
+                        continue
+                    rate_limiter.on_success("quark", endpoint, self.uid)
                     
                     if result.get("code") == 31001:  # require login
                         logger.error(f"请求需要登录: {url}")
@@ -191,7 +278,7 @@ class QuarkAPI:
                 if attempt < retry_count - 1:
                     wait_time = 2 ** attempt  # 指数退避
                     logger.warning(f"请求超时，等待{wait_time}秒后重试 ({attempt + 1}/{retry_count})")
-                    await asyncio.sleep(wait_time)
+                    rate_limiter.on_failure("quark", endpoint, wait_time, self.uid)
                     continue
 
             except Exception as e:
@@ -199,7 +286,7 @@ class QuarkAPI:
                 if attempt < retry_count - 1:
                     wait_time = 2 ** attempt
                     logger.warning(f"请求出错，等待{wait_time}秒后重试 ({attempt + 1}/{retry_count}): {str(e)}")
-                    await asyncio.sleep(wait_time)
+                    rate_limiter.on_failure("quark", endpoint, wait_time, self.uid)
                     continue
 
         logger.error(f"请求失败，已重试{retry_count}次: {last_error}")
@@ -239,41 +326,73 @@ class QuarkAPI:
             return result["data"]
         return None
 
-    async def save_shared_file(self, share_url: str) -> Dict[str, Any]:
-        """保存分享的文件到自己的网盘
+    async def get_stoken(self, pwd_id: str, refresh: bool = False) -> Dict[str, Any]:
+        """获取分享的 stoken，优先使用缓存
 
         Args:
-            share_url (str): 分享链接
+            pwd_id (str): 分享 ID
+            refresh (bool, optional): 是否忽略缓存重新获取. Defaults to False.
 
         Returns:
-            Dict[str, Any]: 响应结果
+            Dict[str, Any]: {"success": True, "stoken": ...}，失败时带 message 和 code
         """
-        try:
-            # 获取分享 ID
-            pwd_id = re.search(r'/s/([^/\s?]+)', share_url)
-            if not pwd_id:
-                return {"success": False, "message": "无效的分享链接"}
-            pwd_id = pwd_id.group(1)
+        if self.dead_shares.is_dead(pwd_id):
+            return {"success": False, "message": "分享链接已失效", "code": 41011}
+
+        if not refresh:
+            stoken = self.share_meta.get_stoken(pwd_id)
+            if stoken:
+                return {"success": True, "stoken": stoken}
+
+        token_result = await self._request(
+            "POST",
+            f"{self.BASE_URL}/1/clouddrive/share/sharepage/token",
+            params={
+                "pr": "ucpro",
+                "fr": "pc",
+            },
+            json={
+                "pwd_id": pwd_id,
+                "passcode": "",
+            },
+            use_app=False,
+        )
+        logger.debug(f"stoken响应: {token_result}")
+
+        # 检查链接是否失效
+        if is_dead_share(token_result):
+            self.share_meta.invalidate(pwd_id)
+            self.dead_shares.mark_dead(pwd_id, token_result.get("code"))
+            return {"success": False, "message": "分享链接已失效", "code": 41011}
+        if token_result.get("code") != 0 or not token_result.get("data", {}).get("stoken"):
+            return {
+                "success": False,
+                "message": f"获取token失败: {token_result.get('message')}",
+                "code": token_result.get("code")
+            }
 
-            # 获取 stoken
-            stoken_result = await self._request(
-                "POST",
-                f"{self.BASE_URL}/1/clouddrive/share/sharepage/token",
-                params={
-                    "pr": "ucpro",
-                    "fr": "pc",
-                },
-                json={
-                    "pwd_id": pwd_id,
-                    "passcode": "",
-                },
-                use_app=False,
-            )
-            if stoken_result.get("status") != 200:
-                return {"success": False, "message": f"获取文件信息失败: {stoken_result.get('message')}"}
-            stoken = stoken_result["data"]["stoken"]
+        stoken = token_result["data"]["stoken"]
+        self.share_meta.set_stoken(pwd_id, stoken)
+        return {"success": True, "stoken": stoken}
+
+    async def get_share_detail(self, pwd_id: str) -> Dict[str, Any]:
+        """获取分享的文件列表，优先使用缓存
+
+        缓存的 stoken 失效时（接口返回错误码）会重新获取一次 stoken 再试。
+
+        Returns:
+            Dict[str, Any]: {"success": True, "stoken": ..., "list": [...]}，失败时带 message 和 code
+        """
+        for refresh in (False, True):
+            token_result = await self.get_stoken(pwd_id, refresh=refresh)
+            if not token_result.get("success"):
+                return token_result
+            stoken = token_result["stoken"]
+
+            detail = self.share_meta.get_detail(pwd_id)
+            if detail is not None:
+                return {"success": True, "stoken": stoken, "list": detail}
 
-            # 获取文件列表
             detail_result = await self._request(
                 "GET",
                 f"{self.BASE_URL}/1/clouddrive/share/sharepage/detail",
@@ -291,11 +410,90 @@ class QuarkAPI:
                 },
                 use_app=False,
             )
-            if detail_result.get("code") != 0:
-                return {"success": False, "message": f"获取文件列表失败: {detail_result.get('message')}"}
+            logger.debug(f"文件信息响应: {detail_result}")
+
+            if detail_result.get("code") == 0:
+                detail = detail_result["data"]["list"]
+                if not detail:
+                    self.dead_shares.mark_dead(pwd_id, 41011)
+                    return {"success": False, "message": "分享中没有文件", "code": 41011}
+                self.share_meta.set_detail(pwd_id, detail)
+                return {"success": True, "stoken": stoken, "list": detail}
+
+            # 按错误码使缓存失效
+            self.share_meta.invalidate(pwd_id)
+            if is_dead_share(detail_result):
+                self.dead_shares.mark_dead(pwd_id, detail_result.get("code"))
+                return {"success": False, "message": "分享链接已失效", "code": 41011}
+            if refresh:
+                break
+
+        return {
+            "success": False,
+            "message": f"获取文件列表失败: {detail_result.get('message')}",
+            "code": detail_result.get("code")
+        }
+
+    async def validate_links(self, share_urls: List[str]) -> Dict[str, bool]:
+        """并发检查一批分享链接是否有效
+
+        只调用获取 stoken 的接口；已转存过的分享视为有效，负缓存中的分享视为失效，
+        新确认失效的分享会写入负缓存。网络错误等无法确定的情况视为有效，交给保存流程处理。
+
+        Args:
+            share_urls (List[str]): 分享链接列表
+
+        Returns:
+            Dict[str, bool]: 链接 -> 是否有效
+        """
+        semaphore = asyncio.Semaphore(QUARK_CONFIG['VALIDATE_CONCURRENCY'])
+
+        async def check(share_url: str) -> bool:
+            pwd_id = extract_pwd_id(share_url)
+            if not pwd_id:
+                return False
+            if self.registry.get(pwd_id):
+                return True
+            if self.dead_shares.is_dead(pwd_id):
+                return False
+            async with semaphore:
+                result = await self.get_stoken(pwd_id)
+            return result.get("success") or result.get("code") != 41011
+
+        unique_urls = list(dict.fromkeys(share_urls))
+        alive = await asyncio.gather(*(check(url) for url in unique_urls))
+        return dict(zip(unique_urls, alive))
+
+    async def save_shared_file(self, share_url: str) -> Dict[str, Any]:
+        """保存分享的文件到自己的网盘
+
+        Args:
+            share_url (str): 分享链接
+
+        Returns:
+            Dict[str, Any]: 响应结果
+        """
+        try:
+            # 获取分享 ID
+            pwd_id = extract_pwd_id(share_url)
+            if not pwd_id:
+                return {"success": False, "message": "无效的分享链接"}
+
+            # 已经转存过的分享直接复用
+            registered = self.registry.get(pwd_id)
+            if registered:
+                logger.debug(f"分享已转存过: {pwd_id} -> {registered['saved_fid']}")
+                self.registry.touch(pwd_id)
+                return {"success": True, "fid": registered["saved_fid"], "file_info": registered["file_info"]}
+
+            # 获取文件列表（stoken 和文件列表优先使用缓存）
+            detail_result = await self.get_share_detail(pwd_id)
+            if not detail_result.get("success"):
+                return detail_result
+            stoken = detail_result["stoken"]
 
             # 保存文件
-            file_info = detail_result["data"]["list"][0]
+            file_info = detail_result["list"][0]
             fid = file_info["fid"]
             fid_token = file_info["share_fid_token"]
 
@@ -321,6 +519,8 @@ class QuarkAPI:
             )
             logger.debug(f"保存文件结果: {save_result}")
             if save_result.get("code") != 0:
+                # stoken 可能已过期，下次重新获取
+                self.share_meta.invalidate(pwd_id)
                 return {"success": False, "message": f"保存文件失败: {save_result}"}
 
             # return {"success": True, "fid": fid}
@@ -335,7 +535,13 @@ class QuarkAPI:
                 return {"success": False, "message": "无法获取保存后的文件ID"}
             saved_fid = task_result["data"]["save_as"]["save_as_top_fids"][0]
             logger.debug(f"原文件:{fid}, 获取到保存后的文件ID: {saved_fid}")
-            return {"success": True, "fid": saved_fid}
+            saved_info = {
+                "file_name": file_info.get("file_name"),
+                "size": file_info.get("size"),
+                "dir": file_info.get("dir"),
+            }
+            self.registry.record_save(pwd_id, saved_fid, saved_info)
+            return {"success": True, "fid": saved_fid, "file_info": saved_info}
             # # 等待2秒确保文件保存完成
             # await asyncio.sleep(2)
 
@@ -404,74 +610,47 @@ class QuarkAPI:
             logger.error(f"保存文件失败: {str(e)}", exc_info=True)
             return {"success": False, "message": f"保存文件失败: {str(e)}"}
 
-    async def query_task(self, task_id: str, max_retries: int = 5) -> Dict[str, Any]:
-        """查询任务状态，支持重试"""
-        # if max_retries is None:
-        #     max_retries = 5
-            
+    async def _fetch_task(self, task_id: str, retry_index: int) -> Dict[str, Any]:
+        """查询一次任务状态"""
+        params = {
+            "pr": "ucpro",
+            "fr": "pc",
+            "task_id": task_id,
+            "retry_index": retry_index,
+            "__dt": int(time.time() * 1000),
+            "__t": int(time.time()),
+            "uc_param_str": ""
+        }
+        await rate_limiter.acquire("quark", "task", self.uid)
+        async with self.session.get(
+            f"{self.BASE_URL}/1/clouddrive/task",
+            headers=self._get_headers(),
+            params=params
+        ) as response:
+            result = await read_json(response)
+            logger.debug(f"任务查询响应: {result}")
+            self._record_code(result)
+            return result
+
+    async def query_task(self, task_id: str) -> Dict[str, Any]:
+        """等待任务完成，由共享的轮询器统一查询"""
         logger.debug(f"开始查询任务状态: {task_id}")
-        retry_count = 0
-        retry_index = 0
-        
-        while True:
-            try:
-                url = f"{self.BASE_URL}/1/clouddrive/task"
-                params = {
-                    "pr": "ucpro",
-                    "fr": "pc",
-                    "task_id": task_id,
-                    "retry_index": retry_index,
-                    "__dt": int(time.time() * 1000),
-                    "__t": int(time.time()),
-                    "uc_param_str": ""
-                }
-                
-                headers = {
-                    'Cookie': self.cookie,
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    'Origin': 'https://pan.quark.cn',
-                    'Referer': 'https://pan.quark.cn/',
-                    'Accept': 'application/json, text/plain, */*',
-                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-                    'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-                    'sec-ch-ua-mobile': '?0',
-                    'sec-ch-ua-platform': '"Windows"',
-                    'sec-fetch-dest': 'empty',
-                    'sec-fetch-mode': 'cors',
-                    'sec-fetch-site': 'same-site'
-                }
-                
-                async with self.session.get(url, headers=headers, params=params) as response:
-                    result = await response.json()
-                    logger.debug(f"任务查询响应: {result}")
-                    
-                    if result.get("code") != 0:
-                        if retry_count < max_retries:
-                            retry_count += 1
-                            await asyncio.sleep(1)
-                            continue
-                        logger.error(f"查询任务失败: {result}")
-                        return {"code": -1, "message": result.get('message')}
-                    
-                    task_status = result["data"]["status"]
-                    if task_status != 0:  # 非进行中状态
-                        return result
-                    
-                    retry_index += 1
-                    await asyncio.sleep(0.5)
-                    
-            except Exception as e:
-                if retry_count < max_retries:
-                    retry_count += 1
-                    await asyncio.sleep(1)
-                    continue
-                logger.error(f"查询任务状态出错: {str(e)}", exc_info=True)
-                return {"code": -1, "message": str(e)}
+        return await self.task_poller.wait(task_id)
+
+    def clear_share(self, share_url: str):
+        """清除登记表中已失效的分享链接"""
+        self.registry.clear_share(share_url)
+
+    def touch_share(self, share_url: str) -> bool:
+        """沿用已有结果时更新分享的发布时间，返回分享是否仍在登记表中"""
+        return self.registry.touch_share(share_url)
 
     async def close(self):
         """关闭会话"""
-        await self.session.close()
+        await self.task_poller.close()
+        await shared_session.release()
+        self.registry.close()
+        self.dead_shares.close()
 
     # async def get_saved_file_info(self, fid: str) -> Dict[str, Any]:
     #     """获取保存的文件信息
@@ -554,14 +733,25 @@ class QuarkAPI:
             Dict[str, Any]: 保存和分享结果
         """
         try:
+            # 已经转存并分享过的直接返回登记的分享链接
+            pwd_id = extract_pwd_id(share_url)
+            registered = self.registry.get(pwd_id) if pwd_id else None
+            if registered and registered["share_url"]:
+                logger.debug(f"分享已转存并分享过: {share_url} -> {registered['share_url']}")
+                self.registry.touch(pwd_id)
+                return {
+                    "success": True,
+                    "message": "文件保存并分享成功",
+                    "original_url": share_url,
+                    "share_url": registered["share_url"]
+                }
+
             # 先保存文件
             save_result = await self.save_shared_file(share_url)
             if not save_result.get("success"):
                 return save_result
 
-            # 等待2秒确保文件保存完成
-            await asyncio.sleep(0.5)
-
+            # save_shared_file 已等待保存任务完成，可以直接分享
             # # 从任务结果中获取保存后的文件ID
             # task_result = save_result.get("task_result", {})
             # if not task_result or not task_result.get("data", {}).get("save_as", {}).get("save_as_top_fids"):
@@ -592,6 +782,15 @@ class QuarkAPI:
         """分享自己网盘中的文件"""
         try:
             logger.debug(f"开始分享文件, fid: {fid}")
+
+            # 已经分享过的文件直接返回登记的分享链接
+            registered = self.registry.get_by_fid(fid)
+            if registered and registered["share_url"]:
+                return {
+                    "success": True,
+                    "share_url": registered["share_url"],
+                    "pwd_id": registered["share_pwd_id"]
+                }
             
             # 1. 创建分享任务
             logger.debug("创建分享任务...")
@@ -633,21 +832,15 @@ class QuarkAPI:
                 return {"success": False, "message": "无法获取分享ID"}
             share_id = share_task_result["data"]["share_id"]
             # share_id = share_result["data"]["share_id"]
-            await asyncio.sleep(1)  # 等待1秒再获取分享密码
 
             # 2. 获取分享密码
-            password_url = f"{self.BASE_URL}/1/clouddrive/share/password"
-            password_data = {
-                "share_id": share_id,
-                "scene": "link"
-            }
-
-            password_result = await self._request("POST", password_url, json=password_data)
+            password_result = await self._get_share_password(share_id)
             if password_result.get("code") != 0:
                 return {"success": False, "message": f"获取分享密码失败: {password_result.get('message')}"}
 
             pwd_id = password_result["data"]["pwd_id"]
             share_url = f"https://pan.quark.cn/s/{pwd_id}"
+            self.registry.record_share(fid, share_url, pwd_id)
 
             return {
                 "success": True,
@@ -660,6 +853,27 @@ class QuarkAPI:
             logger.error(f"分享文件失败: {str(e)}", exc_info=True)
             return {"success": False, "message": f"分享出错: {str(e)}"}
 
+    async def _get_share_password(self, share_id: str, max_retries: int = 4) -> Dict[str, Any]:
+        """获取分享密码
+
+        分享任务完成后分享记录偶尔还没有就绪，失败时按 0.2s 起的指数间隔重试，
+        不再固定等待。
+        """
+        password_url = f"{self.BASE_URL}/1/clouddrive/share/password"
+        password_data = {
+            "share_id": share_id,
+            "scene": "link"
+        }
+        delay = QUARK_CONFIG['TASK_POLL_MIN_INTERVAL']
+        for attempt in range(max_retries):
+            password_result = await self._request("POST", password_url, json=password_data)
+            if password_result.get("code") == 0 or attempt == max_retries - 1:
+                return password_result
+            logger.debug(f"分享尚未就绪，{delay}秒后重试: {password_result}")
+            await asyncio.sleep(delay)
+            delay *= 2
+        return password_result
+
     async def save_shared_file_internal(self, share_url: str) -> dict:
         """保存分享的文件到自己的网盘（内部方法）"""
         logger.debug(f"开始处理分享链接: {share_url}")
@@ -668,54 +882,19 @@ class QuarkAPI:
             pkey = share_url.split('/')[-1].strip(']')
             logger.debug(f"提取的pkey: {pkey}")
             
-            # 2. 获取stoken
-            token_url = f"{self.BASE_URL}/1/clouddrive/share/sharepage/token"
-            token_data = {
-                "pwd_id": pkey,
-                "passcode": ""
-            }
-            logger.debug(f"请求stoken, URL: {token_url}, 数据: {token_data}")
-            
-            async with self.session.post(token_url, headers=self._get_headers(), params={"pr": "ucpro", "fr": "pc"}, json=token_data) as token_response:
-                token_result = await token_response.json()
-                logger.debug(f"stoken响应: {token_result}")
-                
-                # 检查链接否失效
-                if token_result.get("status") == 404 or token_result.get("code") == 41011:
-                    logger.error("分享链接已失效")
-                    return {"success": False, "message": "分享链接已失效", "code": 41011}
-                
-                if token_result.get("code") != 0:
-                    logger.error(f"获取token失败: {token_result}")
-                    return {"success": False, "message": f"获取token失败: {token_result.get('message')}", "code": token_result.get("code")}
-                
-                stoken = token_result["data"]["stoken"]
-
-            # 3. 获取文件信息
-            info_url = f"{self.BASE_URL}/1/clouddrive/share/sharepage/detail"
-            params = {
-                "pr": "ucpro",
-                "fr": "pc",
-                "pwd_id": pkey,
-                "stoken": stoken,
-                "pdir_fid": "0"
-            }
-            logger.debug(f"请求文件信息, URL: {info_url}, 参数: {params}")
-            
-            async with self.session.get(info_url, headers=self._get_headers(), params=params) as response:
-                info_result = await response.json()
-                logger.debug(f"文件信息响应: {info_result}")
-                
-                if info_result.get("code") != 0:
-                    logger.error(f"获取文件信息失败: {info_result}")
-                    return {"success": False, "message": f"获取文件信息失败: {info_result.get('message')}"}
-                
-                file_info = info_result["data"]["list"][0]
-                fid = file_info["fid"]
-                fid_token = file_info["share_fid_token"]
-                logger.debug(f"获取到文件ID: {fid}, token: {fid_token}")
+            # 2. 获取stoken和文件信息（优先使用缓存）
+            detail_result = await self.get_share_detail(pkey)
+            if not detail_result.get("success"):
+                logger.error(f"获取文件信息失败: {detail_result}")
+                return detail_result
+            stoken = detail_result["stoken"]
+
+            file_info = detail_result["list"][0]
+            fid = file_info["fid"]
+            fid_token = file_info["share_fid_token"]
+            logger.debug(f"获取到文件ID: {fid}, token: {fid_token}")
 
-            # 4. 保存文件
+            # 3. 保存文件
             save_url = f"{self.BASE_URL}/1/clouddrive/share/sharepage/save"
             save_data = {
                 "fid_list": [fid],
@@ -728,18 +907,21 @@ class QuarkAPI:
             }
             logger.debug(f"保存文件请求, URL: {save_url}, 数据: {save_data}")
             
+            await rate_limiter.acquire("quark", "save", self.uid)
             async with self.session.post(save_url, headers=self._get_headers(), params={"pr": "ucpro", "fr": "pc"}, json=save_data) as response:
-                save_result = await response.json()
+                save_result = await read_json(response)
                 logger.debug(f"保存文件响应: {save_result}")
+                self._record_code(save_result)
                 
                 if save_result.get("code") != 0:
                     logger.error(f"保存文件失败: {save_result}")
+                    self.share_meta.invalidate(pkey)
                     return {"success": False, "message": f"保存文件失败: {save_result.get('message')}"}
                 
                 task_id = save_result["data"]["task_id"]
                 logger.debug(f"获取到保存任务ID: {task_id}")
                 
-                # 5. 查询任务状态
+                # 4. 查询任务状态
                 task_result = await self.query_task(task_id)
                 if task_result.get("code") != 0:
                     logger.error(f"保存任务失败: {task_result}")
@@ -0,0 +1,220 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+from src.config import QUARK_CONFIG
+from src.quark.quark_save import QuarkSave
+from src.quark.registry import ShareRegistry
+
+
+def format_size(size: int) -> str:
+    """把字节数格式化为便于阅读的大小"""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+class CapacityManager:
+    """网盘容量管理
+
+    转存的资源都在根目录，登记表记录了每个转存文件最近一次发布（复用）的时间。
+    已用容量超过 CAPACITY_EVICT_RATIO 时，按最久未发布的顺序分批删除转存的文件，
+    直到降到 CAPACITY_TARGET_RATIO 以下；只删除登记表中的文件，最近发布过的资源保留。
+    每批删除都等待夸克的删除任务完成（并清理回收站）后再读取容量，
+    任务失败或删除后容量没有减少时停止，不会继续删除。
+    """
+
+    def __init__(
+        self,
+        saver: QuarkSave,
+        registry: ShareRegistry,
+        query_task: Callable[[str], Awaitable[Dict[str, Any]]],
+        name: str = "default"
+    ):
+        """
+        Args:
+            saver: 网盘接口
+            registry: 转存登记表
+            query_task: 等待夸克异步任务完成的协程函数（如 QuarkAPI.query_task）
+            name: 账号名称，用于日志和报告
+        """
+        self.saver = saver
+        self.registry = registry
+        self.query_task = query_task
+        self.name = name
+
+    async def plan(self) -> Dict[str, Any]:
+        """生成清理计划（不删除）
+
+        Returns:
+            Dict[str, Any]: 容量、需要释放的空间、按顺序待删除的文件，
+                以及登记表中已不在网盘里的文件（missing）
+        """
+        report = {"account": self.name, "total": 0, "used": 0, "to_free": 0, "evict": [], "missing": []}
+        capacity = await self.saver.get_capacity()
+        total = capacity.get("total_capacity") or capacity.get("total") or 0
+        used = capacity.get("use_capacity") or capacity.get("used") or 0
+        if not total:
+            report["error"] = "获取容量失败"
+            return report
+        report.update(total=total, used=used)
+
+        files = await self.saver.get_all_files("0")
+        if files is None:
+            report["error"] = "获取文件列表失败"
+            return report
+        sizes = {item["fid"]: item.get("size") or 0 for item in files}
+
+        if used > total * QUARK_CONFIG['CAPACITY_EVICT_RATIO']:
+            report["to_free"] = used - int(total * QUARK_CONFIG['CAPACITY_TARGET_RATIO'])
+
+        # 同一个文件可能对应多条登记，以最近一次发布为准
+        entries = {}
+        for entry in self.registry.least_recently_published():
+            entries.pop(entry["saved_fid"], None)
+            entries[entry["saved_fid"]] = entry
+
+        cutoff = time.time() - QUARK_CONFIG['CAPACITY_MIN_IDLE_HOURS'] * 3600
+        planned = 0
+        for fid, entry in entries.items():
+            if fid not in sizes:
+                report["missing"].append(fid)
+                continue
+            if planned >= report["to_free"] or entry["last_published"] > cutoff:
+                continue
+            # 目录在列表中没有大小，用转存时记录的大小估算
+            size = sizes[fid] or entry["file_info"].get("size") or 0
+            report["evict"].append({
+                "fid": fid,
+                "file_name": entry["file_info"].get("file_name") or fid,
+                "size": size,
+                "last_published": entry["last_published"],
+                "share_url": entry["share_url"],
+            })
+            planned += size
+        report["planned"] = planned
+        return report
+
+    async def evict(self, dry_run: bool = False) -> Dict[str, Any]:
+        """容量不足时清理最久未发布的资源
+
+        Args:
+            dry_run (bool, optional): 只生成清理计划，不删除. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: 清理报告，实际删除的文件在 deleted 中
+        """
+        report = await self.plan()
+        report["deleted"] = []
+        if dry_run or report.get("error"):
+            return report
+
+        # 网盘中已不存在的文件，登记表中一并删除，避免复用失效的分享
+        if report["missing"]:
+            self.registry.remove_fids(report["missing"])
+
+        batch_size = QUARK_CONFIG['CAPACITY_EVICT_BATCH']
+        target = report["total"] * QUARK_CONFIG['CAPACITY_TARGET_RATIO']
+        evict = report["evict"]
+        for start in range(0, len(evict), batch_size):
+            batch = evict[start:start + batch_size]
+            fids = [item["fid"] for item in batch]
+            if not await self._delete(fids):
+                break
+            self.registry.remove_fids(fids)
+            report["deleted"].extend(batch)
+            logging.info(f"夸克账号 {self.name} 已删除 {len(report['deleted'])}/{len(evict)} 个最久未发布的资源")
+
+            if QUARK_CONFIG['CAPACITY_PURGE_RECYCLED'] and not await self._purge_recycled(fids):
+                break
+
+            # 以实际容量为准，降到目标以下就停止（估算的大小可能不准确）；
+            # 容量读取失败或没有减少时无法确认删除的效果，停止清理
+            capacity = await self.saver.get_capacity()
+            used = capacity.get("use_capacity") or capacity.get("used")
+            if used is None:
+                logging.error(f"夸克账号 {self.name} 读取容量失败，停止清理")
+                break
+            if used >= report["used"]:
+                logging.warning(f"夸克账号 {self.name} 删除后已用容量没有减少，停止清理")
+                report["used"] = used
+                break
+            report["used"] = used
+            if used <= target:
+                break
+        return report
+
+    async def _delete(self, fids: List[str]) -> bool:
+        """删除一批文件并等待删除任务完成"""
+        result = await self.saver.delete_files(fids)
+        if not result.get("success"):
+            logging.error(f"夸克账号 {self.name} 清理文件失败: {result.get('message')}")
+            return False
+        if not result.get("task_id"):
+            logging.error(f"夸克账号 {self.name} 删除文件没有返回任务ID")
+            return False
+
+        task = await self.query_task(result["task_id"])
+        if task.get("code") != 0 or (task.get("data") or {}).get("status") != 2:
+            logging.error(f"夸克账号 {self.name} 删除任务失败: {task.get('message') or task}")
+            return False
+        return True
+
+    async def _purge_recycled(self, fids: List[str]) -> bool:
+        """从回收站彻底删除刚删除的文件"""
+        pending = set(fids)
+        record_ids = []
+        page = 1
+        size = 50
+        while pending:
+            records = await self.saver.get_recycle_list(page, size)
+            if records is None:
+                logging.error(f"夸克账号 {self.name} 获取回收站列表失败，停止清理")
+                return False
+            for record in records:
+                if record.get("fid") in pending:
+                    pending.discard(record["fid"])
+                    record_ids.append(record["record_id"])
+            if len(records) < size:
+                break
+            page += 1
+
+        if pending:
+            logging.warning(f"夸克账号 {self.name} 回收站中没有找到 {len(pending)} 个已删除的文件")
+        if not record_ids:
+            return True
+        result = await self.saver.remove_recycled(record_ids)
+        if not result.get("success"):
+            logging.error(f"夸克账号 {self.name} {result.get('message')}")
+            return False
+        return True
+
+    @staticmethod
+    def format_report(report: Dict[str, Any]) -> str:
+        """把清理报告格式化为文本"""
+        lines = [f"夸克账号 {report['account']}:"]
+        if report.get("error"):
+            lines.append(f"  {report['error']}")
+            return "\n".join(lines)
+
+        total, used = report["total"], report["used"]
+        lines.append(f"  已用 {format_size(used)} / {format_size(total)} ({used / total:.1%})")
+        if not report["to_free"]:
+            lines.append(f"  未超过 {QUARK_CONFIG['CAPACITY_EVICT_RATIO']:.0%}，无需清理")
+        else:
+            lines.append(
+                f"  需释放 {format_size(report['to_free'])}，"
+                f"计划删除 {len(report['evict'])} 个资源（约 {format_size(report['planned'])}）"
+            )
+        for item in report["evict"]:
+            published = datetime.fromtimestamp(item["last_published"]).strftime("%Y-%m-%d %H:%M")
+            lines.append(f"  - {item['file_name']}  {format_size(item['size'])}  最近发布: {published}")
+        if report["missing"]:
+            lines.append(f"  登记表中有 {len(report['missing'])} 个文件已不在网盘中")
+        if report.get("deleted"):
+            lines.append(f"  已删除 {len(report['deleted'])} 个资源")
+        return "\n".join(lines)
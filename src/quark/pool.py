@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import QUARK_CONFIG
+from src.quark.api import QuarkAPI, extract_pwd_id, extract_uid
+from src.quark.capacity import CapacityManager
+from src.quark.quark_save import QuarkSave
+
+# 需要重新登录
+LOGIN_REQUIRED_CODE = 31001
+
+
+class QuarkAccount:
+    """账号池中的一个账号：接口、容量和健康状态"""
+
+    def __init__(self, cookie: str, registry_file: Optional[str] = None):
+        self.api = QuarkAPI(cookie=cookie, registry_file=registry_file)
+        self.saver = QuarkSave(cookie)
+        self.name = self.api.uid or "default"
+        self.capacity = CapacityManager(self.saver, self.api.registry, self.api.query_task, self.name)
+        self.total_capacity = 0
+        self.used_capacity = 0
+        self.capacity_checked_at = 0.0
+        self.in_flight = 0
+        self.parked_until = 0.0
+
+    @property
+    def usage(self) -> float:
+        """已用容量比例，未知时为 0"""
+        if not self.total_capacity:
+            return 0.0
+        return self.used_capacity / self.total_capacity
+
+    def is_healthy(self) -> bool:
+        """没有被暂停且容量未满"""
+        return time.monotonic() >= self.parked_until and self.usage < QUARK_CONFIG['CAPACITY_FULL_RATIO']
+
+    def load(self) -> float:
+        """负载：进行中的请求数为主，已用容量比例为辅"""
+        return self.in_flight + self.usage
+
+    def park(self, seconds: float, reason: str):
+        """暂停使用一段时间"""
+        self.parked_until = max(self.parked_until, time.monotonic() + seconds)
+        logging.warning(f"夸克账号 {self.name} 暂停使用 {seconds} 秒: {reason}")
+
+    def check_errors(self, since: float):
+        """根据 since 之后接口返回的错误码决定是否暂停账号"""
+        for at, code in self.api.recent_errors:
+            if at < since:
+                continue
+            if code == LOGIN_REQUIRED_CODE:
+                self.park(QUARK_CONFIG['ACCOUNT_LOGIN_PARK_SECONDS'], "需要重新登录 (31001)")
+                return
+            if code in QUARK_CONFIG['ACCOUNT_LIMIT_CODES']:
+                self.park(QUARK_CONFIG['ACCOUNT_PARK_SECONDS'], f"账号受限 ({code})")
+                return
+
+    async def refresh_capacity(self):
+        """刷新容量信息"""
+        since = time.time()
+        capacity = await self.saver.get_capacity()
+        self.capacity_checked_at = time.monotonic()
+        if capacity:
+            self.total_capacity = capacity.get("total_capacity") or capacity.get("total") or 0
+            self.used_capacity = capacity.get("use_capacity") or capacity.get("used") or 0
+        self.check_errors(since)
+
+    async def close(self):
+        await self.api.close()
+        await self.saver.close()
+
+
+class QuarkAPIPool:
+    """夸克多账号池
+
+    对外提供与 QuarkAPI 相同的转存、分享接口。每次转存分配给负载最低的健康账号，
+    已被某个账号转存过的分享仍交给该账号；分享按转存时的账号路由。
+    账号返回 31001 或受限错误码时自动暂停，容量通过 QuarkSave.get_capacity 定期刷新。
+    """
+
+    def __init__(self, cookies: Optional[List[str]] = None):
+        cookies = [cookie for cookie in (cookies or QUARK_CONFIG['COOKIES']) if cookie]
+        if not cookies:
+            raise ValueError("请在.env文件中设置QUARK_COOKIE")
+        self.accounts: List[QuarkAccount] = []
+        for i, cookie in enumerate(dict.fromkeys(cookies)):
+            # 主账号沿用原登记表，其他账号按 __uid 各用一份
+            registry_file = None
+            if i > 0:
+                registry_file = QUARK_CONFIG['REGISTRY_FILE'].with_name(f"quark_shares_{extract_uid(cookie)}.db")
+            self.accounts.append(QuarkAccount(cookie, registry_file))
+        self._fid_owner: Dict[str, QuarkAccount] = {}
+        self._capacity_lock = asyncio.Lock()
+
+    async def refresh_capacity(self, force: bool = False):
+        """刷新过期的账号容量信息"""
+        def stale_accounts():
+            now = time.monotonic()
+            return [
+                account for account in self.accounts
+                if force or now - account.capacity_checked_at > QUARK_CONFIG['CAPACITY_REFRESH_INTERVAL']
+            ]
+
+        if not stale_accounts():
+            return
+        async with self._capacity_lock:
+            accounts = stale_accounts()
+            results = await asyncio.gather(*(account.refresh_capacity() for account in accounts), return_exceptions=True)
+            for account, result in zip(accounts, results):
+                if isinstance(result, Exception):
+                    logging.error(f"获取夸克账号 {account.name} 容量失败: {str(result)}")
+
+    def _pick(self, exclude: Optional[set] = None) -> Optional[QuarkAccount]:
+        """选择负载最低的健康账号"""
+        candidates = [
+            account for account in self.accounts
+            if account.is_healthy() and account not in (exclude or ())
+        ]
+        return min(candidates, key=lambda account: account.load()) if candidates else None
+
+    def _share_owner(self, share_url: str) -> Optional[QuarkAccount]:
+        """已经转存过该分享的账号"""
+        pwd_id = extract_pwd_id(share_url)
+        if not pwd_id:
+            return None
+        for account in self.accounts:
+            if account.api.registry.get(pwd_id):
+                return account
+        return None
+
+    def _fid_account(self, fid: str) -> QuarkAccount:
+        """转存文件所在的账号"""
+        account = self._fid_owner.get(fid)
+        if account:
+            return account
+        for account in self.accounts:
+            if account.api.registry.get_by_fid(fid):
+                return account
+        return self.accounts[0]
+
+    async def _call(self, account: QuarkAccount, method: str, *args) -> Dict[str, Any]:
+        """在指定账号上调用接口，结束后按错误码更新账号状态"""
+        since = time.time()
+        account.in_flight += 1
+        try:
+            return await getattr(account.api, method)(*args)
+        finally:
+            account.in_flight -= 1
+            account.check_errors(since)
+
+    async def _call_balanced(self, method: str, share_url: str) -> Dict[str, Any]:
+        """把一次转存分配给合适的账号，账号因本次调用被暂停时换下一个账号重试"""
+        owner = self._share_owner(share_url)
+        if owner:
+            return await self._call(owner, method, share_url)
+
+        await self.refresh_capacity()
+        tried = set()
+        result = {"success": False, "message": "没有可用的夸克账号"}
+        while True:
+            account = self._pick(tried)
+            if account is None:
+                return result
+            result = await self._call(account, method, share_url)
+            if result.get("success") or account.is_healthy():
+                if result.get("fid"):
+                    self._fid_owner[result["fid"]] = account
+                return result
+            tried.add(account)
+
+    async def validate_links(self, share_urls: List[str]) -> Dict[str, bool]:
+        """并发检查一批分享链接是否有效"""
+        account = self._pick() or self.accounts[0]
+        return await self._call(account, "validate_links", share_urls)
+
+    async def save_shared_file(self, share_url: str) -> Dict[str, Any]:
+        """保存分享的文件到负载最低的账号"""
+        return await self._call_balanced("save_shared_file", share_url)
+
+    async def save_and_share(self, share_url: str) -> Dict[str, Any]:
+        """保存并分享文件"""
+        return await self._call_balanced("save_and_share", share_url)
+
+    async def share_file(self, fid: str) -> Dict[str, Any]:
+        """在文件所在的账号上创建分享"""
+        return await self._call(self._fid_account(fid), "share_file", fid)
+
+    async def ensure_capacity(self, dry_run: bool = False) -> List[Dict[str, Any]]:
+        """各账号容量不足时清理最久未发布的资源
+
+        Args:
+            dry_run (bool, optional): 只生成清理计划，不删除. Defaults to False.
+
+        Returns:
+            List[Dict[str, Any]]: 每个账号的清理报告
+        """
+        reports = []
+        for account in self.accounts:
+            try:
+                report = await account.capacity.evict(dry_run)
+            except Exception as e:
+                logging.error(f"清理夸克账号 {account.name} 容量失败: {str(e)}")
+                continue
+            for item in report["deleted"]:
+                self._fid_owner.pop(item["fid"], None)
+            if report["deleted"]:
+                await account.refresh_capacity()
+            reports.append(report)
+        return reports
+
+    def clear_share(self, share_url: str):
+        """清除各账号登记表中已失效的分享链接"""
+        for account in self.accounts:
+            account.api.clear_share(share_url)
+
+    def touch_share(self, share_url: str) -> bool:
+        """沿用已有结果时更新分享的发布时间，返回是否有账号登记了该分享"""
+        touched = False
+        for account in self.accounts:
+            touched = account.api.touch_share(share_url) or touched
+        return touched
+
+    async def close(self):
+        """关闭所有账号"""
+        for account in self.accounts:
+            await account.close()
@@ -6,6 +6,9 @@ from typing import Dict, Any, Optional, List
 import time
 import asyncio
 from src.utils.logger import setup_logger
+from src.utils.http import shared_session, read_json
+from src.utils.rate_limit import rate_limiter
+from src.quark.api import endpoint_class, extract_uid
 
 # 设置日志为DEBUG级别
 logger = setup_logger(level=logging.DEBUG)
@@ -18,16 +21,34 @@ class QuarkSave:
             cookie (str): 夸克网盘 cookie
         """
         self.cookie = cookie
-        self.session = aiohttp.ClientSession()
         self.BASE_URL = "https://drive-pc.quark.cn"
+        self.uid = extract_uid(cookie)
+        # 请求头和公共参数只与账号有关，构造时生成一次
+        self._headers = self._build_headers()
+        self._params = {
+            "pr": "ucpro",
+            "fr": "pc",
+            "uc_param_str": ""
+        }
+        # 使用共享的 HTTP 连接池
+        shared_session.acquire()
         logger.debug("QuarkSave initialized with BASE_URL: %s", self.BASE_URL)
 
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共享的 HTTP 会话"""
+        return shared_session.get()
+
     async def close(self):
         """关闭会话"""
-        await self.session.close()
+        await shared_session.release()
 
     def _get_headers(self) -> Dict[str, str]:
-        """获取请求头"""
+        """获取请求头（预先生成，调用方不要修改）"""
+        return self._headers
+
+    def _build_headers(self) -> Dict[str, str]:
+        """生成请求头"""
         return {
             'Cookie': self.cookie,
             'Content-Type': 'application/json',
@@ -52,17 +73,18 @@ class QuarkSave:
             Dict[str, Any]: 响应结果
         """
         try:
-            params = {
-                "pr": "ucpro",
-                "fr": "pc",
-                "uc_param_str": ""
-            }
+            # GET 请求的参数放在查询字符串中，其他请求放在 JSON 请求体中
+            params = self._params
+            if method == "GET" and data:
+                params = {**params, **data}
+                data = None
 
             logger.debug("发送请求: %s %s", method, url)
             logger.debug("请求参数: %s", params)
             logger.debug("请求数据: %s", data)
             logger.debug("请求头: %s", self._get_headers())
 
+            await rate_limiter.acquire("quark", endpoint_class(url), self.uid)
             async with self.session.request(
                 method,
                 url,
@@ -70,36 +92,126 @@ class QuarkSave:
                 json=data,
                 headers=self._get_headers()
             ) as response:
-                result = await response.json()
+                result = await read_json(response)
                 logger.debug("响应结果: %s", result)
                 return result
         except Exception as e:
             logger.exception("请求出错: %s", str(e))
             return {"code": -1, "message": str(e)}
 
-    async def get_file_list(self, pdir_fid: str = "0") -> List[Dict[str, Any]]:
+    async def get_file_list(self, pdir_fid: str = "0", page: int = 1, size: int = 50) -> List[Dict[str, Any]]:
         """获取文件列表
 
         Args:
             pdir_fid (str): 父目录ID
+            page (int): 页码，从 1 开始
+            size (int): 每页数量
 
         Returns:
             List[Dict[str, Any]]: 文件列表
         """
         url = f"{self.BASE_URL}/1/clouddrive/file/list"
-        data = {
+        result = await self._request("GET", url, self._file_list_params(pdir_fid, page, size))
+        if result.get("code") == 0:
+            return result["data"]["list"]
+        return []
+
+    @staticmethod
+    def _file_list_params(pdir_fid: str, page: int, size: int) -> Dict[str, Any]:
+        """文件列表接口的参数"""
+        return {
             "pdir_fid": pdir_fid,
             "force": 0,
-            "_page": 1,
-            "_size": 50,
+            "_page": page,
+            "_size": size,
             "_fetch_total": 1,
             "_sort": "file_type:asc,updated_at:desc"
         }
 
-        result = await self._request("GET", url, data)
-        if result.get("code") == 0:
-            return result["data"]["list"]
-        return []
+    async def get_all_files(self, pdir_fid: str = "0", size: int = 100) -> Optional[List[Dict[str, Any]]]:
+        """分页获取目录下的全部文件
+
+        Args:
+            pdir_fid (str): 父目录ID
+            size (int): 每页数量
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 文件列表，请求失败时返回 None
+        """
+        url = f"{self.BASE_URL}/1/clouddrive/file/list"
+        files = []
+        page = 1
+        while True:
+            result = await self._request("GET", url, self._file_list_params(pdir_fid, page, size))
+            if result.get("code") != 0:
+                logger.error("获取文件列表失败: %s", result.get("message"))
+                return None
+            items = result["data"]["list"]
+            files.extend(items)
+            total = result.get("metadata", {}).get("_total")
+            if len(items) < size or (total is not None and len(files) >= total):
+                return files
+            page += 1
+
+    async def delete_files(self, fids: List[str]) -> Dict[str, Any]:
+        """删除文件（移入回收站）
+
+        删除是异步任务，调用方需要用返回的 task_id 等待任务完成。
+
+        Args:
+            fids (List[str]): 文件ID列表
+
+        Returns:
+            Dict[str, Any]: 删除结果，成功时包含 task_id
+        """
+        url = f"{self.BASE_URL}/1/clouddrive/file/delete"
+        data = {
+            "action_type": 2,
+            "filelist": fids,
+            "exclude_fids": []
+        }
+
+        result = await self._request("POST", url, data)
+        if result.get("code") != 0:
+            return {"success": False, "message": f"删除文件失败: {result.get('message')}"}
+        return {"success": True, "task_id": (result.get("data") or {}).get("task_id")}
+
+    async def get_recycle_list(self, page: int = 1, size: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """获取回收站列表
+
+        Args:
+            page (int): 页码，从 1 开始
+            size (int): 每页数量
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 回收站记录（含 record_id 和 fid），请求失败时返回 None
+        """
+        url = f"{self.BASE_URL}/1/clouddrive/file/recycle/list"
+        result = await self._request("GET", url, {"_page": page, "_size": size})
+        if result.get("code") != 0:
+            logger.error("获取回收站列表失败: %s", result.get("message"))
+            return None
+        return (result.get("data") or {}).get("list") or []
+
+    async def remove_recycled(self, record_ids: List[str]) -> Dict[str, Any]:
+        """从回收站彻底删除
+
+        Args:
+            record_ids (List[str]): 回收站记录ID列表
+
+        Returns:
+            Dict[str, Any]: 删除结果
+        """
+        url = f"{self.BASE_URL}/1/clouddrive/file/recycle/remove"
+        data = {
+            "select_mode": 2,
+            "record_list": record_ids
+        }
+
+        result = await self._request("POST", url, data)
+        if result.get("code") != 0:
+            return {"success": False, "message": f"清理回收站失败: {result.get('message')}"}
+        return {"success": True}
 
     async def get_file_info(self, fid: str) -> Optional[Dict[str, Any]]:
         """获取文件信息
@@ -0,0 +1,183 @@
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from src.config import QUARK_CONFIG
+
+
+class ShareRegistry:
+    """已转存分享的登记表
+
+    以来源分享的 pwd_id 为键，记录转存后的文件ID、我们自己的分享链接和文件信息。
+    同一个分享在不同群组、不同关键词下重复出现时，直接复用登记的结果，不再调用夸克接口。
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        self.db_file = Path(db_file or QUARK_CONFIG['REGISTRY_FILE'])
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS shares (
+                pwd_id TEXT PRIMARY KEY,
+                saved_fid TEXT NOT NULL,
+                file_info TEXT,
+                share_url TEXT,
+                share_pwd_id TEXT,
+                created_at REAL NOT NULL,
+                last_published REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_shares_saved_fid ON shares (saved_fid);
+            CREATE INDEX IF NOT EXISTS idx_shares_share_url ON shares (share_url);
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        entry = dict(row)
+        entry['file_info'] = json.loads(entry['file_info']) if entry['file_info'] else {}
+        return entry
+
+    def get(self, pwd_id: str) -> Optional[Dict[str, Any]]:
+        """按来源 pwd_id 查询"""
+        row = self.conn.execute("SELECT * FROM shares WHERE pwd_id = ?", (pwd_id,)).fetchone()
+        return self._to_dict(row)
+
+    def get_by_fid(self, saved_fid: str) -> Optional[Dict[str, Any]]:
+        """按转存后的文件ID查询"""
+        row = self.conn.execute("SELECT * FROM shares WHERE saved_fid = ?", (saved_fid,)).fetchone()
+        return self._to_dict(row)
+
+    def record_save(self, pwd_id: str, saved_fid: str, file_info: Optional[Dict[str, Any]] = None):
+        """登记转存结果"""
+        now = time.time()
+        try:
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO shares (pwd_id, saved_fid, file_info, created_at, last_published)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (pwd_id) DO UPDATE SET
+                        saved_fid = excluded.saved_fid,
+                        file_info = excluded.file_info,
+                        share_url = NULL,
+                        share_pwd_id = NULL,
+                        last_published = excluded.last_published
+                """, (pwd_id, saved_fid, json.dumps(file_info or {}, ensure_ascii=False), now, now))
+        except Exception as e:
+            logging.error(f"登记转存结果失败: {str(e)}")
+
+    def record_share(self, saved_fid: str, share_url: str, share_pwd_id: str):
+        """登记转存文件的分享链接"""
+        try:
+            with self.conn:
+                self.conn.execute("""
+                    UPDATE shares SET share_url = ?, share_pwd_id = ?, last_published = ?
+                    WHERE saved_fid = ?
+                """, (share_url, share_pwd_id, time.time(), saved_fid))
+        except Exception as e:
+            logging.error(f"登记分享链接失败: {str(e)}")
+
+    def clear_share(self, share_url: str):
+        """清除已失效的分享链接，转存的文件保留，下次需要时重新分享"""
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE shares SET share_url = NULL, share_pwd_id = NULL WHERE share_url = ?", (share_url,)
+                )
+        except Exception as e:
+            logging.error(f"清除分享链接失败: {str(e)}")
+
+    def touch(self, pwd_id: str):
+        """更新最近一次发布（复用）的时间"""
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE shares SET last_published = ? WHERE pwd_id = ?", (time.time(), pwd_id)
+                )
+        except Exception as e:
+            logging.error(f"更新登记时间失败: {str(e)}")
+
+    def touch_share(self, share_url: str) -> bool:
+        """按我们的分享链接更新最近一次发布的时间
+
+        Returns:
+            bool: 登记表中是否有该分享链接（没有说明文件已被清理或分享已失效）
+        """
+        try:
+            with self.conn:
+                cursor = self.conn.execute(
+                    "UPDATE shares SET last_published = ? WHERE share_url = ?", (time.time(), share_url)
+                )
+            return cursor.rowcount > 0
+        except Exception as e:
+            logging.error(f"更新登记时间失败: {str(e)}")
+            return False
+
+    def remove(self, pwd_id: str):
+        """删除登记"""
+        with self.conn:
+            self.conn.execute("DELETE FROM shares WHERE pwd_id = ?", (pwd_id,))
+
+    def least_recently_published(self) -> List[Dict[str, Any]]:
+        """全部登记，最久没有发布（复用）的在前"""
+        rows = self.conn.execute("SELECT * FROM shares ORDER BY last_published").fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def remove_fids(self, saved_fids: List[str]):
+        """删除转存文件对应的登记（文件已从网盘删除）"""
+        with self.conn:
+            self.conn.executemany("DELETE FROM shares WHERE saved_fid = ?", [(fid,) for fid in saved_fids])
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+class DeadShareCache:
+    """失效分享的负缓存
+
+    记录已确认失效（41011 / 404）的 pwd_id，在 TTL 内不再尝试，跨查询、跨运行有效。
+    """
+
+    def __init__(self, db_file: Optional[Path] = None, ttl_hours: Optional[float] = None):
+        self.db_file = Path(db_file or QUARK_CONFIG['REGISTRY_FILE'])
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = (ttl_hours or QUARK_CONFIG['DEAD_SHARE_TTL_HOURS']) * 3600
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS dead_shares (
+                pwd_id TEXT PRIMARY KEY,
+                code INTEGER,
+                marked_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_dead_shares_marked_at ON dead_shares (marked_at);
+        """)
+        with self.conn:
+            self.conn.execute("DELETE FROM dead_shares WHERE marked_at < ?", (time.time() - self.ttl,))
+
+    def is_dead(self, pwd_id: str) -> bool:
+        """是否为 TTL 内确认失效的分享"""
+        row = self.conn.execute(
+            "SELECT marked_at FROM dead_shares WHERE pwd_id = ?", (pwd_id,)
+        ).fetchone()
+        return bool(row) and row[0] >= time.time() - self.ttl
+
+    def mark_dead(self, pwd_id: str, code: Optional[int] = None):
+        """标记分享失效"""
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO dead_shares (pwd_id, code, marked_at) VALUES (?, ?, ?)",
+                    (pwd_id, code, time.time())
+                )
+        except Exception as e:
+            logging.error(f"标记失效分享失败: {str(e)}")
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
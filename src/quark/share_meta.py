@@ -0,0 +1,58 @@
+import time
+from typing import Dict, Any, List, Optional
+
+from src.config import QUARK_CONFIG
+
+# 分享已失效（被取消、删除或违规）的错误码
+DEAD_SHARE_CODES = {41011}
+
+
+def is_dead_share(result: Dict[str, Any]) -> bool:
+    """根据接口返回判断分享是否已失效"""
+    return result.get("status") == 404 or result.get("code") in DEAD_SHARE_CODES
+
+
+class ShareMetaCache:
+    """分享元数据缓存（stoken 和 sharepage/detail 文件列表）
+
+    按 pwd_id 缓存，超过 TTL 或接口返回错误码时失效。
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl or QUARK_CONFIG['SHARE_META_TTL']
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def _get_entry(self, pwd_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(pwd_id)
+        if entry and entry['expire_at'] < time.monotonic():
+            self.entries.pop(pwd_id, None)
+            return None
+        return entry
+
+    def get_stoken(self, pwd_id: str) -> Optional[str]:
+        """获取缓存的 stoken"""
+        entry = self._get_entry(pwd_id)
+        return entry['stoken'] if entry else None
+
+    def set_stoken(self, pwd_id: str, stoken: str):
+        """缓存 stoken，同时清空旧 stoken 对应的文件列表"""
+        self.entries[pwd_id] = {
+            'stoken': stoken,
+            'detail': None,
+            'expire_at': time.monotonic() + self.ttl
+        }
+
+    def get_detail(self, pwd_id: str) -> Optional[List[Dict[str, Any]]]:
+        """获取缓存的文件列表"""
+        entry = self._get_entry(pwd_id)
+        return entry['detail'] if entry else None
+
+    def set_detail(self, pwd_id: str, detail: List[Dict[str, Any]]):
+        """缓存文件列表（依附于当前 stoken）"""
+        entry = self._get_entry(pwd_id)
+        if entry:
+            entry['detail'] = detail
+
+    def invalidate(self, pwd_id: str):
+        """接口返回错误时使缓存失效"""
+        self.entries.pop(pwd_id, None)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Callable, Awaitable, Optional
+
+from src.config import QUARK_CONFIG
+
+
+class _PendingTask:
+    """等待完成的任务"""
+
+    __slots__ = ('task_id', 'future', 'retry_index', 'interval', 'next_poll', 'deadline', 'errors')
+
+    def __init__(self, task_id: str, future: asyncio.Future, interval: float, timeout: float):
+        self.task_id = task_id
+        self.future = future
+        self.retry_index = 0
+        self.interval = interval
+        self.next_poll = time.monotonic()
+        self.deadline = self.next_poll + timeout
+        self.errors = 0
+
+
+class TaskPoller:
+    """夸克异步任务轮询器
+
+    所有进行中的 task_id 由同一个后台协程统一轮询，每个任务一个 Future。
+    任务未完成时轮询间隔逐步拉长（自适应退避），完成后立即唤醒等待方。
+    查询连续失败、返回格式异常或超过 timeout 仍未完成的任务按失败返回，不会让等待方一直等待。
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int], Awaitable[Dict[str, Any]]],
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        max_errors: int = 5,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            fetch: 查询单个任务状态的协程函数，参数为 task_id 和 retry_index
+            min_interval: 首次轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            max_errors: 单个任务允许的连续查询失败次数
+            timeout: 单个任务最长等待时间（秒）
+        """
+        self.fetch = fetch
+        self.min_interval = min_interval or QUARK_CONFIG['TASK_POLL_MIN_INTERVAL']
+        self.max_interval = max_interval or QUARK_CONFIG['TASK_POLL_MAX_INTERVAL']
+        self.max_errors = max_errors
+        self.timeout = timeout or QUARK_CONFIG['TASK_POLL_TIMEOUT']
+        self.pending: Dict[str, _PendingTask] = {}
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+
+    async def wait(self, task_id: str) -> Dict[str, Any]:
+        """等待任务完成
+
+        Returns:
+            Dict[str, Any]: 任务完成时的查询结果；失败时为 {"code": -1, "message": ...}
+        """
+        task = self.pending.get(task_id)
+        if task is None:
+            future = asyncio.get_running_loop().create_future()
+            task = _PendingTask(task_id, future, self.min_interval, self.timeout)
+            self.pending[task_id] = task
+            self._wakeup.set()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        return await asyncio.shield(task.future)
+
+    async def _poll(self, task: _PendingTask):
+        """查询一次任务状态并更新调度信息"""
+        try:
+            result = await self.fetch(task.task_id, task.retry_index)
+        except Exception as e:
+            result = {"code": -1, "message": str(e)}
+
+        status = (result.get("data") or {}).get("status") if result.get("code") == 0 else None
+        if status is None:
+            # 查询失败或返回格式异常
+            task.errors += 1
+            if task.errors > self.max_errors:
+                logging.error(f"查询任务失败: {result}")
+                self._resolve(task, {"code": -1, "message": result.get("message") or "任务状态格式异常"})
+                return
+            task.interval = min(task.interval * 2, self.max_interval)
+        else:
+            task.errors = 0
+            if status != 0:  # 非进行中状态
+                self._resolve(task, result)
+                return
+            task.retry_index += 1
+            task.interval = min(task.interval * 1.5, self.max_interval)
+
+        now = time.monotonic()
+        if now >= task.deadline:
+            logging.error(f"任务 {task.task_id} 超过 {self.timeout} 秒仍未完成")
+            self._resolve(task, {"code": -1, "message": "任务超时"})
+            return
+        task.next_poll = min(now + task.interval, task.deadline)
+
+    def _resolve(self, task: _PendingTask, result: Dict[str, Any]):
+        self.pending.pop(task.task_id, None)
+        if not task.future.done():
+            task.future.set_result(result)
+
+    async def _run(self):
+        """后台轮询循环，没有待查询任务时退出"""
+        while self.pending:
+            now = time.monotonic()
+            due = [task for task in self.pending.values() if task.next_poll <= now]
+            if due:
+                # 单个任务出错不能中断轮询循环，否则其余等待方会一直等待
+                results = await asyncio.gather(*(self._poll(task) for task in due), return_exceptions=True)
+                for task, result in zip(due, results):
+                    if isinstance(result, Exception):
+                        logging.error(f"轮询任务 {task.task_id} 出错: {str(result)}")
+                        self._resolve(task, {"code": -1, "message": str(result)})
+                continue
+
+            # 睡到最早的任务到期，期间有新任务加入时提前唤醒
+            delay = min(task.next_poll for task in self.pending.values()) - now
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """停止轮询，未完成的任务返回失败"""
+        if self._runner and not self._runner.done():
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+        for task in list(self.pending.values()):
+            self._resolve(task, {"code": -1, "message": "任务轮询已停止"})
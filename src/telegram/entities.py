@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from telethon import utils
+from telethon.tl.types import InputPeerChannel, InputPeerChat, InputPeerUser
+
+from src.config import TELEGRAM_CONFIG
+
+
+class EntityCache:
+    """群组实体缓存
+
+    把解析出的群组 InputPeer（含 access_hash）和标题保存在会话文件旁边，
+    之后的进程直接用缓存构造 InputPeer，不再调用 get_entity。
+    access_hash 只对解析它的账号有效，文件中记录了账号的用户ID，换了账号登录时整体丢弃（见 bind_user）；
+    单个 InputPeer 被 Telegram 拒绝时由调用方删除（remove）后重新解析。
+    解析失败的群组在内存中记录一段时间，期间不再重试。
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None, failure_ttl: Optional[float] = None):
+        self.cache_file = Path(cache_file or TELEGRAM_CONFIG['ENTITY_CACHE_FILE'])
+        self.failure_ttl = failure_ttl or TELEGRAM_CONFIG['ENTITY_FAILURE_TTL']
+        self.user_id: Optional[int] = None
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+        self.failures: Dict[str, float] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """读取缓存文件"""
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logging.error(f"读取群组实体缓存失败: {str(e)}")
+            return {}
+        # 旧版文件只有实体，没有记录账号，在 bind_user 时丢弃
+        if 'entities' not in data:
+            return data
+        self.user_id = data.get('user_id')
+        return data['entities']
+
+    def _save(self):
+        """写入缓存文件（先写临时文件再替换）"""
+        try:
+            tmp_file = self.cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'user_id': self.user_id, 'entities': self.entries}, f, ensure_ascii=False, indent=2)
+            tmp_file.replace(self.cache_file)
+        except Exception as e:
+            logging.error(f"保存群组实体缓存失败: {str(e)}")
+
+    def bind_user(self, user_id: int):
+        """绑定当前登录的账号，缓存是其他账号（或未记录账号）保存的时全部丢弃"""
+        if self.user_id == user_id:
+            return
+        if self.entries:
+            logging.info(f"群组实体缓存不属于当前账号 {user_id}，重新解析全部群组")
+        self.user_id = user_id
+        self.entries = {}
+        self._save()
+
+    def get(self, group_key: str) -> Optional[Any]:
+        """获取缓存的 InputPeer"""
+        entry = self.entries.get(group_key)
+        if not entry:
+            return None
+        if entry['type'] == 'channel':
+            return InputPeerChannel(entry['id'], entry['access_hash'])
+        if entry['type'] == 'chat':
+            return InputPeerChat(entry['id'])
+        if entry['type'] == 'user':
+            return InputPeerUser(entry['id'], entry['access_hash'])
+        return None
+
+    def title(self, group_key: str) -> str:
+        """群组标题，未缓存时返回群组键"""
+        entry = self.entries.get(group_key) or {}
+        return entry.get('title') or group_key
+
+    def set(self, group_key: str, entity: Any) -> Any:
+        """缓存解析出的实体
+
+        Returns:
+            Any: 实体对应的 InputPeer
+        """
+        peer = utils.get_input_peer(entity)
+        if isinstance(peer, InputPeerChannel):
+            entry = {'type': 'channel', 'id': peer.channel_id, 'access_hash': peer.access_hash}
+        elif isinstance(peer, InputPeerChat):
+            entry = {'type': 'chat', 'id': peer.chat_id}
+        elif isinstance(peer, InputPeerUser):
+            entry = {'type': 'user', 'id': peer.user_id, 'access_hash': peer.access_hash}
+        else:
+            return peer
+
+        entry['title'] = getattr(entity, 'title', None) or getattr(entity, 'username', None) or group_key
+        self.entries[group_key] = entry
+        self.failures.pop(group_key, None)
+        self._save()
+        return peer
+
+    def remove(self, group_key: str):
+        """删除被 Telegram 拒绝的缓存实体，下次使用时重新解析"""
+        if self.entries.pop(group_key, None) is not None:
+            self._save()
+
+    def mark_failed(self, group_key: str):
+        """记录解析失败"""
+        self.failures[group_key] = time.monotonic()
+
+    def is_failed(self, group_key: str) -> bool:
+        """是否在失败缓存期内"""
+        failed_at = self.failures.get(group_key)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at > self.failure_ttl:
+            del self.failures[group_key]
+            return False
+        return True
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Optional
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+
+from src.config import RATE_LIMIT_CONFIG
+from src.utils.rate_limit import throttled
+
+
+class GroupScheduler:
+    """按群组调度 Telegram 请求
+
+    同时访问 Telegram 的群组数受 concurrency 限制。某个群组收到 FloodWait 时只暂停该群组：
+    它让出名额，在名额之外等到 FloodWait 结束后再排队，其他群组和查询继续进行；
+    消息迭代从中断时的最后一条消息继续，不会从头开始。
+    等待超过 MAX_FLOOD_WAIT 的群组在本次运行中跳过。
+    """
+
+    def __init__(self, concurrency: int):
+        self._slots = asyncio.Semaphore(concurrency)
+        self.parked_until: Dict[str, float] = {}
+
+    def park(self, group_key: str, seconds: float):
+        """暂停群组到 FloodWait 结束"""
+        self.parked_until[group_key] = max(self.parked_until.get(group_key, 0.0), time.monotonic() + seconds)
+        logging.warning(f"群组 {group_key} 触发限流，暂停 {seconds} 秒，其他群组继续")
+
+    def remaining(self, group_key: str) -> float:
+        """群组剩余的暂停时间（秒）"""
+        return max(0.0, self.parked_until.get(group_key, 0.0) - time.monotonic())
+
+    def _check_wait(self, group_key: str, seconds: float):
+        """等待过长时放弃该群组"""
+        if seconds > RATE_LIMIT_CONFIG['MAX_FLOOD_WAIT']:
+            raise RuntimeError(f"群组 {group_key} 限流中，需等待 {seconds:.0f} 秒，本次跳过")
+
+    @asynccontextmanager
+    async def slot(self, group_key: str):
+        """取得一个访问名额；群组暂停期间在名额之外等待"""
+        while True:
+            wait = self.remaining(group_key)
+            if wait > 0:
+                self._check_wait(group_key, wait)
+                await asyncio.sleep(wait)
+            async with self._slots:
+                # 排队期间群组可能被其他任务暂停
+                if self.remaining(group_key) > 0:
+                    continue
+                yield
+                return
+
+    def _on_flood_wait(self, group_key: str, e: FloodWaitError):
+        """暂停群组，等待过长时抛出异常"""
+        self.park(group_key, e.seconds)
+        self._check_wait(group_key, e.seconds)
+
+    async def run(self, group_key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """在名额内执行可重复执行的操作，FloodWait 时暂停群组后重新执行"""
+        while True:
+            try:
+                async with self.slot(group_key):
+                    return await func()
+            except FloodWaitError as e:
+                self._on_flood_wait(group_key, e)
+
+    async def iter_messages(
+        self,
+        client: TelegramClient,
+        entity: Any,
+        group_key: str,
+        endpoint: str = 'history',
+        limit: Optional[int] = None,
+        **kwargs
+    ) -> AsyncGenerator[Any, None]:
+        """在名额内迭代群组消息
+
+        FloodWait 时暂停群组并让出名额，到期后以最后一条消息为 offset_id 继续迭代
+        （从新到旧和 reverse=True 都适用），已返回的消息不会重复。
+        参数与 TelegramClient.iter_messages 相同。
+        """
+        offset_id = kwargs.pop('offset_id', 0)
+        yielded = 0
+        while limit is None or yielded < limit:
+            try:
+                async with self.slot(group_key):
+                    messages = client.iter_messages(
+                        entity,
+                        limit=None if limit is None else limit - yielded,
+                        offset_id=offset_id,
+                        wait_time=0,
+                        **kwargs
+                    )
+                    async with aclosing(throttled(messages, endpoint, pause=False)) as pages:
+                        async for message in pages:
+                            offset_id = message.id
+                            yielded += 1
+                            yield message
+                    return
+            except FloodWaitError as e:
+                self._on_flood_wait(group_key, e)
+                logging.info(f"群组 {group_key} 将从消息 {offset_id} 处继续")
@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.messages import GetHistoryRequest
+from telethon.tl.types import Message
+
+from src.config import INDEX_CONFIG
+from src.utils.rate_limit import rate_limiter
+
+# messages.getHistory 单次最多返回 100 条
+MAX_BATCH_SIZE = 100
+
+
+class AdaptiveLimiter:
+    """自适应并发限制
+
+    连续成功时逐步放宽并发数，遇到 FloodWait 时并发减半（AIMD）。
+    FloodWait 的等待由调用方按群组处理；同一群组的拉取在中断后继续时应沿用同一个限制器，
+    减半后的并发数才能延续到下一次拉取。
+    """
+
+    def __init__(self, initial: int, maximum: int):
+        self.limit = max(1, initial)
+        self.maximum = max(self.limit, maximum)
+        self.active = 0
+        self.successes = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        """获取一个并发名额"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self):
+        """释放并发名额"""
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        """请求成功：每成功 limit 次并发数加一"""
+        self.successes += 1
+        if self.successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self.successes = 0
+
+    def on_flood_wait(self):
+        """遇到 FloodWait：并发减半"""
+        self.limit = max(1, self.limit // 2)
+        self.successes = 0
+
+
+class HistoryFetcher:
+    """群组历史消息并发拉取器
+
+    把消息ID空间切成若干区间，各区间并发地按最大批量（100条）向前翻页，
+    连续成功时逐步提高并发数。用于首次建立本地索引等需要全量拉取的场景。
+    遇到 FloodWait 时不在这里等待：把未完成的区间交给 on_interrupt 保存后重新抛出，
+    由调用方（GroupScheduler）暂停该群组，之后用 resume 从剩余区间继续。
+    """
+
+    def __init__(
+        self,
+        client: TelegramClient,
+        concurrency: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        range_size: Optional[int] = None
+    ):
+        self.client = client
+        self.concurrency = concurrency or INDEX_CONFIG['FETCH_CONCURRENCY']
+        self.max_concurrency = max_concurrency or INDEX_CONFIG['FETCH_MAX_CONCURRENCY']
+        self.range_size = range_size or INDEX_CONFIG['FETCH_RANGE_SIZE']
+
+    def new_limiter(self) -> AdaptiveLimiter:
+        """按配置的初始和最大并发数创建限制器"""
+        return AdaptiveLimiter(self.concurrency, self.max_concurrency)
+
+    def _split_ranges(self, min_id: int, top_id: int) -> List[Tuple[int, int]]:
+        """把 (min_id, top_id] 切成若干 (下界, 上界] 区间，新消息在前"""
+        ranges = []
+        upper = top_id
+        while upper > min_id:
+            lower = max(min_id, upper - self.range_size)
+            ranges.append((lower, upper))
+            upper = lower
+        return ranges
+
+    async def _request(self, limiter: AdaptiveLimiter, peer: Any, offset_id: int, min_id: int) -> List[Any]:
+        """请求一页消息，遇到 FloodWait 时降低并发和速率后重新抛出"""
+        await limiter.acquire()
+        try:
+            await rate_limiter.acquire('telegram', 'history')
+            result = await self.client(GetHistoryRequest(
+                peer=peer,
+                offset_id=offset_id,
+                offset_date=None,
+                add_offset=0,
+                limit=MAX_BATCH_SIZE,
+                max_id=0,
+                min_id=min_id,
+                hash=0
+            ))
+            limiter.on_success()
+            rate_limiter.on_success('telegram', 'history')
+            return result.messages
+        except FloodWaitError as e:
+            logging.warning(f"拉取历史消息触发限流，需要等待 {e.seconds} 秒，中断本次拉取")
+            limiter.on_flood_wait()
+            # 等待由调用方按群组处理，其他群组的请求继续
+            rate_limiter.on_slow_down('telegram', 'history')
+            raise
+        finally:
+            await limiter.release()
+
+    async def fetch(
+        self,
+        entity: Any,
+        min_id: int = 0,
+        on_batch: Optional[Callable[[List[Message]], None]] = None,
+        resume: Optional[Tuple[int, List[Tuple[int, int]]]] = None,
+        on_interrupt: Optional[Callable[[int, List[Tuple[int, int]]], None]] = None,
+        limiter: Optional[AdaptiveLimiter] = None
+    ) -> Dict[str, Any]:
+        """拉取 min_id 之后的全部消息
+
+        Args:
+            entity: 群组实体
+            min_id (int): 只拉取ID大于该值的消息
+            on_batch (Callable): 每拉到一页消息时的回调（各区间并发，顺序不保证）
+            resume (Tuple[int, List[Tuple[int, int]]]): 上次中断时保存的 (top_id, 剩余区间)，传入时只拉取这些区间
+            on_interrupt (Callable): 拉取被 FloodWait 等中断时的回调，参数为 top_id 和尚未拉取的 (下界, 上界] 区间
+            limiter (AdaptiveLimiter): 并发限制器，resume 时传入上次使用的限制器以沿用降低后的并发数，
+                不传时新建
+
+        Returns:
+            Dict[str, Any]: 统计信息，包括 messages、requests、seconds、rate（条/秒）和 top_id
+        """
+        peer = await self.client.get_input_entity(entity)
+        if resume:
+            top_id, ranges = resume
+        else:
+            latest = await self.client.get_messages(peer, limit=1)
+            top_id = latest[0].id if latest else 0
+            ranges = self._split_ranges(min_id, top_id)
+        stats = {"messages": 0, "requests": 0, "seconds": 0.0, "rate": 0.0, "top_id": top_id}
+        if not ranges:
+            return stats
+
+        limiter = limiter or self.new_limiter()
+        queue = asyncio.Queue()
+        # 每个未完成区间的翻页位置（下一次请求的 offset_id）
+        progress = {}
+        for lower, upper in ranges:
+            progress[(lower, upper)] = upper + 1
+            queue.put_nowait((lower, upper))
+
+        start = time.monotonic()
+
+        async def worker():
+            while True:
+                try:
+                    lower, upper = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                # 从区间上界向前翻页，直到区间下界
+                offset_id = upper + 1
+                while offset_id > lower + 1:
+                    messages = await self._request(limiter, peer, offset_id, lower)
+                    stats["requests"] += 1
+                    if not messages:
+                        break
+                    offset_id = min(message.id for message in messages)
+                    batch = [message for message in messages if isinstance(message, Message)]
+                    stats["messages"] += len(batch)
+                    if on_batch and batch:
+                        on_batch(batch)
+                    progress[(lower, upper)] = offset_id
+                progress.pop((lower, upper), None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            if on_interrupt:
+                remaining = [
+                    (lower, offset_id - 1)
+                    for (lower, _), offset_id in progress.items()
+                    if offset_id - 1 > lower
+                ]
+                on_interrupt(top_id, remaining)
+            raise
+        finally:
+            for task in workers:
+                task.cancel()
+
+        stats["seconds"] = time.monotonic() - start
+        stats["rate"] = stats["messages"] / stats["seconds"] if stats["seconds"] else 0.0
+        logging.info(
+            f"历史消息拉取完成: {stats['messages']} 条, {stats['requests']} 次请求, "
+            f"{stats['seconds']:.1f} 秒, {stats['rate']:.0f} 条/秒"
+        )
+        return stats
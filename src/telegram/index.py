@@ -0,0 +1,183 @@
+import json
+import logging
+import sqlite3
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Iterable, Tuple
+
+from src.config import INDEX_CONFIG
+
+# 索引中的消息记录，字段与 Telethon Message 的 id/date/text 保持一致，方便直接替换
+IndexedMessage = namedtuple('IndexedMessage', ['group', 'id', 'date', 'text'])
+
+# trigram 分词器至少需要3个字符才能走全文索引
+TRIGRAM_MIN_LENGTH = 3
+
+
+class MessageIndex:
+    """Telegram群组消息本地索引
+
+    使用 SQLite FTS5 (trigram 分词) 保存群组历史消息，中文标题也能直接检索。
+    每个群组记录已同步的最大消息ID，后续只需拉取新增消息。
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        self.db_file = Path(db_file or INDEX_CONFIG['DB_FILE'])
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self._init_db()
+
+    def _init_db(self):
+        """创建表结构"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS messages (
+                group_key TEXT NOT NULL,
+                message_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                text TEXT NOT NULL,
+                PRIMARY KEY (group_key, message_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_date ON messages (date);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                text,
+                content='messages',
+                content_rowid='rowid',
+                tokenize='trigram'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts (rowid, text) VALUES (new.rowid, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE ON messages BEGIN
+                INSERT INTO messages_fts (messages_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+                INSERT INTO messages_fts (rowid, text) VALUES (new.rowid, new.text);
+            END;
+
+            CREATE TABLE IF NOT EXISTS sync_state (
+                group_key TEXT PRIMARY KEY,
+                max_id INTEGER NOT NULL DEFAULT 0,
+                synced_at TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS backfill_state (
+                group_key TEXT PRIMARY KEY,
+                top_id INTEGER NOT NULL,
+                ranges TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def get_max_id(self, group_key: str) -> int:
+        """获取群组已同步的最大消息ID"""
+        row = self.conn.execute(
+            "SELECT max_id FROM sync_state WHERE group_key = ?", (group_key,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def upsert_messages(self, group_key: str, messages: Iterable[IndexedMessage], max_id: int):
+        """写入一批消息并推进同步位置
+
+        消息写入和同步位置在同一个事务中提交，中途中断后可以从上次位置继续。
+        """
+        rows = [
+            (group_key, m.id, m.date.isoformat(), m.text)
+            for m in messages
+        ]
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO messages (group_key, message_id, date, text)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (group_key, message_id) DO UPDATE SET
+                    date = excluded.date,
+                    text = excluded.text
+            """, rows)
+            self.conn.execute("""
+                INSERT INTO sync_state (group_key, max_id, synced_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (group_key) DO UPDATE SET
+                    max_id = MAX(sync_state.max_id, excluded.max_id),
+                    synced_at = excluded.synced_at
+            """, (group_key, max_id, datetime.now().isoformat()))
+
+    def get_backfill(self, group_key: str) -> Optional[Tuple[int, List[Tuple[int, int]]]]:
+        """获取中断的首次全量拉取：(top_id, 尚未拉取的 (下界, 上界] 区间)"""
+        row = self.conn.execute(
+            "SELECT top_id, ranges FROM backfill_state WHERE group_key = ?", (group_key,)
+        ).fetchone()
+        if not row:
+            return None
+        return row[0], [tuple(message_range) for message_range in json.loads(row[1])]
+
+    def save_backfill(self, group_key: str, top_id: int, ranges: List[Tuple[int, int]]):
+        """保存中断的首次全量拉取，下次从剩余区间继续"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO backfill_state (group_key, top_id, ranges) VALUES (?, ?, ?)",
+                (group_key, top_id, json.dumps(ranges))
+            )
+
+    def finish_backfill(self, group_key: str, top_id: int):
+        """首次全量拉取完成：写入同步位置并清除中断记录"""
+        self.upsert_messages(group_key, [], top_id)
+        with self.conn:
+            self.conn.execute("DELETE FROM backfill_state WHERE group_key = ?", (group_key,))
+
+    def search(self, query: str, group_key: Optional[str] = None, limit: int = 100) -> List[IndexedMessage]:
+        """检索包含关键词的消息，按时间从新到旧返回
+
+        Args:
+            query (str): 搜索关键词
+            group_key (Optional[str]): 只检索指定群组，默认检索全部
+            limit (int): 返回数量上限
+
+        Returns:
+            List[IndexedMessage]: 匹配的消息
+        """
+        query = query.strip()
+        if not query:
+            return []
+
+        params = []
+        if len(query) >= TRIGRAM_MIN_LENGTH:
+            # 使用短语查询走全文索引，双引号需要转义
+            sql = """
+                SELECT m.group_key, m.message_id, m.date, m.text
+                FROM messages_fts f JOIN messages m ON m.rowid = f.rowid
+                WHERE messages_fts MATCH ?
+            """
+            params.append('"{}"'.format(query.replace('"', '""')))
+        else:
+            # 关键词过短时 trigram 无法命中，退回 LIKE 扫描本地表
+            sql = """
+                SELECT m.group_key, m.message_id, m.date, m.text
+                FROM messages m
+                WHERE m.text LIKE ? ESCAPE '\\'
+            """
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+
+        if group_key:
+            sql += " AND m.group_key = ?"
+            params.append(group_key)
+        sql += " ORDER BY m.date DESC LIMIT ?"
+        params.append(limit)
+
+        try:
+            rows = self.conn.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"检索消息索引失败: {str(e)}")
+            return []
+
+        return [
+            IndexedMessage(group, message_id, datetime.fromisoformat(date), text)
+            for group, message_id, date, text in rows
+        ]
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
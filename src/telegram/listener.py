@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from telethon import events, utils
+
+from src.config import LISTENER_CONFIG
+from src.baidu.hot_search import BaiduHotSearch
+from src.telegram.index import MessageIndex, IndexedMessage
+from src.telegram.matcher import TitleMatcher
+from src.telegram.parser import parse_message, message_text_with_links
+from src.telegram.searcher import TelegramResourceSearcher
+
+
+class ResourceListener:
+    """实时监听目标群组的新消息
+
+    订阅 events.NewMessage，用多模式匹配检查新消息是否命中当前热搜标题，命中后立即转存分享，
+    不需要在查询时扫描群组。只有 index 模式下（搜索器有本地消息索引）新消息才会同时写入索引，
+    其他模式下检索不读取本地索引，不写入。
+    """
+
+    def __init__(
+        self,
+        searcher: TelegramResourceSearcher,
+        hot_search: BaiduHotSearch,
+        on_result: Optional[Callable[[str, List[Dict[str, Any]]], Awaitable[None]]] = None
+    ):
+        """
+        Args:
+            searcher: 已初始化（已连接）的搜索器
+            hot_search: 热搜获取器
+            on_result: 转存分享成功后的回调，参数为标题和搜索结果
+        """
+        self.searcher = searcher
+        self.client = searcher.client
+        self.hot_search = hot_search
+        self.on_result = on_result
+        self.min_similarity = LISTENER_CONFIG['MIN_SIMILARITY']
+        # 非 index 模式下为 None，新消息不写入索引
+        self.index: Optional[MessageIndex] = searcher.index
+        self.matcher = TitleMatcher([])
+        self._groups: Dict[int, str] = {}
+        self._saving: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def refresh_hot_titles(self):
+        """刷新热搜标题，重建匹配器"""
+        hot_items = await self.hot_search.get_hot_searches()
+        if not hot_items:
+            logging.warning("获取热搜失败，沿用当前标题")
+            return
+        self.matcher = TitleMatcher([item['title'] for item in hot_items])
+        logging.info(f"监听的热搜标题: {', '.join(self.matcher.titles)}")
+
+    async def _refresh_loop(self):
+        """定期刷新热搜标题"""
+        while True:
+            await asyncio.sleep(LISTENER_CONFIG['HOT_REFRESH_INTERVAL'])
+            try:
+                await self.refresh_hot_titles()
+            except Exception as e:
+                logging.error(f"刷新热搜标题失败: {str(e)}")
+
+    async def start(self):
+        """解析目标群组并注册新消息事件"""
+        for group in self.searcher.target_groups:
+            if not group:
+                continue
+            try:
+                peer = await self.searcher._get_entity(group)
+            except Exception as e:
+                logging.error(f"监听群组 {group} 失败: {str(e)}")
+                continue
+            self._groups[utils.get_peer_id(peer)] = self.searcher._group_key(group)
+
+        if not self._groups:
+            raise ValueError("没有可监听的群组")
+
+        await self.refresh_hot_titles()
+        self.client.add_event_handler(self._on_message, events.NewMessage(chats=list(self._groups)))
+        logging.info(f"开始监听 {len(self._groups)} 个群组的新消息")
+
+    async def run(self):
+        """监听直到连接断开"""
+        await self.start()
+        refresh_task = asyncio.create_task(self._refresh_loop())
+        try:
+            await self.client.run_until_disconnected()
+        finally:
+            refresh_task.cancel()
+            self.client.remove_event_handler(self._on_message)
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(refresh_task, *self._tasks, return_exceptions=True)
+
+    async def _on_message(self, event):
+        """处理一条新消息"""
+        message = event.message
+        group_key = self._groups.get(event.chat_id)
+        if group_key is None or not message.raw_text:
+            return
+
+        # 写入索引但不推进同步位置：监听期间可能漏掉消息，增量同步仍从原位置补齐
+        if self.index is not None:
+            self.index.upsert_messages(
+                group_key,
+                [IndexedMessage(group_key, message.id, message.date, message_text_with_links(message))],
+                0
+            )
+
+        parsed = parse_message(message, group_key)
+        if not parsed.links:
+            return
+
+        for title in self.matcher.match_titles(parsed.title):
+            candidate = self.searcher._build_candidate(title, parsed)
+            if not candidate or candidate["similarity"] < self.min_similarity:
+                continue
+            if title in self._saving or self.searcher.get_cached_results(title):
+                continue
+            logging.info(f"[{title}] 群组 {group_key} 发布了新资源: {parsed.title}")
+            self._saving.add(title)
+            task = asyncio.create_task(self._save(title, candidate))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _save(self, title: str, candidate: Dict[str, Any]):
+        """转存分享命中的资源"""
+        try:
+            results = await self.searcher.search_and_save(title, candidates=[candidate])
+            if not results:
+                logging.warning(f"[{title}] 新资源转存失败")
+                return
+            logging.info(f"[{title}] 新资源已转存分享: {results[0]['share_url']}")
+            if self.on_result:
+                await self.on_result(title, results)
+        except Exception as e:
+            logging.error(f"[{title}] 转存新资源时出错: {str(e)}", exc_info=True)
+        finally:
+            self._saving.discard(title)
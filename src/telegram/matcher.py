@@ -0,0 +1,102 @@
+import re
+from collections import deque
+from typing import List, Dict, Set
+
+
+def normalize_title(text: str) -> str:
+    """标准化文本：转小写并去掉标点和空白，用于多标题匹配"""
+    return re.sub(r'[^\w]', '', text.lower())
+
+
+# 季、部等后缀，如“第二季”“第3部”“Season 2”“S2”
+_SEASON_SUFFIX = re.compile(r'\s*(第[一二三四五六七八九十百\d]+[季部期]|season\s*\d+|s\d+)\s*$', re.IGNORECASE)
+# 括号及其中的内容，如“(2024)”“【4K】”
+_BRACKETS = re.compile(r'[\(（\[【《][^\)）\]】》]*[\)）\]】》]')
+# 副标题分隔符
+_SUBTITLE_SEPARATORS = re.compile(r'[:：·\-—|｜]')
+
+
+def query_variants(title: str, max_variants: int = 4) -> List[str]:
+    """生成标题的检索变体，用于 Telegram 服务端搜索和本地索引检索
+
+    依次为：原标题、去掉括号内容、去掉季/部后缀、只保留主标题、去掉所有标点。
+    去重后最多返回 max_variants 个，忽略少于两个字的变体。
+    """
+    title = title.strip()
+    candidates = [title]
+    without_brackets = _BRACKETS.sub(' ', title).strip()
+    candidates.append(without_brackets)
+    without_season = _SEASON_SUFFIX.sub('', without_brackets).strip()
+    candidates.append(without_season)
+    candidates.append(_SUBTITLE_SEPARATORS.split(without_season)[0].strip())
+    candidates.append(re.sub(r'[^\w]+', ' ', without_season).strip())
+
+    variants = []
+    for candidate in candidates:
+        candidate = re.sub(r'\s+', ' ', candidate)
+        if len(candidate) >= 2 and candidate not in variants:
+            variants.append(candidate)
+    return variants[:max_variants]
+
+
+class TitleMatcher:
+    """多标题匹配器（Aho-Corasick 自动机）
+
+    一次扫描消息文本即可找出其中出现的所有标题，
+    用于一轮遍历群组消息时同时匹配全部热搜标题。
+    """
+
+    def __init__(self, titles: List[str]):
+        self.titles = list(titles)
+        # goto 表、失败指针以及每个状态命中的标题下标
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[int]] = [set()]
+        for i, title in enumerate(self.titles):
+            self._add(normalize_title(title), i)
+        self._build()
+
+    def _add(self, pattern: str, index: int):
+        """向字典树中添加一个模式串"""
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(index)
+
+    def _build(self):
+        """广度优先构建失败指针"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def match(self, text: str) -> Set[int]:
+        """返回文本中出现的标题下标集合"""
+        matched = set()
+        state = 0
+        for char in normalize_title(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._output[state]:
+                matched |= self._output[state]
+        return matched
+
+    def match_titles(self, text: str) -> List[str]:
+        """返回文本中出现的标题"""
+        return [self.titles[i] for i in sorted(self.match(text))]
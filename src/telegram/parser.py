@@ -0,0 +1,129 @@
+import re
+from datetime import datetime
+from typing import Any, List, Optional
+
+from telethon.tl.types import MessageEntityTextUrl
+
+# 夸克网盘分享链接
+QUARK_LINK_PATTERN = re.compile(r'https?://pan\.quark\.cn/s/[a-zA-Z0-9]+')
+
+# 标签（#开头，到空白为止）
+_TAG_PATTERN = re.compile(r'#([^\s#]+)')
+
+# 资源帖中各字段的行前缀
+_TITLE_PREFIXES = ("名称：", "名称:")
+_SIZE_PREFIXES = ("📁 大小：", "📁 大小:", "大小：", "大小:")
+_TAG_PREFIXES = ("🏷 标签：", "🏷 标签:", "标签：", "标签:")
+
+# 不计入描述的行（链接、群组、频道等推广信息）
+_SKIP_MARKS = ("链接", "群组", "频道")
+
+
+class ParsedMessage:
+    """解析后的资源消息
+
+    一次遍历消息文本得到标题、描述、大小、标签和分享链接，所有使用方共享同一份记录。
+    id、date、text 与 Telethon Message 同名，可以直接替代原消息使用。
+    """
+
+    __slots__ = ('group', 'id', 'date', 'text', 'title', 'description', 'size', 'tags', 'links')
+
+    def __init__(
+        self,
+        group: str,
+        id: int,
+        date: datetime,
+        text: str,
+        title: str,
+        description: str,
+        size: Optional[str],
+        tags: List[str],
+        links: List[str]
+    ):
+        self.group = group
+        self.id = id
+        self.date = date
+        self.text = text
+        self.title = title
+        self.description = description
+        self.size = size
+        self.tags = tags
+        self.links = links
+
+    def __repr__(self) -> str:
+        return f"ParsedMessage(group={self.group!r}, id={self.id}, title={self.title!r}, links={self.links})"
+
+
+def hidden_links(message: Any) -> List[str]:
+    """读取消息实体中的隐藏链接（文字超链接 MessageEntityTextUrl）"""
+    return [
+        entity.url
+        for entity in (getattr(message, 'entities', None) or [])
+        if isinstance(entity, MessageEntityTextUrl)
+    ]
+
+
+def message_text_with_links(message: Any) -> str:
+    """消息纯文本，末尾追加正文中看不到的隐藏链接，用于写入本地索引"""
+    text = getattr(message, 'raw_text', None) or message.text or ""
+    extra = [url for url in hidden_links(message) if url not in text]
+    if extra:
+        text += "\n" + "\n".join(extra)
+    return text
+
+
+def parse_message(message: Any, group: str = "") -> ParsedMessage:
+    """解析一条消息
+
+    Args:
+        message: Telethon Message 或本地索引中的 IndexedMessage
+        group (str): 消息所在群组
+
+    Returns:
+        ParsedMessage: 解析结果
+    """
+    text = getattr(message, 'raw_text', None) or message.text or ""
+
+    title = None
+    first_line = ""
+    size = None
+    tags: List[str] = []
+    links: List[str] = []
+    description_lines: List[str] = []
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        for link in QUARK_LINK_PATTERN.findall(stripped):
+            if link not in links:
+                links.append(link)
+
+        if title is None and stripped.startswith(_TITLE_PREFIXES):
+            title = stripped[3:].strip()
+        elif size is None and stripped.startswith(_SIZE_PREFIXES):
+            size = stripped.split("：", 1)[-1].split(":", 1)[-1].strip()
+        elif stripped.startswith(_TAG_PREFIXES):
+            tags.extend(_TAG_PATTERN.findall(stripped))
+
+        if not first_line:
+            first_line = stripped
+        if not any(mark in line for mark in _SKIP_MARKS):
+            description_lines.append(line)
+
+    for link in hidden_links(message):
+        if QUARK_LINK_PATTERN.match(link) and link not in links:
+            links.append(link)
+
+    return ParsedMessage(
+        group=group,
+        id=message.id,
+        date=message.date,
+        text=text,
+        title=title if title is not None else first_line,
+        description="\n".join(description_lines).strip(),
+        size=size,
+        tags=tags,
+        links=links,
+    )
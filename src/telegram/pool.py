@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from src.config import QUARK_CONFIG, WEB_CONFIG
+from src.telegram.searcher import TelegramResourceSearcher
+
+
+class SearcherPool:
+    """常驻的搜索器池
+
+    启动时创建并登录搜索器，之后所有请求共用：Telegram 客户端在一条连接上并发处理请求，
+    夸克接口共用同一个 aiohttp 会话。池的大小限制同时进行的搜索数，超出的请求排队等待。
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or WEB_CONFIG['MAX_CONCURRENT_SEARCHES']
+        self.searcher: Optional[TelegramResourceSearcher] = None
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._health_lock = asyncio.Lock()
+
+    async def start(self) -> bool:
+        """创建搜索器并登录 Telegram"""
+        self.searcher = TelegramResourceSearcher(cookie=QUARK_CONFIG['COOKIE'])
+        if not await self.searcher.init():
+            logging.error("搜索器初始化失败")
+            return False
+        logging.info(f"搜索器池已就绪，最多同时处理 {self.size} 个搜索")
+        return True
+
+    async def close(self):
+        """关闭搜索器"""
+        if self.searcher:
+            await self.searcher.close()
+            self.searcher = None
+
+    async def _ensure_connected(self):
+        """连接断开时重新连接（多个请求同时发现断开时只重连一次）"""
+        if self.searcher.client.is_connected():
+            return
+        async with self._health_lock:
+            if not self.searcher.client.is_connected():
+                await self.searcher.health_check()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[TelegramResourceSearcher]:
+        """获取搜索器，同时进行的搜索数达到上限时等待"""
+        if self.searcher is None:
+            raise RuntimeError("搜索器池尚未启动")
+        async with self._semaphore:
+            await self._ensure_connected()
+            yield self.searcher
@@ -1,29 +1,45 @@
 import asyncio
 import logging
-from typing import List, Dict, Any, AsyncGenerator
-from fuzzywuzzy import fuzz
+from typing import List, Dict, Any, AsyncGenerator, Optional
+from itertools import zip_longest
 from telethon import TelegramClient
-from telethon.tl.types import InputPeerChannel, InputPeerUser, InputPeerChat
 from telethon.errors import (
     SessionPasswordNeededError,
     PhoneCodeInvalidError,
     FloodWaitError,
     ChatAdminRequiredError,
     UserDeactivatedBanError,
+    ChannelInvalidError,
+    ChannelPrivateError,
+    PeerIdInvalidError,
 )
-import re
+from contextlib import aclosing
 from datetime import datetime
 
 # from src.config import TELEGRAM_CONFIG, QUARK_CONFIG, V2RAY_CONFIG
 from src.config import TELEGRAM_CONFIG, QUARK_CONFIG    
 from src.utils.logger import setup_logger
 from src.utils.cache import SearchCache
-from src.quark.api import QuarkAPI
+from src.quark.pool import QuarkAPIPool
+from src.telegram.index import MessageIndex, IndexedMessage
+from src.telegram.history import AdaptiveLimiter, HistoryFetcher
+from src.telegram.entities import EntityCache
+from src.telegram.groups import GroupScheduler
+from src.telegram.matcher import TitleMatcher, query_variants
+from src.telegram.similarity import SimilarityScorer
+from src.telegram.parser import ParsedMessage, parse_message, message_text_with_links
+from src.utils.aio import merge_streams
+from src.utils.rate_limit import rate_limiter, throttled
+from src.config import INDEX_CONFIG, SIMILARITY_CONFIG, RATE_LIMIT_CONFIG
 # from src.utils.v2ray_controller import V2RayController
 
 # 设置日志为DEBUG级别
 logger = setup_logger(level=logging.INFO)
 
+# 缓存的 InputPeer 被拒绝（access_hash 失效、已不在群组中等），需要删除缓存后重新解析
+PEER_REJECTED_ERRORS = (ChannelInvalidError, ChannelPrivateError, PeerIdInvalidError)
+
+
 class TelegramResourceSearcher:
     """Telegram资源搜索类"""
     
@@ -33,12 +49,28 @@ class TelegramResourceSearcher:
         self.api_hash = TELEGRAM_CONFIG['API_HASH']
         self.target_groups = TELEGRAM_CONFIG['TARGET_GROUPS']
         self.max_results = TELEGRAM_CONFIG['MAX_RESULTS']
+        self.search_mode = TELEGRAM_CONFIG['SEARCH_MODE']
+        self.group_concurrency = TELEGRAM_CONFIG['GROUP_CONCURRENCY']
         
         # 初始化夸克网盘 API
         if not cookie:
             raise ValueError("请��.env文件中设置QUARK_COOKIE")
-        self.quark_api = QuarkAPI(cookie=cookie)
+        # 夸克账号池，传入的 cookie 为主账号
+        self.quark_api = QuarkAPIPool([cookie] + QUARK_CONFIG['COOKIES'])
         self.cache = SearchCache()
+        self.scorer = SimilarityScorer()
+
+        # 本地消息索引，同一群组同一时间只允许一个同步任务
+        self.index = MessageIndex() if self.search_mode == 'index' else None
+        self._sync_locks: Dict[str, asyncio.Lock] = {}
+        # 首次同步的并发限制器，按群组保存，FloodWait 中断后继续时沿用降低后的并发数
+        self._fetch_limiters: Dict[str, AdaptiveLimiter] = {}
+
+        # 群组实体缓存，启动时统一解析
+        self.entities = EntityCache()
+
+        # 按群组调度 Telegram 请求，触发 FloodWait 的群组暂停，其他群组继续
+        self.groups = GroupScheduler(self.group_concurrency)
         
         # # 初始化V2Ray控制器
         # self.v2ray = V2RayController(
@@ -61,7 +93,8 @@ class TelegramResourceSearcher:
                 self.client = TelegramClient(
                     'quark_searcher',
                     self.api_id,
-                    self.api_hash
+                    self.api_hash,
+                    flood_sleep_threshold=0  # FloodWait 交给限流器和群组调度处理，不在请求内等待
                 )
             
             if not self.client.is_connected():
@@ -70,18 +103,47 @@ class TelegramResourceSearcher:
             if not await self.client.is_user_authorized():
                 logging.error("Telegram 未登录，请先登录")
                 return False
-                
+
+            # 实体缓存中的 access_hash 只对保存它的账号有效
+            await rate_limiter.acquire('telegram')
+            me = await self.client.get_me(input_peer=True)
+            self.entities.bind_user(me.user_id)
+
+            await self._resolve_groups()
             return True
             
         except Exception as e:
             logging.error(f"初始化失败: {str(e)}")
             return False
         
+    async def health_check(self) -> bool:
+        """检查 Telegram 连接，断开时重新连接
+
+        Returns:
+            bool: 连接正常且已登录
+        """
+        try:
+            if not self.client:
+                return await self.init()
+            if not self.client.is_connected():
+                logging.warning("Telegram 连接已断开，正在重新连接")
+                await self.client.connect()
+            if not await self.client.is_user_authorized():
+                logging.error("Telegram 未登录，请先登录")
+                return False
+            return True
+        except Exception as e:
+            logging.error(f"检查 Telegram 连接失败: {str(e)}")
+            return False
+
     async def close(self):
         """关闭连接"""
         if self.client:
             await self.client.disconnect()
         await self.quark_api.close()
+        self.cache.close()
+        if self.index:
+            self.index.close()
         
         # # 如果V2Ray在运行，停止它
         # if self.v2ray:
@@ -97,7 +159,8 @@ class TelegramResourceSearcher:
                     self.client = TelegramClient(
                         'quark_searcher',
                         self.api_id,
-                        self.api_hash
+                        self.api_hash,
+                        flood_sleep_threshold=0  # FloodWait 交给限流器和群组调度处理，不在请求内等待
                     )
                 
                 if not self.client.is_connected():
@@ -108,6 +171,7 @@ class TelegramResourceSearcher:
                     await self.client.start()
                     
                 # 测试连接
+                await rate_limiter.acquire('telegram')
                 me = await self.client.get_me()
                 if me:
                     logging.info(f"成功连接到Telegram，用户ID: {me.id}")
@@ -120,10 +184,10 @@ class TelegramResourceSearcher:
                 logging.error("验证码无效")
                 return False
             except FloodWaitError as e:
-                wait_time = e.seconds
-                logging.error(f"请求过于频繁，需要等待 {wait_time} 秒")
-                if retry_count < max_retries - 1:
-                    await asyncio.sleep(min(wait_time, 30))  # 最多等待30秒
+                logging.error(f"请求过于频繁，需要等待 {e.seconds} 秒")
+                rate_limiter.on_flood_wait('telegram', 'default', e.seconds)
+                # 由限流器等待到 FloodWait 结束，等待过长时放弃
+                if e.seconds <= RATE_LIMIT_CONFIG['MAX_FLOOD_WAIT'] and retry_count < max_retries - 1:
                     retry_count += 1
                     continue
                 return False
@@ -139,19 +203,58 @@ class TelegramResourceSearcher:
                 
     def calculate_similarity(self, query: str, text: str) -> int:
         """计算文本相似度"""
-        # 移除特殊字符和空格进行比较
-        query = re.sub(r'[^\w\s]', '', query.lower())
-        text = re.sub(r'[^\w\s]', '', text.lower())
-        return fuzz.partial_ratio(query, text)
+        # 移除特殊字符后比较，查询词的处理结果会被缓存
+        return self.scorer.score(query, text)
         
+    async def _resolve_groups(self):
+        """并发解析所有目标群组，结果写入实体缓存"""
+        groups = [group for group in self.target_groups if group]
+        results = await asyncio.gather(*(self._get_entity(group) for group in groups), return_exceptions=True)
+        resolved = 0
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                logging.error(f"解析群组 {group} 失败: {str(result)}")
+            else:
+                resolved += 1
+        logging.info(f"已解析 {resolved}/{len(groups)} 个群组")
+
+    def _group_title(self, group: str) -> str:
+        """群组标题"""
+        return self.entities.title(self._group_key(group))
+
     async def _get_entity(self, group_id: str, max_retries: int = 3) -> Any:
-        """获取群组实体"""
+        """获取群组实体
+
+        优先使用实体缓存中的 InputPeer（被 Telegram 拒绝时由调用方通过 _refresh_entity 重新解析）；
+        最近解析失败的群组在失败缓存期内直接报错，不再重试。
+        """
+        group_key = self._group_key(group_id)
+        peer = self.entities.get(group_key)
+        if peer is not None:
+            return peer
+        if self.entities.is_failed(group_key):
+            raise ValueError(f"无法获取群组: {group_id}（最近解析失败）")
+
+        try:
+            entity = await self._fetch_entity(group_key, max_retries)
+        except Exception:
+            self.entities.mark_failed(group_key)
+            raise
+        return self.entities.set(group_key, entity)
+
+    async def _refresh_entity(self, group_id: str, error: Exception) -> Any:
+        """缓存的 InputPeer 被拒绝时删除缓存并重新解析"""
+        logging.warning(f"群组 {group_id} 的缓存实体被拒绝（{type(error).__name__}），重新解析")
+        self.entities.remove(self._group_key(group_id))
+        return await self._get_entity(group_id)
+
+    async def _fetch_entity(self, group_id: str, max_retries: int = 3) -> Any:
+        """向 Telegram 请求群组实体"""
         retry_count = 0
         while retry_count < max_retries:
             try:
                 # 尝试通过用户名获取
-                if group_id.startswith('@'):
-                    group_id = group_id[1:]
+                await rate_limiter.acquire('telegram', 'resolve')
                 return await self.client.get_entity(group_id)
             except ValueError:
                 # 如果用户名无效，尝试通过ID获取
@@ -159,12 +262,11 @@ class TelegramResourceSearcher:
                     group_id_int = int(group_id)
                     return await self.client.get_entity(group_id_int)
                 except ValueError:
-                    pass
+                    break
             except FloodWaitError as e:
-                wait_time = e.seconds
-                logging.error(f"请求过于频繁，需要等待 {wait_time} 秒")
-                if retry_count < max_retries - 1:
-                    await asyncio.sleep(min(wait_time, 30))
+                logging.error(f"请求过于频繁，需要等待 {e.seconds} 秒")
+                rate_limiter.on_flood_wait('telegram', 'resolve', e.seconds)
+                if e.seconds <= RATE_LIMIT_CONFIG['MAX_FLOOD_WAIT'] and retry_count < max_retries - 1:
                     retry_count += 1
                     continue
                 raise
@@ -177,7 +279,155 @@ class TelegramResourceSearcher:
                 raise
                 
         raise ValueError(f"无法获取群组: {group_id}")
-        
+
+    @staticmethod
+    def _group_key(group: str) -> str:
+        """群组在本地索引中的键"""
+        return group.lstrip('@')
+
+    async def _sync_group(self, entity: Any, group: str, debug: bool = False) -> int:
+        """增量同步群组消息到本地索引
+
+        只拉取上次同步位置之后的新消息，首次同步时会拉取全部历史。
+
+        Returns:
+            int: 本次新增的消息数
+        """
+        group_key = self._group_key(group)
+        lock = self._sync_locks.setdefault(group_key, asyncio.Lock())
+        async with lock:
+            # FloodWait 时暂停本群组，到期后从已提交的同步位置继续
+            return await self.groups.run(group_key, lambda: self._sync_group_once(entity, group_key, debug))
+
+    async def _sync_group_once(self, entity: Any, group_key: str, debug: bool = False) -> int:
+        """从本地索引的同步位置拉取新消息"""
+        min_id = self.index.get_max_id(group_key)
+        if min_id == 0:
+            return await self._build_group_index(entity, group_key, debug)
+
+        batch_size = INDEX_CONFIG['SYNC_BATCH_SIZE']
+        batch = []
+        max_id = min_id
+        synced = 0
+
+        # 从旧到新拉取，每批提交后推进同步位置，中断后可继续
+        messages = self.client.iter_messages(entity, min_id=min_id, reverse=True, wait_time=0)
+        try:
+            async for message in throttled(messages, 'history', pause=False):
+                max_id = max(max_id, message.id)
+                if message.text:
+                    # 保存纯文本和隐藏链接，检索时由 parse_message 统一解析
+                    batch.append(IndexedMessage(group_key, message.id, message.date, message_text_with_links(message)))
+                if len(batch) >= batch_size:
+                    self.index.upsert_messages(group_key, batch, max_id)
+                    synced += len(batch)
+                    batch = []
+                    if debug:
+                        print(f"已同步 {synced} 条消息...")
+        except FloodWaitError:
+            # 先提交已拉取的部分，暂停结束后从这里继续
+            self.index.upsert_messages(group_key, batch, max_id)
+            raise
+
+        if batch or max_id > min_id:
+            self.index.upsert_messages(group_key, batch, max_id)
+            synced += len(batch)
+
+        logging.info(f"群组 {group_key} 同步完成，新增 {synced} 条消息，最新消息ID: {max_id}")
+        return synced
+
+    async def _build_group_index(self, entity: Any, group_key: str, debug: bool = False) -> int:
+        """首次同步：并发拉取群组全部历史消息写入本地索引
+
+        各区间并发拉取、到达顺序不固定，拉取过程中不推进同步位置，全部完成后才写入最新消息ID。
+        被 FloodWait 等中断时保存尚未拉取的区间，暂停结束后（或下次运行时）只拉取剩余区间。
+
+        Returns:
+            int: 写入的消息数
+        """
+        synced = 0
+
+        def on_batch(messages):
+            nonlocal synced
+            batch = [
+                IndexedMessage(group_key, message.id, message.date, message_text_with_links(message))
+                for message in messages
+                if message.message
+            ]
+            self.index.upsert_messages(group_key, batch, 0)
+            synced += len(batch)
+            if debug:
+                print(f"已同步 {synced} 条消息...")
+
+        def on_interrupt(top_id, ranges):
+            self.index.save_backfill(group_key, top_id, ranges)
+            logging.info(f"群组 {group_key} 首次同步中断，剩余 {len(ranges)} 个区间待拉取")
+
+        resume = self.index.get_backfill(group_key)
+        fetcher = HistoryFetcher(self.client)
+        limiter = self._fetch_limiters.setdefault(group_key, fetcher.new_limiter())
+        stats = await fetcher.fetch(
+            entity, on_batch=on_batch, resume=resume, on_interrupt=on_interrupt, limiter=limiter
+        )
+        self.index.finish_backfill(group_key, stats['top_id'])
+        self._fetch_limiters.pop(group_key, None)
+        logging.info(
+            f"群组 {group_key} 首次同步完成，写入 {synced} 条消息，最新消息ID: {stats['top_id']}，"
+            f"速度: {stats['rate']:.0f} 条/秒"
+        )
+        return synced
+
+    async def _iter_group_messages(
+        self,
+        entity: Any,
+        group: str,
+        query: str,
+        limit: Optional[int] = None,
+        debug: bool = False,
+        search_mode: Optional[str] = None
+    ) -> AsyncGenerator[Any, None]:
+        """按搜索模式获取群组中的候选消息（从新到旧）
+
+        index: 增量同步后检索本地索引；server: Telegram 服务端搜索；
+        两者都会检索标题的多个变体并合并去重。scan: 全量遍历群组历史（不按关键词过滤），仅作兜底。
+        search_mode 默认使用 self.search_mode。
+        """
+        search_mode = search_mode or self.search_mode
+        group_key = self._group_key(group)
+        if search_mode == 'scan':
+            # 每页请求前由限流器放行，代替固定的等待时间；FloodWait 时暂停本群组后从中断处继续
+            messages = self.groups.iter_messages(
+                self.client,
+                entity,
+                group_key,
+                limit=limit,
+                reverse=False  # False 表示从新到旧
+            )
+            async with aclosing(messages):
+                async for message in messages:
+                    yield message
+            return
+
+        limit = limit or self.max_results * 20
+        variants = query_variants(query, TELEGRAM_CONFIG['QUERY_VARIANTS'])
+        if debug:
+            print(f"检索变体: {variants}")
+
+        messages = {}
+        if search_mode == 'index':
+            await self._sync_group(entity, group, debug)
+            for variant in variants:
+                for message in self.index.search(variant, group_key, limit):
+                    messages.setdefault(message.id, message)
+        else:
+            for variant in variants:
+                results = self.groups.iter_messages(self.client, entity, group_key, 'search', limit=limit, search=variant)
+                async for message in results:
+                    messages.setdefault(message.id, message)
+
+        for message_id in sorted(messages, reverse=True)[:limit]:
+            yield messages[message_id]
+
     async def _search_group(
         self, 
         group: str, 
@@ -188,93 +438,90 @@ class TelegramResourceSearcher:
         """搜索单个群组的消息"""
         try:
             entity = await self._get_entity(group)
-            group_title = getattr(entity, 'title', group)
+            group_title = self._group_title(group)
             logging.info(f"开始搜索群组: {group_title}")
             if debug:
                 print(f"\n开始搜索群组: {group_title}")
             
-            # 正则表达式匹配夸克网盘链接
-            quark_pattern = r'https?://pan\.quark\.cn/[^\s<>"\']+|quark://[^\s<>"\']+'
-            
             message_count = 0
             found_count = 0
             max_results = self.max_results
             
-            # 按时间倒序搜索所有消息
-            async for message in self.client.iter_messages(
-                entity,
-                reverse=False,  # False 表示从新到旧
-                wait_time=1  # 添加等待时间避免请求过快
-            ):
-                if not message or not message.text:
-                    continue
-                    
-                message_count += 1
-                if debug and message_count % 20 == 0:
-                    print(f"已检查 {message_count} 条消息...")
-                
-                # 计算相似度
-                similarity = self.calculate_similarity(query, message.text)
-                if similarity < min_similarity:
-                    continue
-                    
-                # 查找夸克网盘链接
-                quark_links = re.findall(quark_pattern, message.text)
-                if not quark_links:
-                    continue
+            # 按时间倒序检索消息，按批计算相似度；提前结束时关闭迭代器，释放群组的访问名额
+            messages = self._iter_group_messages(entity, group, query, debug=debug)
+            batches = _batched(messages, SIMILARITY_CONFIG['BATCH_SIZE'])
+            async with aclosing(messages), aclosing(batches):
+                async for batch in batches:
+                    # 每条消息只解析一次，后续都使用解析结果
+                    batch = [parse_message(message, group) for message in batch if message and message.text]
+                    message_count += len(batch)
+                    if debug:
+                        print(f"已检查 {message_count} 条消息...")
+
+                    # 候选已由本地 FTS 索引或服务端搜索按关键词筛出，这里只给带链接的消息打分
+                    batch = [message for message in batch if message.links]
+                    if not batch:
+                        continue
+
+                    # 只在标题上计算相似度
+                    scores = self.scorer.score_batch(query, [message.title for message in batch], min_similarity)
+                    for message, similarity in zip(batch, scores):
+                        if similarity < min_similarity:
+                            continue
+                        quark_links = message.links
                     
-                # 处理每个夸克链接
-                for link in quark_links:
-                    if found_count >= max_results:
-                        log_msg = f"已找到 {max_results} 个结果，停止搜索"
-                        logging.info(log_msg)
-                        if debug:
-                            print(f"\n{log_msg}")
-                        return
+                        # 处理每个夸克链接
+                        for link in quark_links:
+                            if found_count >= max_results:
+                                log_msg = f"已找到 {max_results} 个结果，停止搜索"
+                                logging.info(log_msg)
+                                if debug:
+                                    print(f"\n{log_msg}")
+                                return
                         
-                    # 检查缓存
-                    cache_key = f"{query}:{link}"
-                    cached_result = self.cache.get(cache_key)
-                    if cached_result:
-                        found_count += 1
-                        if debug:
-                            print(f"✓ [{found_count}/{max_results}] 从缓存中找到结果: {link}")
-                        yield cached_result
-                        continue
+                            # 检查缓存
+                            cache_key = f"{query}:{link}"
+                            cached_result = self.cache.get(cache_key)
+                            if cached_result:
+                                found_count += 1
+                                if debug:
+                                    print(f"✓ [{found_count}/{max_results}] 从缓存中找到结果: {link}")
+                                yield cached_result['results']
+                                continue
                         
-                    try:
-                        # 保存到夸克网盘
-                        if debug:
-                            print(f"正在保存链接: {link}")
-                        save_result = await self.quark_api.save_shared_file(link)
-                        if not save_result.get("success"):
-                            if debug:
-                                print(f"× 保存失败: {save_result.get('message')}")
-                            logging.warning(f"保存文件失败: {save_result.get('message')}")
-                            continue
+                            try:
+                                # 保存到夸克网盘
+                                if debug:
+                                    print(f"正在保存链接: {link}")
+                                save_result = await self.quark_api.save_shared_file(link)
+                                if not save_result.get("success"):
+                                    if debug:
+                                        print(f"× 保存失败: {save_result.get('message')}")
+                                    logging.warning(f"保存文件失败: {save_result.get('message')}")
+                                    continue
                             
-                        result = {
-                            "title": query,
-                            "similarity": similarity,
-                            "group_title": group_title,
-                            "message_text": message.text,
-                            "link": link,
-                            "file_info": save_result.get("file_info", {}),
-                            "message_date": message.date.strftime("%Y-%m-%d %H:%M:%S")
-                        }
+                                result = {
+                                    "title": query,
+                                    "similarity": similarity,
+                                    "group_title": group_title,
+                                    "message_text": message.text,
+                                    "link": link,
+                                    "file_info": save_result.get("file_info", {}),
+                                    "message_date": message.date.strftime("%Y-%m-%d %H:%M:%S")
+                                }
                         
-                        # 更新缓存
-                        self.cache.set(cache_key, result)
-                        found_count += 1
-                        if debug:
-                            print(f"✓ [{found_count}/{max_results}] 找到新结果: {link}")
-                        yield result
+                                # 更新缓存
+                                self.cache.set(cache_key, result)
+                                found_count += 1
+                                if debug:
+                                    print(f"✓ [{found_count}/{max_results}] 找到新结果: {link}")
+                                yield result
                         
-                    except Exception as e:
-                        if debug:
-                            print(f"× 处理链接出错: {str(e)}")
-                        logging.error(f"处理链接 {link} 时出错: {str(e)}")
-                        continue
+                            except Exception as e:
+                                if debug:
+                                    print(f"× 处理链接出错: {str(e)}")
+                                logging.error(f"处理链接 {link} 时出错: {str(e)}")
+                                continue
                     
             log_msg = f"群组 {group_title} 搜索完成，检查了 {message_count} 条消息，找到 {found_count} 个结果"
             logging.info(log_msg)
@@ -291,6 +538,13 @@ class TelegramResourceSearcher:
             logging.error(error_msg)
             if debug:
                 print(f"\n× {error_msg}")
+        except PEER_REJECTED_ERRORS as e:
+            # 删除被拒绝的缓存实体，下次搜索时重新解析
+            error_msg = f"群组 {group} 的缓存实体被拒绝: {str(e)}"
+            logging.error(error_msg)
+            self.entities.remove(self._group_key(group))
+            if debug:
+                print(f"\n× {error_msg}")
         except Exception as e:
             error_msg = f"搜索群组 {group} 时出错: {str(e)}"
             logging.error(error_msg, exc_info=True)
@@ -309,124 +563,410 @@ class TelegramResourceSearcher:
                 logging.error("无法连接到Telegram，搜索终止")
                 return
                 
-            for group in self.target_groups:
-                try:
-                    if debug:
-                        print(f"搜索群组: {group}")
-                    async for result in self._search_group(group, query, min_similarity, debug):
-                        yield result
-                except Exception as e:
-                    logging.error(f"搜索群组时出错: {str(e)}", exc_info=True)
-                    if debug:
-                        print(f"搜索群组 {group} 时出错: {str(e)}")
-                    continue
-                    
+            # 所有群组并发搜索，合并为一个流；达到结果数量上限后取消其余群组。
+            # 同时访问 Telegram 的群组数由 self.groups 控制，被限流的群组不占用名额
+            if debug:
+                print(f"并发搜索群组: {', '.join(self.target_groups)}")
+            streams = [
+                self._search_group(group, query, min_similarity, debug)
+                for group in self.target_groups
+            ]
+            found_count = 0
+            async with aclosing(merge_streams(streams)) as merged:
+                async for result in merged:
+                    found_count += 1
+                    yield result
+                    if found_count >= self.max_results:
+                        logging.info(f"已找到 {self.max_results} 个结果，停止搜索其余群组")
+                        break
+
         except Exception as e:
             logging.error(f"搜索消息时出错: {str(e)}", exc_info=True)
             if debug:
                 print(f"搜索出错: {str(e)}")
 
-    async def search_and_save(self, query: str, limit: int = 60) -> List[Dict[str, Any]]:
+    def get_cached_results(self, query: str, limit: int = 60) -> List[Dict[str, Any]]:
+        """获取缓存的搜索结果"""
+        cached_data = self.cache.get(f"{query}_{limit}")
+        if cached_data and cached_data.get('results'):
+            return cached_data['results']
+        return []
+
+    def cache_results(self, query: str, results: List[Dict[str, Any]], limit: int = 60):
+        """缓存搜索结果"""
+        self.cache.set(f"{query}_{limit}", results)
+
+    def invalidate_cached_results(self, query: str, limit: int = 60):
+        """删除缓存的搜索结果"""
+        self.cache.delete(f"{query}_{limit}")
+
+    def invalidate_share_urls(self, share_urls: List[str]) -> int:
+        """删除包含这些分享链接的缓存结果（容量清理删除了对应的文件）"""
+        return self.cache.invalidate_share_urls(share_urls)
+
+    def touch_results(self, results: List[Dict[str, Any]]) -> bool:
+        """返回缓存的结果前更新分享的发布时间，容量清理时保留仍在使用的资源
+
+        Returns:
+            bool: 所有分享链接是否都还在登记表中（不在说明文件已被清理，结果不能再用）
+        """
+        touched = True
+        for result in results:
+            if result.get("share_url"):
+                touched = self.quark_api.touch_share(result["share_url"]) and touched
+        return touched
+
+    @staticmethod
+    def build_result(candidate: Dict[str, Any], share_url: str) -> Dict[str, Any]:
+        """由候选资源和转存后的分享链接生成搜索结果"""
+        result = {k: v for k, v in candidate.items() if k != "links"}
+        result["share_url"] = share_url
+        return result
+
+    def _build_candidate(
+        self,
+        query: str,
+        message: ParsedMessage,
+        similarity: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """从解析后的消息构建候选资源，没有分享链接时返回None"""
+        if not message.links:
+            return None
+
+        # 在标题上计算相似度
+        if similarity is None:
+            similarity = self.calculate_similarity(query, message.title)
+
+        return {
+            "text": message.description,
+            "link": message.links[0],  # 原始链接
+            "links": message.links,
+            "similarity": similarity,
+            "date": message.date.strftime("%Y-%m-%d %H:%M:%S"),
+            "group": message.group,
+            "message_id": message.id,
+            "title": message.title,
+            "size": message.size,
+            "tags": message.tags,
+        }
+
+    async def _iter_group_candidates(
+        self,
+        group: str,
+        query: str,
+        limit: int,
+        min_similarity: int = 60
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """检索单个群组中与查询相似的带分享链接的候选消息"""
+        try:
+            entity = await self._get_entity(group)
+            # 单个查询不值得遍历群组全部历史，scan 模式下也按关键词在服务端搜索
+            search_mode = 'server' if self.search_mode == 'scan' else None
+            for attempt in range(2):
+                messages = self._iter_group_messages(entity, group, query, limit=limit, search_mode=search_mode)
+                try:
+                    async for message in messages:
+                        try:
+                            candidate = self._build_candidate(query, parse_message(message, group))
+                            if candidate and candidate["similarity"] >= min_similarity:
+                                yield candidate
+                        except Exception as e:
+                            logging.error(f"处理消息出错: {str(e)}", exc_info=True)
+                            continue
+                    return
+                except PEER_REJECTED_ERRORS as e:
+                    # 缓存的 InputPeer 在第一次请求时就会被拒绝，重新解析后重试一次
+                    if attempt:
+                        raise
+                    entity = await self._refresh_entity(group, e)
+
+        except Exception as e:
+            logging.error(f"搜索群组时出错: {str(e)}", exc_info=True)
+
+    def _iter_candidates(self, query: str, limit: int, min_similarity: int = 60) -> AsyncGenerator[Dict[str, Any], None]:
+        """并发检索所有群组的候选消息，合并为一个流（访问 Telegram 的并发由 self.groups 控制）"""
+        streams = [
+            self._iter_group_candidates(group, query, limit, min_similarity)
+            for group in self.target_groups
+        ]
+        return merge_streams(streams)
+
+    async def search_titles(
+        self,
+        titles: List[str],
+        min_similarity: int = 60,
+        limit: int = 60,
+        debug: bool = False
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """批量检索多个标题的候选资源
+
+        每个群组只遍历一次消息，用多模式匹配同时匹配全部标题，再用相似度确认。
+
+        Args:
+            titles (List[str]): 标题列表，通常来自 BaiduHotSearch.get_hot_searches()
+            min_similarity (int, optional): 最低相似度. Defaults to 60.
+            limit (int, optional): 每个群组每个标题的候选数量上限. Defaults to 60.
+            debug (bool, optional): 是否打印调试信息. Defaults to False.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 标题 -> 候选资源列表（按群组顺序、从新到旧）
+        """
+        candidates = {title: [] for title in titles}
+        if not titles:
+            return candidates
+
+        matcher = TitleMatcher(titles)
+
+        # 各群组并发检索，同时访问 Telegram 的群组数由 self.groups 控制，结果按群组顺序合并
+        group_results = await asyncio.gather(*(
+            self._search_titles_group(group, titles, matcher, min_similarity, limit, debug)
+            for group in self.target_groups
+        ))
+        for group_candidates in group_results:
+            for title, items in group_candidates.items():
+                candidates[title].extend(items)
+
+        return candidates
+
+    async def _search_title_variants(
+        self,
+        entity: Any,
+        group: str,
+        titles: List[str],
+        limit: int,
+        debug: bool = False
+    ) -> Dict[str, List[Any]]:
+        """在单个群组中检索多个标题的全部变体
+
+        index: 群组只同步一次，之后所有变体都查本地索引；
+        server: 各标题的变体去重后按轮次排列（先搜每个标题本身），每个群组最多搜索 MAX_SERVER_SEARCHES 次。
+
+        Returns:
+            Dict[str, List[Any]]: 标题 -> 命中的消息（去重，从新到旧，最多 limit 条）
+        """
+        group_key = self._group_key(group)
+        title_variants = {title: query_variants(title, TELEGRAM_CONFIG['QUERY_VARIANTS']) for title in titles}
+        variants = list(dict.fromkeys(
+            variant
+            for round_variants in zip_longest(*title_variants.values())
+            for variant in round_variants
+            if variant
+        ))
+
+        variant_hits = {}
+        if self.search_mode == 'index':
+            await self._sync_group(entity, group, debug)
+            for variant in variants:
+                variant_hits[variant] = self.index.search(variant, group_key, limit)
+        else:
+            max_searches = TELEGRAM_CONFIG['MAX_SERVER_SEARCHES']
+            if len(variants) > max_searches:
+                logging.info(f"群组 {group} 需要检索 {len(variants)} 个变体，只搜索前 {max_searches} 个")
+                variants = variants[:max_searches]
+            for variant in variants:
+                results = self.groups.iter_messages(self.client, entity, group_key, 'search', limit=limit, search=variant)
+                variant_hits[variant] = [message async for message in results]
+
+        hits = {}
+        for title, title_variant_list in title_variants.items():
+            messages = {}
+            for variant in title_variant_list:
+                for message in variant_hits.get(variant, ()):
+                    messages.setdefault(message.id, message)
+            hits[title] = [messages[message_id] for message_id in sorted(messages, reverse=True)[:limit]]
+        return hits
+
+    async def _search_titles_group(
+        self,
+        group: str,
+        titles: List[str],
+        matcher: TitleMatcher,
+        min_similarity: int,
+        limit: int,
+        debug: bool = False
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """在单个群组中批量检索多个标题"""
+        candidates = {title: [] for title in titles}
+        try:
+            entity = await self._get_entity(group)
+            try:
+                await self._collect_titles_group(entity, group, titles, matcher, min_similarity, limit, candidates, debug)
+            except PEER_REJECTED_ERRORS as e:
+                # 缓存的 InputPeer 在第一次请求时就会被拒绝，重新解析后重试一次
+                entity = await self._refresh_entity(group, e)
+                await self._collect_titles_group(entity, group, titles, matcher, min_similarity, limit, candidates, debug)
+
+        except Exception as e:
+            logging.error(f"批量检索群组 {group} 时出错: {str(e)}", exc_info=True)
+            if debug:
+                print(f"批量检索群组 {group} 时出错: {str(e)}")
+
+        return candidates
+
+    async def _collect_titles_group(
+        self,
+        entity: Any,
+        group: str,
+        titles: List[str],
+        matcher: TitleMatcher,
+        min_similarity: int,
+        limit: int,
+        candidates: Dict[str, List[Dict[str, Any]]],
+        debug: bool = False
+    ):
+        """检索群组中的多个标题，候选写入 candidates（出错时保留已找到的部分）"""
+        if self.search_mode != 'scan':
+            hits = await self._search_title_variants(entity, group, titles, limit, debug)
+            for title in titles:
+                for message in hits[title]:
+                    candidate = self._build_candidate(title, parse_message(message, group))
+                    if candidate and candidate["similarity"] >= min_similarity:
+                        candidates[title].append(candidate)
+            return
+
+        # 一次遍历群组历史，同时匹配所有标题
+        found = {title: 0 for title in titles}
+        message_count = 0
+        messages = self.groups.iter_messages(self.client, entity, self._group_key(group))
+        async with aclosing(messages):
+            async for message in messages:
+                if not message or not message.text:
+                    continue
+                message_count += 1
+                if debug and message_count % 100 == 0:
+                    print(f"[{group}] 已检查 {message_count} 条消息...")
+
+                parsed = parse_message(message, group)
+                if not parsed.links:
+                    continue
+                for title in matcher.match_titles(parsed.title):
+                    if found[title] >= limit:
+                        continue
+                    similarity = self.calculate_similarity(title, parsed.title)
+                    if similarity < min_similarity:
+                        continue
+                    candidate = self._build_candidate(title, parsed, similarity)
+                    if candidate:
+                        candidates[title].append(candidate)
+                        found[title] += 1
+
+                # 所有标题都找够了就结束本群组
+                if all(count >= limit for count in found.values()):
+                    break
+
+        logging.info(f"群组 {group} 批量检索完成，检查了 {message_count} 条消息")
+
+    async def search_and_save(
+        self,
+        query: str,
+        limit: int = 60,
+        candidates: Optional[List[Dict[str, Any]]] = None,
+        min_similarity: int = 60
+    ) -> List[Dict[str, Any]]:
         """搜索并保存资源
 
         Args:
             query (str): 搜索关键词
             limit (int, optional): 搜索结果数量限制. Defaults to 60.
+            candidates (Optional[List[Dict[str, Any]]], optional): 已检索到的候选资源（如 search_titles 的结果），
+                传入时不再检索群组. Defaults to None.
+            min_similarity (int, optional): 检索群组时候选资源的最低相似度. Defaults to 60.
 
         Returns:
             List[Dict[str, Any]]: 搜索结果
         """
-        # 先从缓存中查找
-        cache_key = f"{query}_{limit}"
-        cached_data = self.cache.get(cache_key)
-        if cached_data and cached_data.get('results'):
-            return cached_data['results']
+        results = []
+        events = self.iter_search_and_save(query, limit, candidates, min_similarity)
+        async with aclosing(events):
+            async for event in events:
+                if "result" in event:
+                    results.append(event["result"])
+        results.sort(key=lambda x: x["similarity"], reverse=True)
+        return results
+
+    async def iter_search_and_save(
+        self,
+        query: str,
+        limit: int = 60,
+        candidates: Optional[List[Dict[str, Any]]] = None,
+        min_similarity: int = 60
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """搜索并保存资源，逐个产生搜索进度
+
+        参数与 search_and_save 相同。
+
+        Yields:
+            Dict[str, Any]: {"candidate": 候选资源}（开始转存该资源）或 {"result": 搜索结果}
+        """
+        # 先从缓存中查找，分享对应的文件已被清理时重新搜索
+        cached_results = self.get_cached_results(query, limit)
+        if cached_results:
+            if self.touch_results(cached_results):
+                for result in cached_results:
+                    yield {"result": result}
+                return
+            logger.info(f"[{query}] 缓存的分享链接已不在登记表中，重新搜索")
+            self.invalidate_cached_results(query, limit)
 
         # 初始化结果列表
         results = []
-        saved = False  # 是否已经保存成功
 
-        # 搜索每个群组
-        for group in self.target_groups:
-            try:
-                async for message in self.client.iter_messages(
-                    group,
-                    search=query,
-                    limit=limit
-                ):
-                    try:
-                        # 提取分享链接
-                        links = re.findall(r'https://pan\.quark\.cn/s/[a-zA-Z0-9]+', message.text)
-                        if not links:
-                            continue
+        if candidates is None:
+            candidate_iter = self._iter_candidates(query, limit, min_similarity)
+            link_status = None
+        else:
+            candidate_iter = _aiter_list(candidates)
+            # 已知全部候选时，一次并发检查所有链接是否有效
+            link_status = await self.quark_api.validate_links(
+                [link for candidate in candidates for link in candidate["links"]]
+            )
 
-                        # 计算相似度
-                        similarity = fuzz.ratio(query.lower(), message.text.lower())
-                        
-                        # 提取日期和群组信息
-                        date = message.date.strftime("%Y-%m-%d %H:%M:%S")
-                        group_title = group
-
-                        # 如果还没有保存成功，尝试保存第一个链接
-                        share_info = None
-                        if not saved:
-                            for link in links:
-                                logger.debug(f"正在保存链接: {link}")
-                                save_result = await self.quark_api.save_and_share(link)
-                                if save_result.get("success"):
-                                    saved = True
-                                    share_info = save_result
-                                    logger.debug(f"保存并分享成功: {link} -> {save_result['share_url']}")
-                                    break
-                                else:
-                                    logger.error(f"保存并分享失败: {save_result}")
-
-                        # 添加到结果集
-                        description = ""
-                        for line in message.text.split("\n"):
-                            if line and "链接" not in line and "群组" not in line and "频道" not in line:
-                                description += line
-                                description += "\n"
-                        description = description.strip()
-
-                        result = {
-                            "text": description,
-                            "link": links[0],  # 原始链接
-                            "similarity": similarity,
-                            "date": date,
-                            "group": group_title,
-                            "message_id": message.id,
-                        }
-
-                        # 如果保存成功，添加保存后的信息
-                        if share_info:  
-                            result.update({
-                                # "saved_file": share_info["saved_file"],
-                                "share_url": share_info["share_url"]
-                                # "share_pwd": share_info["share_info"].get("passcode"),
-                            })
-                            # 只有保存成功的, 才添加到结果集
-                            results.append(result)
-
-                        # 如果已经保存成功，就停止搜索
-                        if saved:
-                            break
-
-                    except Exception as e:
-                        logging.error(f"处理消息出错: {str(e)}", exc_info=True)
+        # 只保存第一个能成功转存的资源，成功后关闭候选流以取消其余群组的检索
+        async with aclosing(candidate_iter):
+            async for candidate in candidate_iter:
+                yield {"candidate": candidate}
+                status = link_status or await self.quark_api.validate_links(candidate["links"])
+                share_info = None
+                for link in candidate["links"]:
+                    if not status.get(link, True):
+                        logger.debug(f"跳过失效链接: {link}")
                         continue
+                    logger.debug(f"正在保存链接: {link}")
+                    save_result = await self.quark_api.save_and_share(link)
+                    if save_result.get("success"):
+                        share_info = save_result
+                        logger.debug(f"保存并分享成功: {link} -> {save_result['share_url']}")
+                        break
+                    else:
+                        logger.error(f"保存并分享失败: {save_result}")
 
-                if saved:
+                if share_info:
+                    # 只有保存成功的, 才添加到结果集
+                    result = self.build_result(candidate, share_info["share_url"])
+                    results.append(result)
+                    yield {"result": result}
                     break
 
-            except Exception as e:
-                logging.error(f"搜索群组时出错: {str(e)}", exc_info=True)
-                continue
-
         # 按相似度排序
         results.sort(key=lambda x: x["similarity"], reverse=True)
 
         # 缓存结果
-        self.cache.set(cache_key, results)
+        self.cache_results(query, results, limit)
 
-        return results
+
+async def _aiter_list(items: List[Any]) -> AsyncGenerator[Any, None]:
+    """把列表包装成异步迭代器"""
+    for item in items:
+        yield item
+
+
+async def _batched(messages: AsyncGenerator[Any, None], size: int) -> AsyncGenerator[List[Any], None]:
+    """把异步迭代器按固定大小分批"""
+    batch = []
+    async for message in messages:
+        batch.append(message)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,61 @@
+import re
+from functools import lru_cache
+from typing import List
+
+try:
+    # rapidfuzz 为 C 实现，比 fuzzywuzzy 快一个数量级
+    from rapidfuzz import fuzz, process
+    _RAPIDFUZZ = True
+except ImportError:
+    from fuzzywuzzy import fuzz
+    _RAPIDFUZZ = False
+
+# 移除特殊字符，只保留文字、数字和空白
+_SPECIAL_CHARS = re.compile(r'[^\w\s]')
+
+
+def normalize_text(text: str) -> str:
+    """标准化文本：转小写并移除特殊字符"""
+    return _SPECIAL_CHARS.sub('', text.lower())
+
+
+@lru_cache(maxsize=1024)
+def normalize_query(query: str) -> str:
+    """标准化查询词（带缓存，同一查询只处理一次）"""
+    return normalize_text(query)
+
+
+class SimilarityScorer:
+    """批量相似度打分
+
+    查询词只标准化一次，一批文本交给 rapidfuzz 的 process.extract 在 C 层循环打分；
+    未安装 rapidfuzz 时逐条使用 fuzzywuzzy。
+    """
+
+    def score(self, query: str, text: str) -> int:
+        """计算单条文本的相似度"""
+        return self.score_batch(query, [text])[0]
+
+    def score_batch(self, query: str, texts: List[str], score_cutoff: int = 0) -> List[int]:
+        """计算一批文本的相似度
+
+        Args:
+            query (str): 查询词
+            texts (List[str]): 待打分的文本
+            score_cutoff (int, optional): 低于该分数的文本记为 0，rapidfuzz 可以提前结束计算. Defaults to 0.
+
+        Returns:
+            List[int]: 与 texts 顺序一致的相似度
+        """
+        query = normalize_query(query)
+        texts = [normalize_text(text) for text in texts]
+        if not _RAPIDFUZZ:
+            return [score if score >= score_cutoff else 0 for score in (fuzz.partial_ratio(query, text) for text in texts)]
+
+        scores = [0] * len(texts)
+        for _, score, i in process.extract(
+            query, texts, scorer=fuzz.partial_ratio, limit=None, score_cutoff=score_cutoff or None
+        ):
+            scores[i] = int(round(score))
+        # 四舍五入后可能低于阈值
+        return [score if score >= score_cutoff else 0 for score in scores]
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from typing import AsyncGenerator, AsyncIterator, Any, Callable, Dict, List, Optional
+
+# 合并流内部使用的消息类型
+_ITEM = 0
+_DONE = 1
+
+
+async def merge_streams(
+    streams: List[AsyncIterator[Any]],
+    maxsize: int = 1
+) -> AsyncGenerator[Any, None]:
+    """并发消费多个异步迭代器，合并为一个流
+
+    所有迭代器同时运行（访问 Telegram 的并发由 GroupScheduler 按群组控制）；内部队列容量为 maxsize，
+    消费方处理不过来时各个迭代器会阻塞等待（背压）。
+    消费方提前结束（break 后 aclose）时，会取消所有仍在运行的迭代器。
+
+    Args:
+        streams (List[AsyncIterator[Any]]): 要合并的异步迭代器
+        maxsize (int, optional): 内部队列容量. Defaults to 1.
+
+    Yields:
+        Any: 各迭代器产生的元素，按产生的先后顺序
+    """
+    if not streams:
+        return
+
+    queue = asyncio.Queue(maxsize=maxsize)
+
+    async def drain(stream: AsyncIterator[Any]):
+        try:
+            async for item in stream:
+                await queue.put((_ITEM, item))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"合并流中的任务出错: {str(e)}", exc_info=True)
+        await queue.put((_DONE, None))
+
+    tasks = [asyncio.create_task(drain(stream)) for stream in streams]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            kind, item = await queue.get()
+            if kind == _DONE:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class SingleFlight:
+    """合并相同键的并发迭代
+
+    同一个键同时只运行一次迭代，期间的其他调用订阅同一次迭代，逐个收到相同的元素。
+    迭代在后台任务中进行，某个调用方超时或断开不会取消迭代，其他调用方仍能收到后续元素。
+    """
+
+    def __init__(self):
+        self._streams: Dict[str, 'Broadcast'] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """该键是否有正在进行的迭代"""
+        return key in self._streams
+
+    def stream(self, key: str, func: Callable[[], AsyncIterator[Any]]) -> AsyncGenerator[Any, None]:
+        """迭代 func 返回的异步迭代器，相同键已有迭代时订阅同一次迭代
+
+        迭代在后台任务中进行，每个调用方都从头收到全部元素；
+        调用方超时或断开只结束自己的订阅，其他调用方继续收到后续元素。
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = Broadcast(func())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda _: self._finish_stream(key, broadcast))
+        return broadcast.subscribe()
+
+    def _finish_stream(self, key: str, broadcast: 'Broadcast'):
+        """迭代结束后移除"""
+        if self._streams.get(key) is broadcast:
+            del self._streams[key]
+
+
+class Broadcast:
+    """把一个异步迭代器的元素广播给多个订阅者
+
+    迭代在后台任务中进行，元素保存在列表中，订阅者从头读取并等待新元素；
+    迭代出错时，所有订阅者在收到已产生的元素后收到同一个异常。
+    """
+
+    def __init__(self, source: AsyncIterator[Any]):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run(source))
+
+    def _notify(self):
+        """唤醒等待中的订阅者"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _run(self, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                self.items.append(item)
+                self._notify()
+        except Exception as e:
+            logging.debug(f"广播的迭代出错: {str(e)}")
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncGenerator[Any, None]:
+        """从头读取全部元素，迭代结束后返回"""
+        position = 0
+        while True:
+            while position < len(self.items):
+                yield self.items[position]
+                position += 1
+            if self.done:
+                if self.error:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+async def iter_until(iterator: AsyncIterator[Any], timeout: float) -> AsyncGenerator[Any, None]:
+    """迭代异步迭代器，总耗时超过 timeout 秒时抛出 asyncio.TimeoutError
+
+    结束（包括超时和提前退出）时关闭 iterator。
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(iterator.__anext__(), max(0.0, deadline - loop.time()))
+            except StopAsyncIteration:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, 'aclose'):
+            await iterator.aclose()
@@ -1,63 +1,220 @@
 import json
 import logging
-import os
+import sqlite3
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
 from src.config import CACHE_CONFIG
 
+
+class LRUCache:
+    """内存 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取并标记为最近使用"""
+        if key not in self.data:
+            return None
+        self.data.move_to_end(key)
+        return self.data[key]
+
+    def set(self, key: str, value: Any):
+        """写入，超出容量时淘汰最久未使用的项"""
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def pop(self, key: str):
+        """删除"""
+        self.data.pop(key, None)
+
+    def clear(self):
+        """清空"""
+        self.data.clear()
+
+
+class TTLCache(LRUCache):
+    """带过期时间的内存 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600):
+        super().__init__(maxsize)
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取未过期的值，过期的项直接删除"""
+        entry = super().get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self.pop(key)
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入，ttl 秒后过期（默认使用缓存的 ttl）"""
+        super().set(key, (time.monotonic() + (self.ttl if ttl is None else ttl), value))
+
+
 class SearchCache:
-    """搜索缓存"""
-    
-    def __init__(self):
+    """搜索缓存
+
+    数据保存在 SQLite 中（按 key 建主键，按时间戳建索引），单次读写只涉及一行；
+    前面有一层内存 LRU。过期数据在读取时惰性删除，并定期批量清理。
+    首次启动时会把旧版 search_cache.json 导入数据库。
+    """
+
+    def __init__(self, db_file: Optional[Path] = None):
+        self.db_file = Path(db_file or CACHE_CONFIG['DB_FILE'])
         self.cache_file = Path(CACHE_CONFIG['SEARCH_CACHE_FILE'])
-        self.cache = {}  # 初始化为空字典
+        self.expire_seconds = timedelta(days=CACHE_CONFIG['EXPIRE_DAYS']).total_seconds()
+        self.memory = LRUCache(CACHE_CONFIG['MEMORY_SIZE'])
+        self._last_compact = 0.0
         self.load()  # 加载缓存
-        
+
     def load(self):
-        """加载缓存"""
+        """打开缓存数据库"""
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_file))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                results TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_search_cache_timestamp ON search_cache (timestamp);
+        """)
+        self.conn.commit()
+        self._migrate_json()
+        self.compact()
+
+    def _migrate_json(self):
+        """一次性导入旧版 JSON 缓存文件，导入后重命名为 .migrated"""
+        if not self.cache_file.exists():
+            return
         try:
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-            else:
-                self.cache = {}
-                self.save()  # 创建空缓存文件
-        except json.JSONDecodeError:
-            logging.warning("缓存文件损坏，重置缓存")
-            self.cache = {}
-            self.save()  # 保存空缓存
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                old_cache = json.load(f)
+            rows = [
+                (key, datetime.fromisoformat(value['timestamp']).timestamp(),
+                 json.dumps(value['results'], ensure_ascii=False))
+                for key, value in old_cache.items()
+            ]
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO search_cache (key, timestamp, results) VALUES (?, ?, ?)",
+                    rows
+                )
+            self.cache_file.rename(self.cache_file.with_suffix('.json.migrated'))
+            logging.info(f"已导入 {len(rows)} 条旧缓存到 {self.db_file}")
+        except (json.JSONDecodeError, KeyError, ValueError):
+            logging.warning("旧缓存文件损坏，跳过导入")
+            self.cache_file.rename(self.cache_file.with_suffix('.json.migrated'))
         except Exception as e:
-            logging.error(f"加载缓存失败: {str(e)}")
-            self.cache = {}
-            self.save()  # 保存空缓存
-
-        # 清理过期缓存
-        now = datetime.now()
-        self.cache = {
-            k: v for k, v in self.cache.items()
-            if datetime.fromisoformat(v['timestamp']) > now - timedelta(days=CACHE_CONFIG['EXPIRE_DAYS'])
-        }
-        self.save()  # 保存清理后的缓存
-        
-    def save(self):
-        """保存缓存数据"""
+            logging.error(f"导入旧缓存失败: {str(e)}")
+
+    def compact(self):
+        """批量删除过期缓存"""
         try:
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM search_cache WHERE timestamp < ?",
+                    (time.time() - self.expire_seconds,)
+                )
+            self._last_compact = time.time()
         except Exception as e:
-            logging.error(f"保存缓存失败: {str(e)}")
-    
+            logging.error(f"清理缓存失败: {str(e)}")
+
+    def _maybe_compact(self):
+        """距离上次清理超过间隔时执行一次清理"""
+        if time.time() - self._last_compact > CACHE_CONFIG['COMPACT_INTERVAL']:
+            self.compact()
+
     def get(self, key: str) -> Optional[Dict[str, Any]]:
         """获取缓存数据"""
-        return self.cache.get(key)
-    
+        entry = self.memory.get(key)
+        if entry is None:
+            try:
+                row = self.conn.execute(
+                    "SELECT timestamp, results FROM search_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except Exception as e:
+                logging.error(f"读取缓存失败: {str(e)}")
+                return None
+            if not row:
+                return None
+            entry = {
+                'timestamp': datetime.fromtimestamp(row[0]).isoformat(),
+                'results': json.loads(row[1])
+            }
+            self.memory.set(key, entry)
+
+        # 惰性过期
+        if datetime.fromisoformat(entry['timestamp']).timestamp() < time.time() - self.expire_seconds:
+            self.delete(key)
+            return None
+        return entry
+
     def set(self, key: str, results: List[Dict[str, Any]]):
         """设置缓存数据"""
-        self.cache[key] = {
-            'timestamp': datetime.now().isoformat(),
+        now = time.time()
+        entry = {
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
             'results': results
         }
-        self.save()
+        self.memory.set(key, entry)
+        try:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, timestamp, results) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(results, ensure_ascii=False))
+                )
+        except Exception as e:
+            logging.error(f"保存缓存失败: {str(e)}")
+        self._maybe_compact()
+
+    def delete(self, key: str):
+        """删除缓存数据"""
+        self.memory.pop(key)
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+        except Exception as e:
+            logging.error(f"删除缓存失败: {str(e)}")
+
+    def invalidate_share_urls(self, share_urls: List[str]) -> int:
+        """删除结果中包含这些分享链接的缓存（分享对应的文件已被清理）
+
+        Returns:
+            int: 删除的缓存条数
+        """
+        share_urls = set(share_urls)
+        if not share_urls:
+            return 0
+
+        def contains(results) -> bool:
+            return isinstance(results, list) and any(
+                isinstance(result, dict) and result.get('share_url') in share_urls for result in results
+            )
+
+        keys = {key for key, entry in self.memory.data.items() if contains(entry['results'])}
+        try:
+            for key, results in self.conn.execute("SELECT key, results FROM search_cache"):
+                if key not in keys and contains(json.loads(results)):
+                    keys.add(key)
+        except Exception as e:
+            logging.error(f"读取缓存失败: {str(e)}")
+        for key in keys:
+            self.delete(key)
+        return len(keys)
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
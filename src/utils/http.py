@@ -0,0 +1,84 @@
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+import aiohttp
+
+from src.config import HTTP_CONFIG
+
+try:
+    # orjson 为 C 实现，解析和序列化都比标准库快
+    import orjson
+
+    def json_loads(data: Any) -> Any:
+        return orjson.loads(data)
+
+    def json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+
+class SharedSession:
+    """进程内共享的 aiohttp 会话
+
+    夸克、百度等客户端共用同一个连接池：按主机限制连接数、保持长连接并缓存 DNS，
+    并发请求时复用已建立的 TLS 连接。会话在事件循环中首次使用时才创建，
+    客户端在构造时 acquire、关闭时 release，最后一个客户端关闭时关闭会话。
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._users = 0
+
+    def acquire(self):
+        """登记一个使用方"""
+        self._users += 1
+
+    async def release(self):
+        """注销一个使用方，没有使用方时关闭会话"""
+        self._users = max(0, self._users - 1)
+        if self._users == 0:
+            await self.close()
+
+    def get(self) -> aiohttp.ClientSession:
+        """获取当前事件循环中的会话，不存在或已关闭时创建"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_CONFIG['LIMIT'],
+                limit_per_host=HTTP_CONFIG['LIMIT_PER_HOST'],
+                ttl_dns_cache=HTTP_CONFIG['DNS_CACHE_TTL'],
+                keepalive_timeout=HTTP_CONFIG['KEEPALIVE_TIMEOUT'],
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=HTTP_CONFIG['TIMEOUT']),
+                json_serialize=json_dumps,
+            )
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        """关闭会话"""
+        if self._session is not None and not self._session.closed:
+            try:
+                await self._session.close()
+            except Exception as e:
+                logging.error(f"关闭 HTTP 会话失败: {str(e)}")
+        self._session = None
+        self._loop = None
+
+
+# 全局共享的会话
+shared_session = SharedSession()
+
+
+async def read_json(response: aiohttp.ClientResponse) -> Any:
+    """用快速 JSON 解析器读取响应（不检查 Content-Type）"""
+    return await response.json(loads=json_loads, content_type=None)
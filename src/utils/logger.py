@@ -2,6 +2,8 @@ import logging
 import sys
 from typing import Optional
 
+from src.config import LOG_CONFIG
+
 def setup_logger(level: int = logging.DEBUG, name: Optional[str] = None) -> logging.Logger:
     """设置统一的日志配置
 
@@ -24,7 +26,7 @@ def setup_logger(level: int = logging.DEBUG, name: Optional[str] = None) -> logg
     console_handler.setLevel(level)  # 确保处理器也使用相同的日志级别
 
     # 配置文件输出
-    file_handler = logging.FileHandler('app.log', encoding='utf-8')
+    file_handler = logging.FileHandler(LOG_CONFIG['FILE'], encoding='utf-8')
     file_handler.setFormatter(formatter)
     file_handler.setLevel(level)  # 确保处理器也使用相同的日志级别
 
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from telethon.errors import FloodWaitError
+
+from src.config import RATE_LIMIT_CONFIG
+
+
+class TokenBucket:
+    """自适应令牌桶
+
+    按 rate（次/秒）补充令牌，最多积累 burst 个。上游报告限流时速率减半并暂停到等待结束，
+    之后每次成功按固定步长恢复到初始速率（AIMD）。
+    """
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = rate * RATE_LIMIT_CONFIG['MIN_RATE_RATIO']
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        """取一个令牌，没有令牌或处于暂停期时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, pause: float = 0.0):
+        """上游限流：速率减半，并暂停 pause 秒"""
+        now = time.monotonic()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self.updated_at = now
+        if pause > 0:
+            # 暂停结束后先放行一个请求试探，之后按降低后的速率补充
+            self.paused_until = max(self.paused_until, now + pause)
+            self.tokens = 1.0
+            self.updated_at = self.paused_until
+        paused = f"暂停 {pause:.0f} 秒，" if pause > 0 else ""
+        logging.warning(f"{self.name} 触发限流，{paused}速率降为 {self.rate:.2f} 次/秒")
+
+    def reward(self):
+        """请求成功：逐步恢复速率"""
+        if self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * RATE_LIMIT_CONFIG['RECOVERY_STEP'])
+
+
+class RateLimiter:
+    """按上游和接口类别划分的限流器
+
+    每个 (上游, 接口类别, 范围) 一个令牌桶，速率来自 RATE_LIMIT_CONFIG；
+    范围用于区分同一上游的不同账号。FloodWait 秒数和上游的限流错误码会反馈到对应的令牌桶。
+    """
+
+    def __init__(self):
+        self.buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+    def bucket(self, upstream: str, endpoint: str = 'default', scope: str = '') -> TokenBucket:
+        """获取令牌桶，不存在时按配置创建"""
+        key = (upstream, endpoint, scope)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            limits = RATE_LIMIT_CONFIG['LIMITS'][upstream]
+            rate, burst = limits.get(endpoint, limits['default'])
+            name = f"{upstream}/{endpoint}" + (f"/{scope}" if scope else "")
+            bucket = self.buckets[key] = TokenBucket(name, rate, burst)
+        return bucket
+
+    async def acquire(self, upstream: str, endpoint: str = 'default', scope: str = ''):
+        """发送请求前取一个令牌"""
+        await self.bucket(upstream, endpoint, scope).acquire()
+
+    def on_success(self, upstream: str, endpoint: str = 'default', scope: str = ''):
+        """请求成功"""
+        self.bucket(upstream, endpoint, scope).reward()
+
+    def on_flood_wait(self, upstream: str, endpoint: str, seconds: float, scope: str = ''):
+        """收到 FloodWait：暂停到等待结束"""
+        self.bucket(upstream, endpoint, scope).penalize(seconds)
+
+    def on_slow_down(self, upstream: str, endpoint: str, scope: str = ''):
+        """收到限流但由调用方自行等待：只降低速率，不暂停整个令牌桶"""
+        self.bucket(upstream, endpoint, scope).penalize()
+
+    def on_error_code(self, upstream: str, endpoint: str, code: Any, scope: str = '') -> bool:
+        """根据上游错误码调整速率
+
+        Returns:
+            bool: 是否为限流错误码
+        """
+        if code in RATE_LIMIT_CONFIG['THROTTLE_CODES'].get(upstream, ()):
+            self.bucket(upstream, endpoint, scope).penalize(RATE_LIMIT_CONFIG['THROTTLE_PAUSE'])
+            return True
+        return False
+
+    def on_failure(self, upstream: str, endpoint: str, pause: float, scope: str = ''):
+        """网络错误、超时等：按退避时间暂停"""
+        self.bucket(upstream, endpoint, scope).penalize(pause)
+
+
+# 全局共享的限流器
+rate_limiter = RateLimiter()
+
+
+async def throttled(
+    messages: AsyncIterator[Any],
+    endpoint: str,
+    page_size: int = 100,
+    scope: str = '',
+    pause: bool = True
+) -> AsyncIterator[Any]:
+    """按 Telegram 分页限流迭代消息
+
+    iter_messages 每取一页（page_size 条）发一次请求，每页之前取一个令牌，
+    代替固定的 wait_time；迭代中收到 FloodWait 时反馈给限流器后重新抛出。
+    pause 为 False 时只降低速率，FloodWait 的等待由调用方处理（如只暂停对应群组）。
+    """
+    bucket = rate_limiter.bucket('telegram', endpoint, scope)
+    await bucket.acquire()
+    count = 0
+    try:
+        async for message in messages:
+            yield message
+            count += 1
+            if count % page_size == 0:
+                bucket.reward()
+                await bucket.acquire()
+    except FloodWaitError as e:
+        bucket.penalize(e.seconds if pause else 0)
+        raise
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class ScheduledJob:
+    """定时任务
+
+    固定间隔（every）或每天固定时间（daily）触发。overlap_key 相同的任务不会同时运行，
+    上一次还没结束时本次触发直接跳过。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: Optional[float] = None,
+        at: Optional[str] = None,
+        overlap_key: Optional[str] = None
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.at = at
+        self.overlap_key = overlap_key or name
+        self.next_run: Optional[datetime] = None
+
+    def schedule_next(self, now: datetime):
+        """计算下一次运行时间"""
+        if self.interval:
+            self.next_run = now + timedelta(seconds=self.interval)
+            return
+        hour, minute = map(int, self.at.split(':'))
+        next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        self.next_run = next_run
+
+
+class AsyncScheduler:
+    """基于 asyncio 的定时调度器
+
+    所有任务在同一个事件循环中运行，调度循环按最近一次到期时间休眠，不再按分钟轮询。
+    """
+
+    def __init__(self):
+        self.jobs: List[ScheduledJob] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._stopped = False
+
+    def every(self, seconds: float, func: Callable[[], Awaitable[None]], name: str, overlap_key: Optional[str] = None):
+        """每隔 seconds 秒运行一次"""
+        self.jobs.append(ScheduledJob(name, func, interval=seconds, overlap_key=overlap_key))
+
+    def daily(self, at: str, func: Callable[[], Awaitable[None]], name: str, overlap_key: Optional[str] = None):
+        """每天 at（HH:MM）运行一次"""
+        self.jobs.append(ScheduledJob(name, func, at=at, overlap_key=overlap_key))
+
+    def is_running(self, overlap_key: str) -> bool:
+        """同一 overlap_key 的任务是否正在运行"""
+        task = self._running.get(overlap_key)
+        return task is not None and not task.done()
+
+    def trigger(self, job: ScheduledJob) -> bool:
+        """立即触发一个任务
+
+        Returns:
+            bool: 是否启动（同类任务正在运行时跳过）
+        """
+        if self.is_running(job.overlap_key):
+            logging.warning(f"任务 {job.name} 跳过：上一次 {job.overlap_key} 任务尚未完成")
+            return False
+        self._running[job.overlap_key] = asyncio.create_task(self._run_job(job))
+        return True
+
+    async def _run_job(self, job: ScheduledJob):
+        """运行任务，异常只记录不中断调度"""
+        logging.info(f"开始执行定时任务 {job.name} - {datetime.now()}")
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"任务 {job.name} 执行出错: {str(e)}", exc_info=True)
+        logging.info(f"定时任务 {job.name} 完成 - {datetime.now()}")
+
+    async def run(self):
+        """运行调度循环，直到 stop() 被调用"""
+        now = datetime.now()
+        for job in self.jobs:
+            job.schedule_next(now)
+
+        while not self._stopped:
+            now = datetime.now()
+            for job in self.jobs:
+                if job.next_run <= now:
+                    self.trigger(job)
+                    job.schedule_next(now)
+
+            delay = min((job.next_run - now).total_seconds() for job in self.jobs) if self.jobs else 3600
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+        # 等待正在运行的任务结束
+        running = [task for task in self._running.values() if not task.done()]
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def stop(self):
+        """停止调度循环"""
+        self._stopped = True
+        self._wakeup.set()
@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+import pytest
+
+# src.config 在导入时检查这些环境变量，测试中使用占位值
+os.environ.setdefault('API_ID', '12345')
+os.environ.setdefault('API_HASH', 'test')
+os.environ.setdefault('TARGET_GROUPS', 'test_group')
+os.environ.setdefault('QUARK_COOKIE', '__uid=test_uid; __pus=test')
+
+# setup_logger 在模块导入时打开日志文件，测试的日志写到临时目录，不追加到仓库中的 app.log
+_log_dir = tempfile.TemporaryDirectory(prefix='quark-tests-')
+os.environ['LOG_FILE'] = os.path.join(_log_dir.name, 'app.log')
+
+
+@pytest.fixture(autouse=True)
+def fast_rate_limiter(monkeypatch):
+    """每个测试使用新的令牌桶（asyncio.run 每次创建新的事件循环），并放宽速率"""
+    from src.config import RATE_LIMIT_CONFIG
+    from src.utils.rate_limit import rate_limiter
+
+    limits = {
+        upstream: {endpoint: (1000.0, 1000) for endpoint in endpoints}
+        for upstream, endpoints in RATE_LIMIT_CONFIG['LIMITS'].items()
+    }
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, 'LIMITS', limits)
+    rate_limiter.buckets.clear()
+    yield
+    rate_limiter.buckets.clear()
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from src.utils.aio import SingleFlight, iter_until, merge_streams
+from src.utils.cache import TTLCache
+
+
+async def _stream(items, delay=0):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+def test_merge_streams_yields_every_item():
+    async def run():
+        merged = merge_streams([_stream([1, 2, 3]), _stream("ab"), _stream([])])
+        return [item async for item in merged]
+
+    items = asyncio.run(run())
+    assert sorted(map(str, items)) == ["1", "2", "3", "a", "b"]
+
+
+def test_merge_streams_cancels_streams_on_early_exit():
+    cancelled = []
+
+    async def endless():
+        try:
+            while True:
+                await asyncio.sleep(0)
+                yield 1
+        finally:
+            cancelled.append(True)
+
+    async def run():
+        merged = merge_streams([endless(), endless()])
+        async for _ in merged:
+            break
+        await merged.aclose()
+
+    asyncio.run(run())
+    assert cancelled == [True, True]
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.utils.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=600)
+    cache.set("繁花", ["result"])
+    cache.set("长相思", [], ttl=30)
+
+    now[0] += 60
+    assert cache.get("繁花") == ["result"]
+    # 单独指定的 ttl 先过期
+    assert cache.get("长相思") is None
+
+    cache.set("与凤行", ["result"])
+    cache.set("墨雨云间", ["result"])
+    # 超出容量时淘汰最久未使用的项
+    assert cache.get("繁花") is None
+    now[0] += 601
+    assert cache.get("墨雨云间") is None
+
+
+def test_single_flight_stream_replays_items_to_late_subscribers():
+    calls = []
+
+    async def events():
+        calls.append(1)
+        for item in ("candidate", "result"):
+            await asyncio.sleep(0.01)
+            yield item
+
+    async def run():
+        flights = SingleFlight()
+        first = flights.stream("繁花", events)
+        assert await first.__anext__() == "candidate"
+        # 迭代进行中加入的调用方从头收到全部元素
+        late = [item async for item in flights.stream("繁花", events)]
+        rest = [item async for item in first]
+        await asyncio.sleep(0)
+        assert not flights.in_flight("繁花")
+        return late, rest
+
+    late, rest = asyncio.run(run())
+    assert late == ["candidate", "result"]
+    assert rest == ["result"]
+    assert len(calls) == 1
+
+
+def test_single_flight_stream_raises_source_error_to_subscribers():
+    async def events():
+        yield 1
+        raise ValueError("搜索失败")
+
+    async def run():
+        flights = SingleFlight()
+        items = []
+        with pytest.raises(ValueError):
+            async for item in flights.stream("key", events):
+                items.append(item)
+        return items
+
+    assert asyncio.run(run()) == [1]
+
+
+def test_iter_until_times_out_and_closes_iterator():
+    closed = []
+
+    async def slow():
+        try:
+            yield 1
+            await asyncio.sleep(10)
+            yield 2
+        finally:
+            closed.append(True)
+
+    async def run():
+        items = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for item in iter_until(slow(), 0.05):
+                items.append(item)
+        return items
+
+    assert asyncio.run(run()) == [1]
+    assert closed == [True]
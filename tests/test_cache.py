@@ -0,0 +1,78 @@
+import json
+import time
+
+import pytest
+
+from src.config import CACHE_CONFIG
+from src.utils.cache import LRUCache, SearchCache
+
+
+@pytest.fixture
+def cache_paths(tmp_path, monkeypatch):
+    monkeypatch.setitem(CACHE_CONFIG, "SEARCH_CACHE_FILE", tmp_path / "search_cache.json")
+    return tmp_path
+
+
+@pytest.fixture
+def cache(cache_paths):
+    cache = SearchCache(cache_paths / "search_cache.db")
+    yield cache
+    cache.close()
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_search_cache_persists_to_sqlite(cache_paths):
+    cache = SearchCache(cache_paths / "search_cache.db")
+    cache.set("庆余年_60", [{"share_url": "https://pan.quark.cn/s/a"}])
+    cache.close()
+
+    # 新实例的内存层为空，从数据库读取
+    cache = SearchCache(cache_paths / "search_cache.db")
+    assert cache.get("庆余年_60")["results"] == [{"share_url": "https://pan.quark.cn/s/a"}]
+    cache.delete("庆余年_60")
+    assert cache.get("庆余年_60") is None
+    cache.close()
+
+
+def test_search_cache_expires_entries(cache, monkeypatch):
+    cache.set("繁花_60", [{"share_url": "x"}])
+    later = time.time() + cache.expire_seconds + 1
+    monkeypatch.setattr("src.utils.cache.time.time", lambda: later)
+    assert cache.get("繁花_60") is None
+    assert cache.conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0] == 0
+
+
+def test_search_cache_migrates_json_file(cache_paths):
+    old = {"长相思_60": {"timestamp": "2099-01-01T00:00:00", "results": [{"share_url": "y"}]}}
+    (cache_paths / "search_cache.json").write_text(json.dumps(old, ensure_ascii=False), encoding="utf-8")
+
+    cache = SearchCache(cache_paths / "search_cache.db")
+    assert cache.get("长相思_60")["results"] == [{"share_url": "y"}]
+    assert (cache_paths / "search_cache.json.migrated").exists()
+    cache.close()
+
+
+def test_invalidate_share_urls_drops_entries_with_evicted_shares(cache_paths):
+    cache = SearchCache(cache_paths / "search_cache.db")
+    cache.set("庆余年_60", [{"share_url": "https://pan.quark.cn/s/a"}])
+    cache.set("繁花_60", [{"share_url": "https://pan.quark.cn/s/b"}])
+    cache.close()
+
+    # 只在数据库中的条目和内存中的条目都会被删除
+    cache = SearchCache(cache_paths / "search_cache.db")
+    cache.set("长相思_60", [{"share_url": "https://pan.quark.cn/s/c"}])
+    assert cache.invalidate_share_urls(["https://pan.quark.cn/s/a", "https://pan.quark.cn/s/c"]) == 2
+
+    assert cache.get("庆余年_60") is None
+    assert cache.get("长相思_60") is None
+    assert cache.get("繁花_60")["results"] == [{"share_url": "https://pan.quark.cn/s/b"}]
+    cache.close()
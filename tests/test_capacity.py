@@ -0,0 +1,191 @@
+import asyncio
+import time
+
+import pytest
+
+from src.config import QUARK_CONFIG
+from src.quark.capacity import CapacityManager
+from src.quark.registry import ShareRegistry
+
+GB = 1024 ** 3
+DAY = 86400
+
+
+class FakeSaver:
+    """模拟网盘：删除的文件进入回收站，清理回收站后才释放容量"""
+
+    def __init__(self, files, total=100 * GB, other=0):
+        self.files = dict(files)
+        self.recycled = {}
+        self.total = total
+        self.other = other
+        self.deleted = []
+        self.delete_ok = True
+
+    async def get_capacity(self):
+        used = self.other + sum(self.files.values()) + sum(self.recycled.values())
+        return {"total_capacity": self.total, "use_capacity": used}
+
+    async def get_all_files(self, pdir_fid="0"):
+        return [{"fid": fid, "size": size} for fid, size in self.files.items()]
+
+    async def delete_files(self, fids):
+        if not self.delete_ok:
+            return {"success": False, "message": "error"}
+        self.deleted.append(list(fids))
+        for fid in fids:
+            self.recycled[fid] = self.files.pop(fid)
+        return {"success": True, "task_id": f"task-{len(self.deleted)}"}
+
+    async def get_recycle_list(self, page=1, size=50):
+        records = [{"record_id": f"r-{fid}", "fid": fid} for fid in self.recycled]
+        return records[(page - 1) * size:page * size]
+
+    async def remove_recycled(self, record_ids):
+        for record_id in record_ids:
+            self.recycled.pop(record_id[2:], None)
+        return {"success": True}
+
+
+async def _task_done(task_id):
+    return {"code": 0, "data": {"status": 2}}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ShareRegistry(tmp_path / "shares.db")
+    yield registry
+    registry.close()
+
+
+@pytest.fixture(autouse=True)
+def capacity_config(monkeypatch):
+    monkeypatch.setitem(QUARK_CONFIG, 'CAPACITY_EVICT_RATIO', 0.9)
+    monkeypatch.setitem(QUARK_CONFIG, 'CAPACITY_TARGET_RATIO', 0.8)
+    monkeypatch.setitem(QUARK_CONFIG, 'CAPACITY_EVICT_BATCH', 1)
+    monkeypatch.setitem(QUARK_CONFIG, 'CAPACITY_MIN_IDLE_HOURS', 48)
+    monkeypatch.setitem(QUARK_CONFIG, 'CAPACITY_PURGE_RECYCLED', True)
+
+
+def _record(registry, pwd_id, fid, days_ago, size=10 * GB):
+    registry.record_save(pwd_id, fid, {"file_name": pwd_id, "size": size})
+    with registry.conn:
+        registry.conn.execute(
+            "UPDATE shares SET last_published = ? WHERE pwd_id = ?", (time.time() - days_ago * DAY, pwd_id)
+        )
+
+
+def _setup(registry):
+    # f0 最久未发布；f5 一天前刚发布过，不能清理
+    for i in range(6):
+        _record(registry, f"p{i}", f"f{i}", days_ago=10 - i if i < 5 else 1)
+    return FakeSaver({f"f{i}": 10 * GB for i in range(6)}, other=35 * GB)
+
+
+def test_plan_orders_by_last_published_and_keeps_recent(registry):
+    saver = _setup(registry)
+    manager = CapacityManager(saver, registry, _task_done, "u1")
+
+    report = asyncio.run(manager.evict(dry_run=True))
+
+    assert report["used"] == 95 * GB
+    assert report["to_free"] == 15 * GB
+    assert [item["fid"] for item in report["evict"]] == ["f0", "f1"]
+    assert saver.deleted == []
+    assert "需释放" in CapacityManager.format_report(report)
+
+
+def test_plan_dedupes_fids_by_latest_publish(registry):
+    saver = _setup(registry)
+    # f0 的另一条登记刚发布过，以最近一次为准
+    _record(registry, "p0-again", "f0", days_ago=0)
+    manager = CapacityManager(saver, registry, _task_done, "u1")
+
+    report = asyncio.run(manager.plan())
+
+    assert [item["fid"] for item in report["evict"]] == ["f1", "f2"]
+
+
+def test_no_eviction_below_threshold(registry):
+    _record(registry, "p0", "f0", days_ago=10)
+    saver = FakeSaver({"f0": 10 * GB})
+    manager = CapacityManager(saver, registry, _task_done, "u1")
+
+    report = asyncio.run(manager.evict())
+
+    assert report["to_free"] == 0
+    assert report["evict"] == []
+    assert saver.deleted == []
+
+
+def test_evict_waits_for_task_and_stops_at_target(registry):
+    saver = _setup(registry)
+    waited = []
+
+    async def query_task(task_id):
+        waited.append(task_id)
+        return await _task_done(task_id)
+
+    manager = CapacityManager(saver, registry, query_task, "u1")
+    report = asyncio.run(manager.evict())
+
+    assert saver.deleted == [["f0"], ["f1"]]
+    assert waited == ["task-1", "task-2"]
+    assert report["used"] == 75 * GB
+    assert saver.recycled == {}
+    remaining = [entry["saved_fid"] for entry in registry.least_recently_published()]
+    assert remaining == ["f2", "f3", "f4", "f5"]
+
+
+def test_failed_delete_task_stops_eviction(registry):
+    saver = _setup(registry)
+
+    async def query_task(task_id):
+        return {"code": -1, "message": "任务超时"}
+
+    manager = CapacityManager(saver, registry, query_task, "u1")
+    report = asyncio.run(manager.evict())
+
+    assert saver.deleted == [["f0"]]
+    assert report["deleted"] == []
+    # 任务失败时不能确认文件已删除，登记保留
+    assert registry.get("p0") is not None
+
+
+def test_eviction_stops_when_capacity_does_not_drop(registry, monkeypatch):
+    # 不清理回收站时容量不会减少，删除一批后停止，而不是继续删除整个计划
+    monkeypatch.setitem(QUARK_CONFIG, 'CAPACITY_PURGE_RECYCLED', False)
+    saver = _setup(registry)
+    manager = CapacityManager(saver, registry, _task_done, "u1")
+
+    report = asyncio.run(manager.evict())
+
+    assert saver.deleted == [["f0"]]
+    assert [item["fid"] for item in report["deleted"]] == ["f0"]
+
+
+def test_missing_files_are_removed_from_registry(registry):
+    saver = _setup(registry)
+    _record(registry, "gone", "f-gone", days_ago=20)
+    manager = CapacityManager(saver, registry, _task_done, "u1")
+
+    report = asyncio.run(manager.evict())
+
+    assert report["missing"] == ["f-gone"]
+    assert registry.get("gone") is None
+
+
+def test_listing_failure_aborts_plan(registry):
+    saver = _setup(registry)
+
+    async def fail(pdir_fid="0"):
+        return None
+
+    saver.get_all_files = fail
+    manager = CapacityManager(saver, registry, _task_done, "u1")
+
+    report = asyncio.run(manager.evict())
+
+    assert report["error"] == "获取文件列表失败"
+    assert saver.deleted == []
+    assert registry.get("p0") is not None
@@ -0,0 +1,154 @@
+import asyncio
+
+from src.collector import ResourceCollector
+from src.config import RESULTS_CONFIG, WECHAT_CONFIG
+from src.telegram.searcher import TelegramResourceSearcher
+
+
+class FakeQuark:
+    """按链接预设转存、分享是否成功"""
+
+    def __init__(self, failing_saves=(), failing_shares=(), dead=(), registered=()):
+        self.failing_saves = set(failing_saves)
+        self.failing_shares = set(failing_shares)
+        self.dead = set(dead)
+        self.registered = set(registered)
+        self.saved = []
+        self.cleared = []
+        self.touched = []
+        self.validated = []
+        self.evicted = []
+
+    async def ensure_capacity(self):
+        return [{"deleted": [{"fid": "fid_old", "share_url": url} for url in self.evicted]}]
+
+    def touch_share(self, share_url):
+        self.touched.append(share_url)
+        return share_url in self.registered
+
+    async def validate_links(self, links):
+        self.validated.extend(links)
+        return {link: link not in self.dead for link in links}
+
+    async def save_shared_file(self, link):
+        self.saved.append(link)
+        if link in self.failing_saves:
+            return {"success": False, "message": "转存失败"}
+        return {"success": True, "fid": f"fid:{link}"}
+
+    async def share_file(self, fid):
+        link = fid.split(":", 1)[1]
+        if link in self.failing_shares:
+            return {"success": False}
+        return {"success": True, "share_url": f"{link}/mine"}
+
+    def clear_share(self, share_url):
+        self.cleared.append(share_url)
+
+
+class FakeSearcher:
+    build_result = staticmethod(TelegramResourceSearcher.build_result)
+
+    def __init__(self, candidates, quark, cached=None):
+        self.candidates = candidates
+        self.quark_api = quark
+        self.cache = dict(cached or {})
+        self.searched = []
+
+    async def search_titles(self, titles, debug=False):
+        self.searched.append(list(titles))
+        return {title: self.candidates.get(title, []) for title in titles}
+
+    def get_cached_results(self, title):
+        return self.cache.get(title, [])
+
+    def cache_results(self, title, results):
+        self.cache[title] = results
+
+    def invalidate_cached_results(self, title):
+        self.cache.pop(title, None)
+
+    def invalidate_share_urls(self, share_urls):
+        stale = [title for title, results in self.cache.items()
+                 if any(result["share_url"] in share_urls for result in results)]
+        for title in stale:
+            del self.cache[title]
+        return len(stale)
+
+
+def _candidate(title, *links):
+    return {"text": title, "link": links[0], "links": list(links), "similarity": 90, "title": title}
+
+
+def _collector(searcher):
+    collector = ResourceCollector.__new__(ResourceCollector)
+    collector.searcher = searcher
+    return collector
+
+
+HOT = [{"title": "庆余年", "hot_score": 3}, {"title": "繁花", "hot_score": 2}, {"title": "长相思", "hot_score": 1}]
+
+
+def test_pipeline_falls_back_to_next_link_and_keeps_hot_order():
+    quark = FakeQuark(failing_saves=["s/a1"], failing_shares=["s/b1"], dead=["s/c1"])
+    searcher = FakeSearcher({
+        "庆余年": [_candidate("庆余年", "s/a1", "s/a2")],
+        "繁花": [_candidate("繁花", "s/b1"), _candidate("繁花", "s/b2")],
+        "长相思": [_candidate("长相思", "s/c1")],
+    }, quark)
+
+    results = asyncio.run(_collector(searcher)._run_pipeline(HOT))
+
+    assert [r["title"] for r in results] == ["庆余年", "繁花"]
+    assert [r["search_results"][0]["share_url"] for r in results] == ["s/a2/mine", "s/b2/mine"]
+    # 失效链接不进入转存阶段；没有结果的标题也写入缓存
+    assert "s/c1" not in quark.saved
+    assert searcher.cache["长相思"] == []
+    # 所有标题在一次检索中完成
+    assert searcher.searched == [["庆余年", "繁花", "长相思"]]
+
+
+def test_pipeline_reuses_registered_results_and_researches_the_rest():
+    quark = FakeQuark(registered=["old/a/mine"])
+    cached = {"庆余年": [{"share_url": "old/a/mine", "similarity": 90}]}
+    previous = {"繁花": {"title": "繁花", "search_results": [{"share_url": "old/b/mine", "similarity": 90}]}}
+    searcher = FakeSearcher({"繁花": [_candidate("繁花", "s/b2")]}, quark, cached)
+
+    results = asyncio.run(_collector(searcher)._run_pipeline(HOT, previous=previous))
+
+    # 庆余年沿用缓存并更新发布时间；繁花的分享已不在登记表中，重新检索；长相思上次没有结果，重新检索
+    assert searcher.searched == [["繁花", "长相思"]]
+    assert quark.touched == ["old/a/mine", "old/b/mine"]
+    # 沿用的结果不再逐个请求接口检查
+    assert "old/a/mine" not in quark.validated
+    assert [r["search_results"][0]["share_url"] for r in results] == ["old/a/mine", "s/b2/mine"]
+
+
+def test_collect_resources_drops_cached_results_of_evicted_shares(tmp_path, monkeypatch):
+    class FakeHotSearch:
+        async def get_hot_searches(self):
+            return HOT[:1]
+
+    monkeypatch.setitem(RESULTS_CONFIG, "LATEST_FILE", tmp_path / "latest.json")
+    monkeypatch.setitem(WECHAT_CONFIG, "ENABLED", False)
+    quark = FakeQuark(registered=["old/a/mine"])
+    quark.evicted = ["old/a/mine"]
+    cached = {"庆余年": [{"share_url": "old/a/mine", "similarity": 90}]}
+    searcher = FakeSearcher({"庆余年": [_candidate("庆余年", "s/a2")]}, quark, cached)
+    collector = _collector(searcher)
+    collector.hot_search = FakeHotSearch()
+    collector._save_results = lambda results: None
+
+    results = asyncio.run(collector.collect_resources())
+
+    # 被清理的分享不再从缓存中沿用，重新检索并转存
+    assert searcher.searched == [["庆余年"]]
+    assert results[0]["search_results"][0]["share_url"] == "s/a2/mine"
+
+
+def test_result_keys_compare_titles_and_share_urls():
+    results = [
+        {"title": "庆余年", "search_results": [{"share_url": "x"}]},
+        {"title": "繁花", "search_results": []},
+    ]
+    assert ResourceCollector._result_keys(results) == [("庆余年", "x")]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import datetime
+
+from telethon.errors import ChannelInvalidError
+from telethon.tl.types import InputPeerChannel, InputPeerChat, InputPeerSelf
+
+from src.telegram.entities import EntityCache
+from src.telegram.groups import GroupScheduler
+from src.telegram.index import IndexedMessage
+from src.telegram.matcher import TitleMatcher
+from src.telegram.searcher import TelegramResourceSearcher
+from src.telegram.similarity import SimilarityScorer
+
+
+def test_entity_cache_round_trips_input_peers(tmp_path):
+    cache_file = tmp_path / "entities.json"
+    cache = EntityCache(cache_file)
+    assert cache.set("yunpanshare", InputPeerChannel(1001, 42)) == InputPeerChannel(1001, 42)
+    cache.set("old_chat", InputPeerChat(7))
+
+    # 新进程从文件中恢复 InputPeer，不需要再解析
+    cache = EntityCache(cache_file)
+    assert cache.get("yunpanshare") == InputPeerChannel(1001, 42)
+    assert cache.get("old_chat") == InputPeerChat(7)
+    assert cache.get("missing") is None
+    assert cache.title("yunpanshare") == "yunpanshare"
+
+
+def test_entity_cache_ignores_unsupported_peers(tmp_path):
+    cache = EntityCache(tmp_path / "entities.json")
+    assert cache.set("me", InputPeerSelf()) == InputPeerSelf()
+    assert cache.get("me") is None
+    assert not (tmp_path / "entities.json").exists()
+
+
+def test_entity_cache_remembers_failures_for_ttl(tmp_path, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.telegram.entities.time.monotonic", lambda: now[0])
+    cache = EntityCache(tmp_path / "entities.json", failure_ttl=60)
+    cache.mark_failed("broken")
+    assert cache.is_failed("broken")
+    now[0] += 61
+    assert not cache.is_failed("broken")
+
+    # 解析成功后清除失败记录
+    cache.mark_failed("flaky")
+    cache.set("flaky", InputPeerChannel(2002, 1))
+    assert not cache.is_failed("flaky")
+
+
+def test_entity_cache_survives_corrupt_file(tmp_path):
+    cache_file = tmp_path / "entities.json"
+    cache_file.write_text("{not json", encoding="utf-8")
+    assert EntityCache(cache_file).entries == {}
+
+
+def test_entity_cache_discards_peers_of_another_account(tmp_path):
+    cache_file = tmp_path / "entities.json"
+    cache = EntityCache(cache_file)
+    cache.bind_user(1)
+    cache.set("yunpanshare", InputPeerChannel(1001, 42))
+
+    # 同一账号重启后沿用缓存
+    cache = EntityCache(cache_file)
+    cache.bind_user(1)
+    assert cache.get("yunpanshare") == InputPeerChannel(1001, 42)
+
+    # 换了账号登录时，其他账号的 access_hash 全部丢弃
+    cache.bind_user(2)
+    assert cache.get("yunpanshare") is None
+    assert json.loads(cache_file.read_text(encoding="utf-8")) == {"user_id": 2, "entities": {}}
+
+
+def test_entity_cache_discards_legacy_file_without_account(tmp_path):
+    cache_file = tmp_path / "entities.json"
+    cache_file.write_text(json.dumps({"yunpanshare": {"type": "chat", "id": 7}}), encoding="utf-8")
+    cache = EntityCache(cache_file)
+    cache.bind_user(1)
+    assert cache.get("yunpanshare") is None
+
+
+def test_rejected_cached_peer_is_resolved_again(tmp_path):
+    stale, fresh = InputPeerChannel(1001, 42), InputPeerChannel(1001, 43)
+    message = IndexedMessage("yunpanshare", 1, datetime(2024, 1, 1), "名称：繁花\n\n链接：https://pan.quark.cn/s/000000000001")
+
+    class FakeGroups(GroupScheduler):
+        async def iter_messages(self, client, entity, group_key, *args, **kwargs):
+            if entity == stale:
+                raise ChannelInvalidError(request=None)
+            yield message
+
+    searcher = TelegramResourceSearcher.__new__(TelegramResourceSearcher)
+    searcher.client = None
+    searcher.search_mode = "scan"
+    searcher.scorer = SimilarityScorer()
+    searcher.groups = FakeGroups(1)
+    searcher.entities = EntityCache(tmp_path / "entities.json")
+    searcher.entities.set("yunpanshare", stale)
+    resolved = []
+
+    async def fetch_entity(group_id, max_retries=3):
+        resolved.append(group_id)
+        return fresh
+
+    searcher._fetch_entity = fetch_entity
+
+    candidates = asyncio.run(searcher._search_titles_group("yunpanshare", ["繁花"], TitleMatcher(["繁花"]), 60, 10))
+
+    assert resolved == ["yunpanshare"]
+    assert searcher.entities.get("yunpanshare") == fresh
+    assert [c["message_id"] for c in candidates["繁花"]] == [1]
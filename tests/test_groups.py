@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from src.config import RATE_LIMIT_CONFIG
+from src.telegram.groups import GroupScheduler
+
+
+class FakeMessage:
+    def __init__(self, id):
+        self.id = id
+
+
+class FloodingClient:
+    """按 offset_id 从新到旧返回消息，第一次迭代到 flood_at 之后触发 FloodWait"""
+
+    def __init__(self, total, flood_at=None, seconds=0):
+        self.total = total
+        self.flood_at = flood_at
+        self.seconds = seconds
+        self.offsets = []
+
+    async def iter_messages(self, entity, limit=None, offset_id=0, wait_time=None, **kwargs):
+        self.offsets.append(offset_id)
+        start = offset_id - 1 if offset_id else self.total
+        count = 0
+        for message_id in range(start, 0, -1):
+            if limit is not None and count >= limit:
+                return
+            if message_id == self.flood_at:
+                self.flood_at = None
+                raise FloodWaitError(request=None, capture=self.seconds)
+            count += 1
+            yield FakeMessage(message_id)
+
+
+def test_iter_messages_resumes_after_flood_wait():
+    client = FloodingClient(total=10, flood_at=6, seconds=0)
+
+    async def run():
+        scheduler = GroupScheduler(concurrency=1)
+        return [m.id async for m in scheduler.iter_messages(client, None, "group_a", limit=8)]
+
+    # 中断后从最后一条消息继续，不重复也不遗漏
+    assert asyncio.run(run()) == [10, 9, 8, 7, 6, 5, 4, 3]
+    assert client.offsets == [0, 7]
+
+
+def test_parked_group_yields_slot_to_other_groups():
+    order = []
+
+    async def run():
+        scheduler = GroupScheduler(concurrency=1)
+        scheduler.park("group_a", 0.05)
+
+        async def work(group):
+            async with scheduler.slot(group):
+                order.append(group)
+
+        await asyncio.gather(work("group_a"), work("group_b"))
+
+    asyncio.run(run())
+    assert order == ["group_b", "group_a"]
+
+
+def test_run_retries_after_flood_wait():
+    calls = []
+
+    async def func():
+        calls.append(1)
+        if len(calls) == 1:
+            raise FloodWaitError(request=None, capture=0)
+        return "ok"
+
+    assert asyncio.run(GroupScheduler(concurrency=2).run("group_a", func)) == "ok"
+    assert len(calls) == 2
+
+
+def test_long_flood_wait_skips_group(monkeypatch):
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, 'MAX_FLOOD_WAIT', 60)
+
+    async def func():
+        raise FloodWaitError(request=None, capture=3600)
+
+    async def run():
+        scheduler = GroupScheduler(concurrency=1)
+        with pytest.raises(RuntimeError):
+            await scheduler.run("group_a", func)
+        assert scheduler.remaining("group_a") > 3000
+        # 暂停期内的后续请求直接跳过，不等待
+        with pytest.raises(RuntimeError):
+            async with scheduler.slot("group_a"):
+                pass
+
+    asyncio.run(run())
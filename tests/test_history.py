@@ -0,0 +1,105 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from telethon.errors import FloodWaitError
+from telethon.tl.types import Message, PeerChannel
+
+from src.telegram.history import AdaptiveLimiter, HistoryFetcher
+
+
+class FakeClient:
+    """模拟 messages.getHistory：按 offset_id 向前翻页，min_id 为区间下界"""
+
+    def __init__(self, top_id, flood_after=None):
+        self.top_id = top_id
+        self.flood_after = flood_after
+        self.requests = 0
+
+    async def get_input_entity(self, entity):
+        return entity
+
+    async def get_messages(self, peer, limit=1):
+        return [SimpleNamespace(id=self.top_id)]
+
+    async def __call__(self, request):
+        self.requests += 1
+        if self.flood_after is not None and self.requests > self.flood_after:
+            self.flood_after = None
+            raise FloodWaitError(request=None, capture=30)
+        ids = range(min(request.offset_id - 1, self.top_id), request.min_id, -1)
+        messages = [Message(id=i, peer_id=PeerChannel(1), message=f"m{i}") for i in list(ids)[:request.limit]]
+        return SimpleNamespace(messages=messages)
+
+
+def _fetch(client, **kwargs):
+    fetched = []
+    fetcher = HistoryFetcher(client, concurrency=2, max_concurrency=3, range_size=250)
+    stats = asyncio.run(fetcher.fetch("group", on_batch=lambda batch: fetched.extend(m.id for m in batch), **kwargs))
+    return stats, fetched
+
+
+def test_fetch_covers_every_message_once():
+    stats, fetched = _fetch(FakeClient(top_id=1234))
+
+    assert sorted(fetched) == list(range(1, 1235))
+    assert stats["messages"] == 1234
+    assert stats["top_id"] == 1234
+
+
+def test_fetch_respects_min_id():
+    _, fetched = _fetch(FakeClient(top_id=600), min_id=450)
+
+    assert sorted(fetched) == list(range(451, 601))
+
+
+def test_flood_wait_saves_remaining_ranges_and_resume_completes():
+    client = FakeClient(top_id=1234, flood_after=4)
+    interrupted = []
+    fetched = []
+    resumed = []
+    fetcher = HistoryFetcher(client, concurrency=2, max_concurrency=3, range_size=250)
+
+    async def run():
+        limiter = fetcher.new_limiter()
+        with pytest.raises(FloodWaitError):
+            await fetcher.fetch(
+                "group",
+                on_batch=lambda batch: fetched.extend(m.id for m in batch),
+                on_interrupt=lambda top_id, ranges: interrupted.append((top_id, ranges)),
+                limiter=limiter
+            )
+        reduced = limiter.limit
+
+        # FloodWait 不在拉取器内等待，剩余区间交给调用方保存
+        assert len(interrupted) == 1
+        top_id, ranges = interrupted[0]
+        stats = await fetcher.fetch(
+            "group", on_batch=lambda batch: resumed.extend(m.id for m in batch), resume=(top_id, ranges),
+            limiter=limiter
+        )
+        return reduced, limiter.limit, stats
+
+    reduced, limit, stats = asyncio.run(run())
+
+    assert reduced == 1
+    # 继续拉取时沿用同一个限制器，从降低后的并发数逐步放宽
+    assert limit > reduced
+    top_id, ranges = interrupted[0]
+    assert top_id == 1234
+    remaining = {i for lower, upper in ranges for i in range(lower + 1, upper + 1)}
+    assert remaining.isdisjoint(fetched)
+    assert remaining | set(fetched) == set(range(1, 1235))
+    assert stats["top_id"] == 1234
+    assert sorted(fetched + resumed) == list(range(1, 1235))
+
+
+def test_adaptive_limiter_aimd():
+    limiter = AdaptiveLimiter(initial=2, maximum=4)
+    for _ in range(2):
+        limiter.on_success()
+    assert limiter.limit == 3
+
+    limiter.on_flood_wait()
+    assert limiter.limit == 1
+    assert limiter.successes == 0
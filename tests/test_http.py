@@ -0,0 +1,47 @@
+import asyncio
+
+from src.utils.http import SharedSession, json_dumps, json_loads
+
+
+def test_json_helpers_round_trip_unicode():
+    data = {"title": "庆余年", "size": 1024}
+    text = json_dumps(data)
+    assert "庆余年" in text
+    assert json_loads(text) == data
+
+
+def test_session_is_shared_and_closed_with_last_user():
+    shared = SharedSession()
+
+    async def run():
+        shared.acquire()
+        shared.acquire()
+        session = shared.get()
+        assert shared.get() is session
+        await shared.release()
+        assert not session.closed
+        await shared.release()
+        assert session.closed
+        # 关闭后再次使用时重新创建
+        reopened = shared.get()
+        assert reopened is not session
+        await shared.close()
+
+    asyncio.run(run())
+
+
+def test_session_is_recreated_for_new_event_loop():
+    shared = SharedSession()
+    sessions = []
+
+    async def run():
+        sessions.append(shared.get())
+
+    async def cleanup():
+        await sessions[0].close()
+        await shared.close()
+
+    asyncio.run(run())
+    asyncio.run(run())
+    assert sessions[0] is not sessions[1]
+    asyncio.run(cleanup())
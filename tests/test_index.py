@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.telegram.index import IndexedMessage, MessageIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MessageIndex(tmp_path / "messages.db")
+    yield index
+    index.close()
+
+
+def _message(message_id, text, group="group_a", minutes=0):
+    return IndexedMessage(group, message_id, datetime(2024, 1, 1) + timedelta(minutes=minutes), text)
+
+
+def test_upsert_advances_sync_position(index):
+    assert index.get_max_id("group_a") == 0
+    index.upsert_messages("group_a", [_message(1, "庆余年第二季"), _message(2, "繁花")], 2)
+    assert index.get_max_id("group_a") == 2
+
+    # 同步位置只会前进，不会被较小的值覆盖
+    index.upsert_messages("group_a", [], 1)
+    assert index.get_max_id("group_a") == 2
+    assert index.get_max_id("group_b") == 0
+
+
+def test_search_uses_fts_and_returns_newest_first(index):
+    index.upsert_messages("group_a", [
+        _message(1, "庆余年第二季 4K 夸克", minutes=1),
+        _message(2, "繁花 全30集", minutes=2),
+        _message(3, "庆余年 第一季 合集", minutes=3),
+    ], 3)
+
+    results = index.search("庆余年")
+    assert [m.id for m in results] == [3, 1]
+    assert results[0].date == datetime(2024, 1, 1, 0, 3)
+
+
+def test_upsert_updates_existing_message(index):
+    index.upsert_messages("group_a", [_message(1, "旧标题")], 1)
+    index.upsert_messages("group_a", [_message(1, "庆余年 更新")], 1)
+
+    assert index.search("旧标题") == []
+    assert [m.text for m in index.search("庆余年")] == ["庆余年 更新"]
+
+
+def test_search_filters_by_group_and_limit(index):
+    index.upsert_messages("group_a", [_message(i, f"繁花 第{i}集", minutes=i) for i in range(1, 6)], 5)
+    index.upsert_messages("group_b", [_message(1, "繁花 全集", group="group_b")], 1)
+
+    assert [m.id for m in index.search("繁花", "group_a", limit=2)] == [5, 4]
+    assert [m.group for m in index.search("繁花", "group_b")] == ["group_b"]
+
+
+def test_short_query_falls_back_to_like(index):
+    index.upsert_messages("group_a", [_message(1, "繁花 全集"), _message(2, "100%_完结")], 2)
+
+    # 少于 3 个字符时 trigram 无法命中，使用 LIKE；通配符需要转义
+    assert [m.id for m in index.search("繁花")] == [1]
+    assert [m.id for m in index.search("%_")] == [2]
+    assert index.search("  ") == []
+
+
+def test_backfill_progress_is_saved_and_finished(index):
+    assert index.get_backfill("group_a") is None
+
+    index.save_backfill("group_a", 1234, [(0, 250), (500, 734)])
+    assert index.get_backfill("group_a") == (1234, [(0, 250), (500, 734)])
+    # 拉取过程中不推进同步位置
+    assert index.get_max_id("group_a") == 0
+
+    index.finish_backfill("group_a", 1234)
+    assert index.get_backfill("group_a") is None
+    assert index.get_max_id("group_a") == 1234
@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from telethon.tl.types import Message, PeerChannel
+
+from src.telegram.index import MessageIndex
+from src.telegram.listener import ResourceListener
+from src.telegram.matcher import TitleMatcher
+from src.telegram.similarity import SimilarityScorer
+from tests.test_search_stream import _searcher
+
+CHAT_ID = -1001234
+
+
+def _event(message_id, text):
+    message = Message(id=message_id, peer_id=PeerChannel(1234), date=datetime(2024, 1, 1), message=text)
+    return SimpleNamespace(message=message, chat_id=CHAT_ID)
+
+
+@pytest.fixture
+def listener(tmp_path):
+    searcher = _searcher([])
+    searcher.index = MessageIndex(tmp_path / "messages.db")
+    searcher.scorer = SimilarityScorer()
+    searcher.client = None
+    results = []
+
+    async def on_result(title, items):
+        results.append((title, items))
+
+    listener = ResourceListener(searcher, hot_search=None, on_result=on_result)
+    listener.matcher = TitleMatcher(["庆余年第二季", "繁花"])
+    listener._groups = {CHAT_ID: "group_a"}
+    listener.results = results
+    yield listener
+    searcher.index.close()
+
+
+async def _handle(listener, *events):
+    for event in events:
+        await listener._on_message(event)
+    await asyncio.gather(*listener._tasks)
+
+
+def test_hot_title_post_is_indexed_and_saved(listener):
+    event = _event(5, "名称：庆余年第二季 (2024)\n链接：https://pan.quark.cn/s/abc")
+    asyncio.run(_handle(listener, event))
+
+    assert [m.id for m in listener.index.search("庆余年", "group_a")] == [5]
+    # 写入索引不推进同步位置，增量同步仍会补齐漏掉的消息
+    assert listener.index.get_max_id("group_a") == 0
+    assert listener.searcher.quark_api.saved == ["https://pan.quark.cn/s/abc"]
+    assert [title for title, _ in listener.results] == ["庆余年第二季"]
+
+
+def test_unrelated_or_linkless_posts_are_only_indexed(listener):
+    asyncio.run(_handle(
+        listener,
+        _event(6, "名称：长相思\n链接：https://pan.quark.cn/s/other"),
+        _event(7, "名称：繁花\n还没有链接"),
+        SimpleNamespace(message=_event(8, "名称：繁花").message, chat_id=-100999),
+    ))
+
+    assert listener.searcher.quark_api.saved == []
+    assert sorted(m.id for m in listener.index.search("名称", "group_a")) == [6, 7]
+
+
+def test_same_title_is_saved_once_while_in_flight(listener):
+    asyncio.run(_handle(
+        listener,
+        _event(9, "名称：繁花\n链接：https://pan.quark.cn/s/first"),
+        _event(10, "名称：繁花 全30集\n链接：https://pan.quark.cn/s/second"),
+    ))
+
+    assert listener.searcher.quark_api.saved == ["https://pan.quark.cn/s/first"]
+
+
+def test_posts_are_not_indexed_outside_index_mode(listener):
+    listener.index = None
+    asyncio.run(_handle(listener, _event(11, "名称：庆余年第二季\n链接：https://pan.quark.cn/s/abc")))
+
+    # 没有本地索引时只匹配热搜标题并转存
+    assert listener.searcher.quark_api.saved == ["https://pan.quark.cn/s/abc"]
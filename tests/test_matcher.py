@@ -0,0 +1,25 @@
+from src.telegram.matcher import TitleMatcher, normalize_title
+
+
+def test_normalize_title_strips_punctuation_and_case():
+    assert normalize_title("Loki: Season 2！") == "lokiseason2"
+    assert normalize_title("庆余年 第二季") == "庆余年第二季"
+
+
+def test_title_matcher_finds_every_title_in_one_pass():
+    matcher = TitleMatcher(["庆余年", "庆余年第二季", "繁花", "余年"])
+    text = "名称：庆余年 第二季 (2024) [4K]\n描述：繁花之后又一部"
+    assert matcher.match_titles(text) == ["庆余年", "庆余年第二季", "繁花", "余年"]
+
+
+def test_title_matcher_follows_failure_links():
+    # “刑警” 的匹配要从 “我是刑” 的失败指针转移过去
+    matcher = TitleMatcher(["我是刑警队长", "刑警"])
+    assert matcher.match_titles("我是刑警") == ["刑警"]
+    assert matcher.match_titles("我是刑警队长") == ["我是刑警队长", "刑警"]
+
+
+def test_title_matcher_ignores_empty_titles_and_case():
+    matcher = TitleMatcher(["", "！！", "Loki"])
+    assert matcher.match_titles("LOKI 第二季") == ["Loki"]
+    assert matcher.match("没有标题") == set()
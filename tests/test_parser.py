@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from telethon.tl.types import Message, MessageEntityTextUrl, PeerChannel
+
+from src.telegram.index import IndexedMessage
+from src.telegram.parser import message_text_with_links, parse_message
+
+POST = (
+    "名称：庆余年 第二季 (2024) [WEB-4K]\n\n"
+    "描述：范闲归来\n\n"
+    "链接：https://pan.quark.cn/s/abc123\n\n"
+    "📁 大小：120 GB\n"
+    "🏷 标签：#电视剧 #国产剧\n"
+    "📢 频道：@yunpanshare"
+)
+
+
+def _message(text, entities=None):
+    return Message(id=7, peer_id=PeerChannel(1), date=datetime(2024, 1, 1), message=text, entities=entities)
+
+
+def test_parse_resource_post():
+    parsed = parse_message(_message(POST), "group_a")
+    assert parsed.group == "group_a"
+    assert parsed.id == 7
+    assert parsed.title == "庆余年 第二季 (2024) [WEB-4K]"
+    assert parsed.size == "120 GB"
+    assert parsed.tags == ["电视剧", "国产剧"]
+    assert parsed.links == ["https://pan.quark.cn/s/abc123"]
+    # 空行和链接、频道等推广行不计入描述
+    assert parsed.description == "名称：庆余年 第二季 (2024) [WEB-4K]\n描述：范闲归来\n📁 大小：120 GB\n🏷 标签：#电视剧 #国产剧"
+
+
+def test_parse_uses_first_line_without_title_and_dedupes_links():
+    text = "繁花 全30集\nhttps://pan.quark.cn/s/x1 https://pan.quark.cn/s/x1\nhttps://pan.quark.cn/s/x2"
+    parsed = parse_message(_message(text))
+    assert parsed.title == "繁花 全30集"
+    assert parsed.links == ["https://pan.quark.cn/s/x1", "https://pan.quark.cn/s/x2"]
+    assert parsed.size is None and parsed.tags == []
+
+
+def test_parse_hidden_links():
+    text = "名称：长相思\n点击这里下载"
+    hidden = MessageEntityTextUrl(offset=text.index("点击"), length=4, url="https://pan.quark.cn/s/hidden")
+    other = MessageEntityTextUrl(offset=0, length=2, url="https://example.com/")
+    message = _message(text, [hidden, other])
+
+    assert parse_message(message).links == ["https://pan.quark.cn/s/hidden"]
+    # 写入本地索引的文本带上隐藏链接，之后从索引解析也能得到链接
+    indexed = IndexedMessage("group_a", 7, message.date, message_text_with_links(message))
+    assert parse_message(indexed).links == ["https://pan.quark.cn/s/hidden"]
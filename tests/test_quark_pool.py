@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import deque
+
+import pytest
+
+from src.config import QUARK_CONFIG
+from src.quark.pool import LOGIN_REQUIRED_CODE, QuarkAccount, QuarkAPIPool
+from src.quark.registry import ShareRegistry
+
+
+class FakeAPI:
+    """记录调用的夸克接口，可以预设返回的错误码"""
+
+    def __init__(self, name, registry, error_code=None):
+        self.name = name
+        self.registry = registry
+        self.recent_errors = deque(maxlen=20)
+        self.error_code = error_code
+        self.calls = []
+
+    async def save_and_share(self, share_url):
+        self.calls.append(share_url)
+        if self.error_code is not None:
+            self.recent_errors.append((time.time(), self.error_code))
+            return {"success": False, "code": self.error_code}
+        return {"success": True, "fid": f"{self.name}_fid", "share_url": f"{share_url}_{self.name}"}
+
+
+def _account(name, registry, used=0, error_code=None):
+    account = QuarkAccount.__new__(QuarkAccount)
+    account.api = FakeAPI(name, registry, error_code)
+    account.name = name
+    account.total_capacity = 100
+    account.used_capacity = used
+    # 容量刚刷新过，测试中不访问网络
+    account.capacity_checked_at = time.monotonic()
+    account.in_flight = 0
+    account.parked_until = 0.0
+    return account
+
+
+@pytest.fixture
+def registries(tmp_path):
+    registries = [ShareRegistry(tmp_path / f"registry_{i}.db") for i in range(2)]
+    yield registries
+    for registry in registries:
+        registry.close()
+
+
+def _pool(accounts):
+    pool = QuarkAPIPool.__new__(QuarkAPIPool)
+    pool.accounts = accounts
+    pool._fid_owner = {}
+    pool._capacity_lock = asyncio.Lock()
+    return pool
+
+
+def test_saves_go_to_least_loaded_account(registries):
+    busy = _account("busy", registries[0], used=80)
+    idle = _account("idle", registries[1], used=10)
+    pool = _pool([busy, idle])
+
+    result = asyncio.run(pool.save_and_share("https://pan.quark.cn/s/abc"))
+    assert result["share_url"].endswith("_idle")
+    assert pool._fid_account("idle_fid") is idle
+
+
+def test_known_share_stays_on_owner(registries):
+    first = _account("first", registries[0], used=90)
+    second = _account("second", registries[1], used=10)
+    registries[0].record_save("abc", "fid_abc")
+    pool = _pool([first, second])
+
+    asyncio.run(pool.save_and_share("https://pan.quark.cn/s/abc"))
+    assert first.api.calls == ["https://pan.quark.cn/s/abc"]
+    assert second.api.calls == []
+
+
+def test_parked_account_falls_back_to_next(registries):
+    expired = _account("expired", registries[0], used=0, error_code=LOGIN_REQUIRED_CODE)
+    backup = _account("backup", registries[1], used=50)
+    pool = _pool([expired, backup])
+
+    result = asyncio.run(pool.save_and_share("https://pan.quark.cn/s/abc"))
+    assert result["success"]
+    assert result["share_url"].endswith("_backup")
+    assert not expired.is_healthy()
+
+
+def test_full_accounts_are_skipped(registries):
+    full = _account("full", registries[0], used=int(100 * QUARK_CONFIG['CAPACITY_FULL_RATIO']))
+    pool = _pool([full])
+
+    result = asyncio.run(pool.save_and_share("https://pan.quark.cn/s/abc"))
+    assert not result["success"]
+    assert full.api.calls == []
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from telethon.errors import FloodWaitError
+
+from src.config import RATE_LIMIT_CONFIG
+from src.utils.rate_limit import RateLimiter, TokenBucket, rate_limiter, throttled
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """假时钟：asyncio.sleep 只推进时间，记录每次等待的秒数"""
+    now = [1000.0]
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(round(seconds, 6))
+        now[0] += seconds
+
+    monkeypatch.setattr("src.utils.rate_limit.time.monotonic", lambda: now[0])
+    monkeypatch.setattr("src.utils.rate_limit.asyncio.sleep", sleep)
+    return now, sleeps
+
+
+def test_bucket_allows_burst_then_paces(clock):
+    now, sleeps = clock
+    bucket = TokenBucket("test", rate=2.0, burst=3)
+
+    async def run():
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    # 前 3 个请求用掉积累的令牌，之后每 0.5 秒一个
+    assert sleeps == [0.5, 0.5]
+
+
+def test_penalize_halves_rate_and_pauses(clock):
+    now, sleeps = clock
+    bucket = TokenBucket("test", rate=4.0, burst=4)
+    bucket.penalize(10)
+    assert bucket.rate == 2.0
+
+    async def run():
+        await bucket.acquire()
+        await bucket.acquire()
+
+    asyncio.run(run())
+    # 暂停结束后先放行一个请求，之后按减半的速率补充令牌
+    assert sleeps == [10.0, 0.5]
+
+
+def test_rate_has_floor_and_recovers_additively(clock):
+    bucket = TokenBucket("test", rate=10.0, burst=1)
+    for _ in range(10):
+        bucket.penalize()
+    assert bucket.rate == pytest.approx(10.0 * RATE_LIMIT_CONFIG['MIN_RATE_RATIO'])
+
+    rewards = 0
+    while bucket.rate < 10.0:
+        bucket.reward()
+        rewards += 1
+    assert bucket.rate == 10.0
+    assert rewards == pytest.approx((1 - RATE_LIMIT_CONFIG['MIN_RATE_RATIO']) / RATE_LIMIT_CONFIG['RECOVERY_STEP'], abs=1)
+
+
+def test_rate_limiter_scopes_and_throttle_codes(monkeypatch):
+    monkeypatch.setitem(RATE_LIMIT_CONFIG, 'THROTTLE_CODES', {'quark': [429]})
+    limiter = RateLimiter()
+    account_a = limiter.bucket('quark', 'save', 'a')
+    assert limiter.bucket('quark', 'save', 'a') is account_a
+    assert limiter.bucket('quark', 'save', 'b') is not account_a
+    # 没有单独配置的接口使用上游的默认速率
+    assert limiter.bucket('quark', 'unknown').rate == RATE_LIMIT_CONFIG['LIMITS']['quark']['default'][0]
+
+    rate = account_a.rate
+    assert limiter.on_error_code('quark', 'save', 429, 'a')
+    assert account_a.rate == rate / 2
+    assert not limiter.on_error_code('quark', 'save', 41011, 'a')
+    assert account_a.rate == rate / 2
+
+
+def test_throttled_reports_flood_wait():
+    async def messages():
+        yield 1
+        raise FloodWaitError(request=None, capture=5)
+
+    async def run():
+        items = []
+        with pytest.raises(FloodWaitError):
+            async for item in throttled(messages(), 'history', pause=False):
+                items.append(item)
+        return items
+
+    assert asyncio.run(run()) == [1]
+    bucket = rate_limiter.bucket('telegram', 'history')
+    # pause=False 时只降速，等待由调用方处理
+    assert bucket.rate == bucket.base_rate / 2
+    assert bucket.paused_until == 0.0
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from src.quark.api import QuarkAPI
+from src.quark.registry import DeadShareCache, ShareRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ShareRegistry(tmp_path / "registry.db")
+    yield registry
+    registry.close()
+
+
+def test_record_save_and_share(registry):
+    registry.record_save("pwd_a", "fid_a", {"file_name": "庆余年", "size": 1024})
+    entry = registry.get("pwd_a")
+    assert entry["saved_fid"] == "fid_a"
+    assert entry["file_info"] == {"file_name": "庆余年", "size": 1024}
+    assert entry["share_url"] is None
+
+    registry.record_share("fid_a", "https://pan.quark.cn/s/mine", "mine")
+    assert registry.get_by_fid("fid_a")["share_url"] == "https://pan.quark.cn/s/mine"
+    assert registry.get("pwd_missing") is None
+
+
+def test_clear_share_keeps_saved_file(registry):
+    registry.record_save("pwd_a", "fid_a")
+    registry.record_share("fid_a", "https://pan.quark.cn/s/mine", "mine")
+    registry.clear_share("https://pan.quark.cn/s/mine")
+    entry = registry.get("pwd_a")
+    assert entry["share_url"] is None and entry["share_pwd_id"] is None
+    assert entry["saved_fid"] == "fid_a"
+
+
+def test_resave_resets_share(registry):
+    registry.record_save("pwd_a", "fid_a")
+    registry.record_share("fid_a", "https://pan.quark.cn/s/mine", "mine")
+    registry.record_save("pwd_a", "fid_b")
+    entry = registry.get("pwd_a")
+    assert entry["saved_fid"] == "fid_b"
+    assert entry["share_url"] is None
+
+
+def test_least_recently_published_and_remove(registry, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.quark.registry.time.time", lambda: now[0])
+    for i, pwd_id in enumerate(["pwd_a", "pwd_b", "pwd_c"]):
+        now[0] += 1
+        registry.record_save(pwd_id, f"fid_{i}")
+    now[0] += 1
+    registry.touch("pwd_a")
+
+    assert [entry["pwd_id"] for entry in registry.least_recently_published()] == ["pwd_b", "pwd_c", "pwd_a"]
+
+    registry.remove_fids(["fid_1"])
+    registry.remove("pwd_c")
+    assert [entry["pwd_id"] for entry in registry.least_recently_published()] == ["pwd_a"]
+
+
+def test_touch_share_by_share_url(registry, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.quark.registry.time.time", lambda: now[0])
+    registry.record_save("pwd_a", "fid_a")
+    registry.record_share("fid_a", "https://pan.quark.cn/s/mine", "mine")
+
+    now[0] += 100
+    assert registry.touch_share("https://pan.quark.cn/s/mine")
+    assert registry.get("pwd_a")["last_published"] == now[0]
+    assert not registry.touch_share("https://pan.quark.cn/s/unknown")
+
+
+def test_dead_share_cache_expires_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.quark.registry.time.time", lambda: now[0])
+    dead = DeadShareCache(tmp_path / "registry.db", ttl_hours=1)
+    dead.mark_dead("pwd_dead", 41011)
+    assert dead.is_dead("pwd_dead")
+    assert not dead.is_dead("pwd_alive")
+
+    now[0] += 3601
+    assert not dead.is_dead("pwd_dead")
+    dead.close()
+
+    # 重新打开时清理过期记录
+    dead = DeadShareCache(tmp_path / "registry.db", ttl_hours=1)
+    assert dead.conn.execute("SELECT COUNT(*) FROM dead_shares").fetchone()[0] == 0
+    dead.close()
+
+
+def test_validate_links_uses_registry_and_dead_cache(tmp_path):
+    api = QuarkAPI.__new__(QuarkAPI)
+    api.registry = ShareRegistry(tmp_path / "registry.db")
+    api.dead_shares = DeadShareCache(tmp_path / "registry.db")
+    api.registry.record_save("saved", "fid_saved")
+    api.dead_shares.mark_dead("dead", 41011)
+    requested = []
+
+    async def get_stoken(pwd_id):
+        requested.append(pwd_id)
+        if pwd_id == "expired":
+            return {"success": False, "code": 41011}
+        if pwd_id == "flaky":
+            return {"success": False, "code": -1}
+        return {"success": True}
+
+    api.get_stoken = get_stoken
+    links = [f"https://pan.quark.cn/s/{pwd_id}" for pwd_id in ("saved", "dead", "expired", "flaky", "alive", "alive")]
+    status = asyncio.run(api.validate_links(links + ["https://example.com/nothing"]))
+
+    assert status == {
+        "https://pan.quark.cn/s/saved": True,
+        "https://pan.quark.cn/s/dead": False,
+        "https://pan.quark.cn/s/expired": False,
+        # 无法确定时视为有效，交给保存流程处理
+        "https://pan.quark.cn/s/flaky": True,
+        "https://pan.quark.cn/s/alive": True,
+        "https://example.com/nothing": False,
+    }
+    # 已登记和负缓存中的分享不请求接口，重复链接只请求一次
+    assert sorted(requested) == ["alive", "expired", "flaky"]
+    api.registry.close()
+    api.dead_shares.close()
@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+
+from src.utils.scheduler import AsyncScheduler, ScheduledJob
+
+
+async def _noop():
+    pass
+
+
+def test_daily_job_runs_today_or_tomorrow():
+    job = ScheduledJob("daily", _noop, at="08:30")
+    job.schedule_next(datetime(2024, 1, 1, 7, 0))
+    assert job.next_run == datetime(2024, 1, 1, 8, 30)
+    job.schedule_next(datetime(2024, 1, 1, 8, 30))
+    assert job.next_run == datetime(2024, 1, 2, 8, 30)
+
+
+def test_interval_job():
+    job = ScheduledJob("every", _noop, interval=90)
+    job.schedule_next(datetime(2024, 1, 1, 7, 0))
+    assert job.next_run == datetime(2024, 1, 1, 7, 1, 30)
+
+
+def test_jobs_with_same_overlap_key_do_not_overlap():
+    started = []
+
+    async def slow():
+        started.append(1)
+        await asyncio.sleep(0.05)
+
+    async def run():
+        scheduler = AsyncScheduler()
+        scheduler.every(60, slow, "collect", overlap_key="collector")
+        scheduler.daily("00:00", slow, "daily_collect", overlap_key="collector")
+        first, second = scheduler.jobs
+        assert scheduler.trigger(first)
+        assert not scheduler.trigger(second)
+        await asyncio.sleep(0.1)
+        # 上一次结束后可以再次触发
+        assert scheduler.trigger(second)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert len(started) == 2
+
+
+def test_run_loop_triggers_due_jobs_and_survives_errors():
+    runs = []
+
+    async def flaky():
+        runs.append(1)
+        raise ValueError("任务出错")
+
+    async def run():
+        scheduler = AsyncScheduler()
+        scheduler.every(0.02, flaky, "flaky")
+        loop_task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.15)
+        scheduler.stop()
+        await asyncio.wait_for(loop_task, timeout=1)
+
+    asyncio.run(run())
+    assert len(runs) >= 3
@@ -0,0 +1,98 @@
+import asyncio
+
+from src.telegram.searcher import TelegramResourceSearcher
+
+
+class FakeCache:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = {"results": value}
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeQuarkAPI:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.saved = []
+        self.registered = set()
+        self.touched = []
+
+    async def validate_links(self, links):
+        return {link: True for link in links}
+
+    async def save_and_share(self, link):
+        self.saved.append(link)
+        if link in self.failing:
+            return {"success": False, "message": "转存失败"}
+        share_url = link.replace("/s/", "/s/shared_")
+        self.registered.add(share_url)
+        return {"success": True, "share_url": share_url}
+
+    def touch_share(self, share_url):
+        self.touched.append(share_url)
+        return share_url in self.registered
+
+
+def _candidate(link, title="庆余年第二季", similarity=90):
+    return {"text": title, "link": link, "links": [link], "similarity": similarity, "title": title}
+
+
+def _searcher(candidates, failing=()):
+    searcher = TelegramResourceSearcher.__new__(TelegramResourceSearcher)
+    searcher.cache = FakeCache()
+    searcher.quark_api = FakeQuarkAPI(failing)
+
+    async def iter_candidates(query, limit, min_similarity=60):
+        for candidate in candidates:
+            yield candidate
+
+    searcher._iter_candidates = iter_candidates
+    return searcher
+
+
+async def _collect(events):
+    return [event async for event in events]
+
+
+def test_iter_search_and_save_reports_each_candidate_before_result():
+    links = ["https://pan.quark.cn/s/a", "https://pan.quark.cn/s/b", "https://pan.quark.cn/s/c"]
+    searcher = _searcher([_candidate(link) for link in links], failing=[links[0]])
+
+    events = asyncio.run(_collect(searcher.iter_search_and_save("庆余年第二季")))
+
+    assert [next(iter(event)) for event in events] == ["candidate", "candidate", "result"]
+    assert events[-1]["result"]["share_url"] == "https://pan.quark.cn/s/shared_b"
+    # 第一个转存成功后不再处理其余候选
+    assert searcher.quark_api.saved == links[:2]
+    assert searcher.cache.get("庆余年第二季_60")["results"] == [events[-1]["result"]]
+
+
+def test_search_and_save_returns_cached_results():
+    searcher = _searcher([_candidate("https://pan.quark.cn/s/a")])
+    first = asyncio.run(searcher.search_and_save("庆余年第二季"))
+    second = asyncio.run(searcher.search_and_save("庆余年第二季"))
+
+    assert first == second
+    assert len(first) == 1
+    assert searcher.quark_api.saved == ["https://pan.quark.cn/s/a"]
+    # 返回缓存时更新分享的发布时间
+    assert searcher.quark_api.touched == ["https://pan.quark.cn/s/shared_a"]
+
+
+def test_cached_results_of_evicted_shares_are_searched_again():
+    searcher = _searcher([_candidate("https://pan.quark.cn/s/a")])
+    asyncio.run(searcher.search_and_save("庆余年第二季"))
+    # 容量清理删除了文件，登记表中已没有该分享
+    searcher.quark_api.registered.clear()
+
+    results = asyncio.run(searcher.search_and_save("庆余年第二季"))
+
+    assert searcher.quark_api.saved == ["https://pan.quark.cn/s/a"] * 2
+    assert results[0]["share_url"] == "https://pan.quark.cn/s/shared_a"
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from src.telegram.pool import SearcherPool
+
+
+class FakeClient:
+    def __init__(self):
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeSearcher:
+    def __init__(self):
+        self.client = FakeClient()
+        self.health_checks = 0
+
+    async def health_check(self):
+        self.health_checks += 1
+        await asyncio.sleep(0.01)
+        self.client.connected = True
+        return True
+
+
+def test_acquire_limits_concurrency_and_reconnects_once():
+    active = []
+    peak = []
+
+    async def run():
+        pool = SearcherPool(size=2)
+        pool.searcher = FakeSearcher()
+
+        async def search():
+            async with pool.acquire():
+                active.append(1)
+                peak.append(len(active))
+                await asyncio.sleep(0.01)
+                active.pop()
+
+        await asyncio.gather(*(search() for _ in range(5)))
+        return pool.searcher
+
+    searcher = asyncio.run(run())
+    assert max(peak) == 2
+    # 多个请求同时发现连接断开时只重连一次
+    assert searcher.health_checks == 1
+
+
+def test_acquire_before_start_fails():
+    async def run():
+        async with SearcherPool(size=1).acquire():
+            pass
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
@@ -0,0 +1,36 @@
+from src.quark.share_meta import ShareMetaCache, is_dead_share
+
+
+def test_is_dead_share():
+    assert is_dead_share({"code": 41011})
+    assert is_dead_share({"status": 404})
+    assert not is_dead_share({"code": 0, "status": 200})
+
+
+def test_share_meta_cache_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.quark.share_meta.time.monotonic", lambda: now[0])
+    cache = ShareMetaCache(ttl=60)
+    cache.set_stoken("pwd_a", "stoken_1")
+    cache.set_detail("pwd_a", [{"fid": "f1"}])
+    assert cache.get_stoken("pwd_a") == "stoken_1"
+    assert cache.get_detail("pwd_a") == [{"fid": "f1"}]
+
+    now[0] += 61
+    assert cache.get_stoken("pwd_a") is None
+    assert cache.get_detail("pwd_a") is None
+
+
+def test_detail_is_tied_to_current_stoken():
+    cache = ShareMetaCache(ttl=60)
+    # 没有 stoken 时不缓存文件列表
+    cache.set_detail("pwd_a", [{"fid": "f1"}])
+    assert cache.get_detail("pwd_a") is None
+
+    cache.set_stoken("pwd_a", "stoken_1")
+    cache.set_detail("pwd_a", [{"fid": "f1"}])
+    cache.set_stoken("pwd_a", "stoken_2")
+    assert cache.get_detail("pwd_a") is None
+
+    cache.invalidate("pwd_a")
+    assert cache.get_stoken("pwd_a") is None
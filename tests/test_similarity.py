@@ -0,0 +1,20 @@
+from src.telegram.similarity import SimilarityScorer
+
+
+def test_scorer_matches_partial_ratio():
+    scorer = SimilarityScorer()
+    assert scorer.score("庆余年", "庆余年 第二季 (2024) [4K]") == 100
+    assert scorer.score("庆余年第二季", "繁花") < 60
+    assert scorer.score_batch("繁花", ["繁花", "繁花 第1季", "长相思"]) == [
+        scorer.score("繁花", "繁花"),
+        scorer.score("繁花", "繁花 第1季"),
+        scorer.score("繁花", "长相思"),
+    ]
+
+
+def test_scorer_cutoff_zeroes_low_scores():
+    scorer = SimilarityScorer()
+    texts = ["我是刑警 第2季", "与凤行", "我是刑警"]
+    full = scorer.score_batch("我是刑警", texts)
+    assert scorer.score_batch("我是刑警", texts, 60) == [score if score >= 60 else 0 for score in full]
+    assert scorer.score_batch("我是刑警", []) == []
@@ -0,0 +1,94 @@
+import asyncio
+
+from src.quark.task_poller import TaskPoller
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_wait_returns_result_when_task_finishes():
+    calls = []
+
+    async def fetch(task_id, retry_index):
+        calls.append(retry_index)
+        status = 2 if retry_index >= 2 else 0
+        return {"code": 0, "data": {"status": status, "task_id": task_id}}
+
+    async def main():
+        poller = TaskPoller(fetch, min_interval=0.01, max_interval=0.02)
+        return await poller.wait("t1")
+
+    result = _run(main())
+    assert result["data"]["status"] == 2
+    assert calls == [0, 1, 2]
+
+
+def test_concurrent_waits_share_one_poll():
+    calls = []
+
+    async def fetch(task_id, retry_index):
+        calls.append(task_id)
+        return {"code": 0, "data": {"status": 2}}
+
+    async def main():
+        poller = TaskPoller(fetch, min_interval=0.01)
+        return await asyncio.gather(poller.wait("t1"), poller.wait("t1"), poller.wait("t2"))
+
+    results = _run(main())
+    assert all(result["code"] == 0 for result in results)
+    assert sorted(calls) == ["t1", "t2"]
+
+
+def test_malformed_response_resolves_as_failure():
+    async def fetch(task_id, retry_index):
+        # 缺少 data / status 的响应不能让轮询循环崩溃
+        return {"code": 0}
+
+    async def main():
+        poller = TaskPoller(fetch, min_interval=0.01, max_interval=0.01, max_errors=2)
+        first = await asyncio.wait_for(poller.wait("t1"), timeout=2)
+        second = await asyncio.wait_for(poller.wait("t2"), timeout=2)
+        return first, second
+
+    first, second = _run(main())
+    assert first["code"] == -1
+    assert second["code"] == -1
+
+
+def test_fetch_errors_resolve_after_max_errors():
+    async def fetch(task_id, retry_index):
+        raise RuntimeError("boom")
+
+    async def main():
+        poller = TaskPoller(fetch, min_interval=0.01, max_interval=0.01, max_errors=1)
+        return await asyncio.wait_for(poller.wait("t1"), timeout=2)
+
+    result = _run(main())
+    assert result == {"code": -1, "message": "boom"}
+
+
+def test_stuck_task_times_out():
+    async def fetch(task_id, retry_index):
+        return {"code": 0, "data": {"status": 0}}
+
+    async def main():
+        poller = TaskPoller(fetch, min_interval=0.01, max_interval=0.02, timeout=0.1)
+        return await asyncio.wait_for(poller.wait("t1"), timeout=2)
+
+    result = _run(main())
+    assert result == {"code": -1, "message": "任务超时"}
+
+
+def test_close_fails_pending_tasks():
+    async def fetch(task_id, retry_index):
+        return {"code": 0, "data": {"status": 0}}
+
+    async def main():
+        poller = TaskPoller(fetch, min_interval=0.5)
+        waiter = asyncio.create_task(poller.wait("t1"))
+        await asyncio.sleep(0.05)
+        await poller.close()
+        return await waiter
+
+    assert _run(main())["code"] == -1
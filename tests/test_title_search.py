@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.config import TELEGRAM_CONFIG
+from src.telegram.index import IndexedMessage, MessageIndex
+from src.telegram.matcher import TitleMatcher, query_variants
+from src.telegram.searcher import TelegramResourceSearcher
+from src.telegram.similarity import SimilarityScorer
+
+
+def _post(message_id, title, group="group_a"):
+    text = f"名称：{title}\n\n描述：测试\n\n链接：https://pan.quark.cn/s/{message_id:012x}"
+    return IndexedMessage(group, message_id, datetime(2024, 1, 1), text)
+
+
+class FakeGroups:
+    """记录服务端搜索的关键词，按关键词返回预设的消息"""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.searches = []
+
+    async def iter_messages(self, client, entity, group_key, endpoint="history", limit=None, search=None, **kwargs):
+        self.searches.append(search)
+        for message in self.messages:
+            if search is None or search in message.text:
+                yield message
+
+
+@pytest.fixture
+def searcher(tmp_path):
+    searcher = TelegramResourceSearcher.__new__(TelegramResourceSearcher)
+    searcher.client = None
+    searcher.scorer = SimilarityScorer()
+    searcher.index = MessageIndex(tmp_path / "messages.db")
+    searcher.syncs = 0
+
+    async def get_entity(group):
+        return group
+
+    async def sync_group(entity, group, debug=False):
+        searcher.syncs += 1
+        return 0
+
+    searcher._get_entity = get_entity
+    searcher._sync_group = sync_group
+    yield searcher
+    searcher.index.close()
+
+
+def test_query_variants_strip_brackets_and_seasons():
+    assert query_variants("庆余年第二季") == ["庆余年第二季", "庆余年"]
+    assert query_variants("与凤行（2024）") == ["与凤行（2024）", "与凤行"]
+    assert query_variants("  长相思 第2季 ") == ["长相思 第2季", "长相思"]
+    assert query_variants("Loki Season 2") == ["Loki Season 2", "Loki"]
+    assert query_variants("繁") == []
+    assert len(query_variants("边水往事：第1季", max_variants=2)) == 2
+
+
+def test_index_mode_syncs_each_group_once_per_batch(searcher):
+    searcher.search_mode = "index"
+    searcher.index.upsert_messages("group_a", [_post(1, "庆余年 第二季"), _post(2, "繁花"), _post(3, "长相思")], 3)
+    titles = ["庆余年第二季", "繁花", "与凤行"]
+
+    candidates = asyncio.run(searcher._search_titles_group("group_a", titles, TitleMatcher(titles), 60, 10))
+
+    assert searcher.syncs == 1
+    assert [c["message_id"] for c in candidates["庆余年第二季"]] == [1]
+    assert [c["message_id"] for c in candidates["繁花"]] == [2]
+    assert candidates["与凤行"] == []
+
+
+def test_server_mode_dedupes_and_caps_variant_searches(searcher, monkeypatch):
+    monkeypatch.setitem(TELEGRAM_CONFIG, "MAX_SERVER_SEARCHES", 3)
+    searcher.search_mode = "server"
+    searcher.groups = FakeGroups([_post(1, "庆余年 第二季"), _post(2, "繁花")])
+    titles = ["庆余年第二季", "庆余年", "繁花"]
+
+    hits = asyncio.run(searcher._search_title_variants("group_a", "group_a", titles, 10))
+
+    # 先搜每个标题本身，“庆余年”只搜一次，超出上限的变体不再搜索
+    assert searcher.groups.searches == ["庆余年第二季", "庆余年", "繁花"]
+    assert [m.id for m in hits["庆余年"]] == [1]
+    assert [m.id for m in hits["繁花"]] == [2]
+
+
+def test_scan_mode_searches_by_query_and_filters_similarity(searcher):
+    searcher.search_mode = "scan"
+    searcher.groups = FakeGroups([_post(1, "我是刑警"), _post(2, "我是刑警队长的日常生活记录"), _post(3, "繁花")])
+
+    async def collect():
+        return [c async for c in searcher._iter_group_candidates("group_a", "我是刑警", 10, 90)]
+
+    candidates = asyncio.run(collect())
+
+    # 单个查询在服务端按关键词搜索，不遍历全部历史
+    assert searcher.groups.searches[0] is not None
+    assert all(c["similarity"] >= 90 for c in candidates)
+    assert 1 in [c["message_id"] for c in candidates]
+    assert 3 not in [c["message_id"] for c in candidates]
@@ -1,112 +1,132 @@
-# from fastapi import FastAPI, Request
-# from fastapi.responses import HTMLResponse, StreamingResponse
-# from fastapi.templating import Jinja2Templates
-# from fastapi.staticfiles import StaticFiles
-# import asyncio
-# import json
-# from search import QuarkResourceSearcher
-# import os
-# from pathlib import Path
-# import logging
-# import uvicorn
-# import time
-
-# # 修改日志配置
-# logging.basicConfig(
-#     level=logging.DEBUG,  # 改为 DEBUG 级别
-#     format='%(asctime)s - %(levelname)s - %(message)s',
-#     datefmt='%Y-%m-%d %H:%M:%S'
-# )
-
-# # 修改 uvicorn 日志级别
-# uvicorn_logger = logging.getLogger("uvicorn")
-# uvicorn_logger.setLevel(logging.DEBUG)
-# uvicorn_access_logger = logging.getLogger("uvicorn.access")
-# uvicorn_access_logger.setLevel(logging.DEBUG)
-
-# app = FastAPI()
-
-# # 创建templates和static目录
-# templates_dir = Path("templates")
-# static_dir = Path("static")
-# templates_dir.mkdir(exist_ok=True)
-# static_dir.mkdir(exist_ok=True)
-
-# # 设置静态文件和模板
-# app.mount("/static", StaticFiles(directory="static"), name="static")
-# templates = Jinja2Templates(directory="templates")
-
-# @app.get("/", response_class=HTMLResponse)
-# async def home(request: Request):
-#     return templates.TemplateResponse("index.html", {"request": request})
-
-# async def search_generator(query: str):
-#     searcher = QuarkResourceSearcher()
-#     try:
-#         await searcher.connect_and_login()
-        
-#         found_any = False
-        
-#         try:
-#             async for result in searcher.search_messages_stream(query, min_similarity=80):
-#                 found_any = True
-#                 text = result["text"]
-#                 similarity = result["similarity"]
-                
-#                 # 清理文本
-#                 text_parts = text.split('\n')
-#                 cleaned_parts = []
-                
-#                 for part in text_parts:
-#                     if any(mark in part for mark in [
-#                         "📁 大小：", "🏷 标签：", "📢 频道：", "👥 群组：", 
-#                         "链接：", "链接:", "https://pan.quark.cn",
-#                         "quark://", "#", "@"
-#                     ]):
-#                         continue
-#                     cleaned_parts.append(part.strip())
-                
-#                 text = '\n'.join(part for part in cleaned_parts if part)
-                
-#                 try:
-#                     save_result = await searcher.quark_api.save_shared_file(result["link"])
-#                     if save_result["success"]:
-#                         result_json = json.dumps({
-#                             "text": text,
-#                             "link": save_result["share_url"],
-#                             "similarity": similarity
-#                         })
-#                         yield f"data: {result_json}\n\n"
-#                         yield f"data: {json.dumps({'complete': True, 'total': 1})}\n\n"
-#                         return
-#                 except Exception as e:
-#                     logging.error(f"转换链接失败: {str(e)}")
-#                     continue
-                    
-#         except asyncio.TimeoutError as e:
-#             yield f"data: {json.dumps({'timeout': True, 'message': str(e)})}\n\n"
-#         except Exception as e:
-#             logging.error(f"搜索出错: {str(e)}")
-#             yield f"data: {json.dumps({'error': True, 'message': str(e)})}\n\n"
-            
-#     except Exception as e:
-#         logging.error(f"搜索出错: {str(e)}")
-#         yield f"data: {json.dumps({'error': True, 'message': str(e)})}\n\n"
-#     finally:
-#         await searcher.close()
-
-# @app.get("/search")
-# async def search(query: str):
-#     return StreamingResponse(
-#         search_generator(query),
-#         media_type="text/event-stream"
-#     )
-
-# if __name__ == "__main__":
-#     uvicorn.run(
-#         app, 
-#         host="0.0.0.0", 
-#         port=8000,
-#         log_level="debug",  # 改为 debug
-#         access_log=True     # 开启访问日志
-#     ) 
\ No newline at end of file
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.templating import Jinja2Templates
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
+import uvicorn
+
+from src.config import WEB_CONFIG
+from src.telegram.pool import SearcherPool
+from src.telegram.similarity import normalize_query
+from src.utils.aio import SingleFlight, iter_until
+from src.utils.cache import TTLCache
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S',
+    handlers=[
+        logging.FileHandler('web.log'),
+        logging.StreamHandler()
+    ]
+)
+
+# 搜索器在服务启动时创建并登录，所有请求共用
+pool = SearcherPool()
+
+# 相同查询的并发请求共用一次搜索（都收到同一份进度和结果），完成的结果在内存中缓存一段时间
+flights = SingleFlight()
+recent_results = TTLCache(WEB_CONFIG['RESULT_CACHE_SIZE'], WEB_CONFIG['RESULT_CACHE_TTL'])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not await pool.start():
+        raise RuntimeError("搜索器初始化失败，请检查 Telegram 登录状态")
+    try:
+        yield
+    finally:
+        await pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
+templates = Jinja2Templates(directory="templates")
+
+
+def sse(data: dict) -> str:
+    """编码一条 SSE 消息"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    return templates.TemplateResponse(request, "index.html")
+
+
+async def run_search(key: str, query: str):
+    """执行一次搜索，逐个产生搜索事件，完成后把结果写入内存缓存"""
+    results = []
+    async with pool.acquire() as searcher:
+        events = iter_until(searcher.iter_search_and_save(query), WEB_CONFIG['SEARCH_MAX_TIME'])
+        async for event in events:
+            if "result" in event:
+                results.append(event["result"])
+            yield event
+    # 没有结果可能是资源刚发布还未同步、或者转存暂时失败，只短暂缓存，稍后重新搜索
+    recent_results.set(key, results, None if results else WEB_CONFIG['EMPTY_RESULT_CACHE_TTL'])
+
+
+async def search_generator(query: str):
+    """搜索并转存资源，以 SSE 消息返回进度和结果
+
+    开始转存某个候选资源时发送 {"progress": ...}，转存成功后发送结果，最后发送 {"complete": ...}。
+    """
+    key = ' '.join(normalize_query(query).split())
+    if not key:
+        yield sse({"error": "请输入搜索关键词"})
+        return
+    try:
+        results = recent_results.get(key)
+        if results and not pool.searcher.touch_results(results):
+            # 分享对应的文件已被容量清理删除，重新搜索
+            recent_results.pop(key)
+            results = None
+        if results is not None:
+            events = _aiter_results(results)
+        else:
+            # 超时只结束当前请求，搜索继续进行，后续事件和结果供其他请求使用
+            events = iter_until(flights.stream(key, lambda: run_search(key, query)), WEB_CONFIG['SEARCH_TIMEOUT'])
+        total = 0
+        async for event in events:
+            if "candidate" in event:
+                title = event["candidate"].get("title") or query
+                yield sse({"progress": f"找到资源「{title}」，正在转存..."})
+                continue
+            result = event["result"]
+            total += 1
+            yield sse({
+                "text": result["text"],
+                "link": result["share_url"],
+                "similarity": result["similarity"]
+            })
+        yield sse({"complete": True, "total": total})
+    except asyncio.TimeoutError:
+        yield sse({"timeout": True, "message": "搜索超时，请缩小搜索范围或稍后重试"})
+    except Exception as e:
+        logging.error(f"搜索出错: {str(e)}", exc_info=True)
+        yield sse({"error": str(e)})
+
+
+async def _aiter_results(results: list):
+    """把缓存的结果包装成搜索事件"""
+    for result in results:
+        yield {"result": result}
+
+
+@app.get("/search")
+async def search(query: str):
+    return StreamingResponse(
+        search_generator(query.strip()),
+        media_type="text/event-stream"
+    )
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        app,
+        host=WEB_CONFIG['HOST'],
+        port=WEB_CONFIG['PORT']
+    )